@@ -1,59 +1,67 @@
 import json
+import sys
 from argparse import ArgumentParser
 from typing import Any
-from main.exceptions.insurance import BrokenWindowsException, CarDemotionDerbyException, CarToOldException, TooManyParrotsException
-from main.policies.base_policy import Policy
-from main.policies.vehicle_policy import VehiclePolicy
-from main.policies.house_policy import HousePolicy
-from main.premium_calculator import PremiumCalculator
+from main.daemon_client import daemon_quote
 
+# The pricing modules (and numpy) are imported only when this process prices the quote
+# itself: a quote forwarded to a running daemon (python3 -m main.quote_daemon) starts
+# with the standard library and main.daemon_client only.
 
-def main(product_type: str, payload: dict[str, Any]):
+
+def main(product_type: str, payload: dict[str, Any], socket_path: str | None = None, use_daemon: bool = True):
     """
     Processes a quote request and calculates the premium.
     Args:
         product_type: The type of insurance policy ("vehicle" or "house").
         payload: A dictionary containing the policy details.
+        socket_path: quote daemon socket, the default daemon socket when None.
+        use_daemon: forward the request to the quote daemon when one is running,
+            the quote is priced in this process otherwise.
     """
+    result = daemon_quote(product_type, payload, socket_path) if use_daemon else None
+    if result is None:
+        from main.quoting import quote
 
-    try:
-        if product_type == "vehicle":            
-            policy = VehiclePolicy(
-                age=payload["age"],                
-                policy_type=Policy.DEFAULT_POLICY,
-                accident_history=payload["accident_history"],
-                )
-            calculator = PremiumCalculator(500)
-            premium = calculator.calculate_premium(policy)
-            print(f"Premium for {product_type} policy: ${premium:.2f}")    
-        elif product_type == "house":
-            policy = HousePolicy(
-                age=payload["age"],
-                policy_type="house",                
-                flood_risk=payload["flood_risk"],                
-                n_parrots=payload["n_parrots"],
-                windows=payload["windows"]
-                )
-            calculator = PremiumCalculator(300)
-            premium = calculator.calculate_premium(policy)
-            print(f"Premium for {product_type} policy: ${premium:.2f}")
-        else:
-            print(f"Error: No more insurance types, please select 'vehicle' or 'house'")
-            return        
+        result = quote(product_type, payload)
+    print(result["message"])
+
+
+def main_stream(source_path: str, output_path: str | None = None, sink_directory: str | None = None,
+                sink_options: dict[str, Any] | None = None):
+    """
+    Prices newline-delimited JSON quote requests and writes NDJSON results.
+    Args:
+        source_path: file with one request per line ('-' for stdin).
+        output_path: destination file, stdout when None.
+        sink_directory: append the results to main.result_sink.ResultSink segments in
+            this directory instead of writing them to output_path.
+        sink_options: ResultSink options (compress, segment_bytes, ...).
+    """
+    from main.streaming import record_quotes, stream_quotes
+
+    source = sys.stdin if source_path == "-" else open(source_path, encoding="utf-8")
+    if sink_directory is not None:
+        from main.result_sink import ResultSink
 
-    except (ValueError, KeyError, TypeError) as e:        
-        print(f"Error processing quote: {e}")
-    except CarToOldException as e:
-        print("Blocked by UW Rules")
-    except CarDemotionDerbyException as e:
-        print("Blocked by UW Rules")     
-    except TooManyParrotsException as e:
-        print("Blocked by UW Rules")
-    except BrokenWindowsException as e:
-        print("Blocked by UW Rules")       
-    except Exception as ex:
-        print(f"Unexpected error: {ex}")
+        try:
+            with ResultSink(sink_directory, **(sink_options or {})) as results:
+                stats = record_quotes(source, results)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        print(stats.summary(), file=sys.stderr)
+        return
 
+    sink = sys.stdout if output_path is None else open(output_path, "w", encoding="utf-8")
+    try:
+        stats = stream_quotes(source, sink)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(stats.summary(), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -61,12 +69,65 @@ if __name__ == "__main__":
     Example usage:
     python3 src/app.py vehicle '{"age": 25, "accident_history": [2018], "outcome": "OK"}'
     python3 src/app.py house '{"age": 50, "flood_risk": "LOW", "n_parrots": 2, "windows": {"intact": 10, "broken": 2}}'
+    python3 src/app.py --stream quotes.ndjson --output results.ndjson
+    python3 src/app.py --rates rates.json --stream quotes.ndjson
+    python3 src/app.py --stream quotes.ndjson --metrics metrics.prom --metrics-interval 10
+    cat quotes.ndjson | python3 src/app.py --stream -
+    python3 src/app.py --stream quotes.ndjson --sink results/ --sink-segment-mb 256
+    python3 src/app.py --no-daemon vehicle '{"age": "6 years", "accident_history": []}'
     """
     parser = ArgumentParser(description="Quotation request")
-    parser.add_argument("product_type", type=str, choices=["vehicle", "house"])
-    parser.add_argument("payload", type=str)
+    parser.add_argument("product_type", type=str, nargs="?", choices=["vehicle", "house"])
+    parser.add_argument("payload", type=str, nargs="?")
+    parser.add_argument("--stream", metavar="FILE", nargs="?", const="-",
+                        help="price NDJSON quote requests from FILE (stdin when omitted or '-')")
+    parser.add_argument("--output", metavar="FILE", help="NDJSON results file for --stream (default stdout)")
+    parser.add_argument("--sink", metavar="DIR",
+                        help="append --stream results to compressed, rotated segment files in DIR")
+    parser.add_argument("--sink-segment-mb", type=float, default=64.0, help="size of a --sink segment file")
+    parser.add_argument("--sink-uncompressed", action="store_true", help="do not gzip the --sink segments")
+    parser.add_argument("--rates", metavar="FILE", help="rate table file (JSON), built-in rates when omitted")
+    parser.add_argument("--metrics", metavar="FILE", help="write pricing metrics (Prometheus text format) to FILE")
+    parser.add_argument("--metrics-format", choices=["prometheus", "json"], default="prometheus")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="seconds between --metrics dumps")
+    parser.add_argument("--socket", metavar="PATH", default=None,
+                        help="quote daemon socket (default $PREMIUM_QUOTE_SOCKET or premium-quote-<uid>.sock in the "
+                             "temporary directory)")
+    parser.add_argument("--no-daemon", action="store_true", help="price in this process even when a daemon runs")
     arguments = parser.parse_args()
 
-    product_type, payload = arguments.product_type, json.loads(arguments.payload)
+    # --rates and --metrics configure this process, so they are never forwarded
+    local = arguments.no_daemon or arguments.rates is not None or arguments.metrics is not None
+
+    if arguments.rates is not None:
+        from main.quoting import RATES
+
+        RATES.load(arguments.rates)
+
+    dumper = None
+    if arguments.metrics is not None:
+        from main.metrics import CalculatorMetrics, StatsDumper
+        from main.quoting import instrument
+
+        metrics = CalculatorMetrics()
+        instrument(metrics)
+        dumper = StatsDumper(metrics, arguments.metrics, arguments.metrics_interval, arguments.metrics_format)
+        dumper.start()
+
+    try:
+        if arguments.stream is not None:
+            if arguments.rates is not None:
+                RATES.watch()
+            sink_options = {"compress": not arguments.sink_uncompressed,
+                            "segment_bytes": int(arguments.sink_segment_mb * 1024 * 1024)}
+            main_stream(arguments.stream, arguments.output, arguments.sink, sink_options)
+        else:
+            if arguments.product_type is None or arguments.payload is None:
+                parser.error("product_type and payload are required unless --stream is used")
+
+            product_type, payload = arguments.product_type, json.loads(arguments.payload)
 
-    main(product_type, payload)
\ No newline at end of file
+            main(product_type, payload, arguments.socket, use_daemon=not local)
+    finally:
+        if dumper is not None:
+            dumper.stop()
@@ -0,0 +1,527 @@
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Any, Iterable, Iterator, Sequence, Union
+import numpy as np
+from .rules import RuleCode
+from .policies.base_policy import parse_age_string
+from .policies.vehicle_policy import VehiclePolicy
+from .policies.house_policy import FloodRisk, HousePolicy
+from .rate_tables import RateTable
+
+
+# Same day counts as the scalar path (timedelta(days=5 * 365) and timedelta(days=3*365))
+AT_FAULT_WINDOW_DAYS = 5 * 365
+RECENT_ACCIDENTS_WINDOW_DAYS = 3 * 365
+
+FLOOD_RISK_CODES = {risk.name: int(risk) for risk in FloodRisk}
+
+# date(1970, 1, 1).toordinal(), datetime64[D] values are days since that date
+EPOCH_ORDINAL = 719163
+
+AGE_FORMAT_MESSAGE = "Age must be a string with the format '<number> years'."
+
+# Integers above this do not fit the int64 columns
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+@dataclass(slots=True)
+class VehicleRecord:
+    """
+    Compact (slotted) vehicle policy with parsed fields.
+    """
+    age: int
+    accident_dates: tuple[int, ...]
+    accident_at_fault: tuple[bool, ...]
+
+
+@dataclass(slots=True)
+class HouseRecord:
+    """
+    Compact (slotted) house policy with parsed fields.
+    """
+    age: int
+    flood_risk: FloodRisk
+    n_parrots: int
+    windows_intact: int
+    windows_broken: int
+    has_intact: bool
+    has_broken: bool
+
+
+def _first_invalid(valid: np.ndarray) -> int | None:
+    invalid = np.flatnonzero(~valid)
+    return int(invalid[0]) if len(invalid) else None
+
+
+def _parse_ages(ages: list, validate: bool) -> np.ndarray:
+    """
+    Parses '<number> years' strings with vectorized string operations. The few strings
+    outside the common spelling ("+3 years", "3\nyears", ...) go through
+    parse_age_string, so the batch accepts exactly what Policy.is_valid_age_string accepts.
+    """
+    if not ages:
+        return np.zeros(0, dtype=np.int64)
+    if validate:
+        position = next((i for i, age in enumerate(ages) if not isinstance(age, str)), None)
+        if position is not None:
+            raise ValueError(f"Record {position}: {AGE_FORMAT_MESSAGE}")
+    text = np.strings.strip(np.strings.replace(np.array(ages, dtype=str), "\t", " "))
+    number, _, unit = np.strings.partition(text, " ")
+    common = np.strings.isdecimal(number) & (np.strings.lower(np.strings.strip(unit)) == "years")
+    try:
+        if common.all():
+            return number.astype(np.int64)
+        parsed = np.zeros(len(ages), dtype=np.int64)
+        parsed[common] = number[common].astype(np.int64)
+    except OverflowError:
+        # up to 18 digits always fit, the longer numbers are checked one by one below
+        common &= np.strings.str_len(number) <= 18
+        parsed = np.zeros(len(ages), dtype=np.int64)
+        parsed[common] = number[common].astype(np.int64)
+    for position in np.flatnonzero(~common):
+        age = parse_age_string(str(ages[position]))
+        if age is None:
+            raise ValueError(f"Record {position}: {AGE_FORMAT_MESSAGE}")
+        if age > INT64_MAX:
+            raise ValueError(f"Record {position}: Age must be at most {INT64_MAX} years.")
+        parsed[position] = age
+    return parsed
+
+
+def _non_negative_ints(values: list, message: str, owners: np.ndarray | None = None) -> np.ndarray:
+    """
+    Validates that every value is a non-negative int, reporting the record of the first bad one.
+    """
+    array = np.array(values)
+    valid = (np.ones(len(values), dtype=bool) if array.dtype.kind in "iub"
+             else np.fromiter((isinstance(v, int) for v in values), dtype=bool, count=len(values)))
+    if valid.all():
+        try:
+            array = array.astype(np.int64)
+        except OverflowError:
+            valid = np.fromiter((v <= INT64_MAX for v in values), dtype=bool, count=len(values))
+        else:
+            valid = array >= 0
+    position = _first_invalid(valid)
+    if position is not None:
+        record = position if owners is None else int(owners[position])
+        raise ValueError(f"Record {record}: {message}")
+    return array
+
+
+def _is_malformed_accident(accident: Any) -> bool:
+    try:
+        accident["date"], accident["at_fault"]
+    except (KeyError, TypeError):
+        return True
+    return False
+
+
+def _parse_iso_dates(dates: list, offsets: np.ndarray) -> np.ndarray:
+    """
+    Parses YYYY-MM-DD strings into ordinals in one numpy conversion. The other
+    spellings date.fromisoformat accepts ("20230423", "2023-W16-7", ...) are parsed one
+    by one, so the batch accepts the same dates as VehiclePolicy.
+    Args:
+        dates: the accident dates of every record, concatenated.
+        offsets: VehicleBatch.accident_offsets, to name the record of a bad date.
+    """
+    if not dates:
+        return np.zeros(0, dtype=np.int64)
+    text = np.array(dates, dtype=str)
+    common = (np.strings.str_len(text) == 10) & np.fromiter((isinstance(d, str) for d in dates), dtype=bool,
+                                                            count=len(dates))
+    characters = text[common].astype("U10").view("U1").reshape(-1, 10)
+    digits = (characters >= "0") & (characters <= "9")
+    dashes = characters[:, [4, 7]] == "-"
+    common[common] = np.delete(digits, [4, 7], axis=1).all(axis=1) & dashes.all(axis=1)
+    ordinals = np.zeros(len(dates), dtype=np.int64)
+    try:
+        ordinals[common] = text[common].astype("datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+    except ValueError:
+        common[:] = False  # an impossible date like 2023-02-30, find it below
+    for position in np.flatnonzero(~common):
+        try:
+            ordinals[position] = date.fromisoformat(dates[position]).toordinal()
+        except (ValueError, TypeError) as e:
+            record = int(np.searchsorted(offsets, position, side="right") - 1)
+            raise ValueError(f"Record {record}: Invalid accident history data: {e}") from e
+    return ordinals
+
+
+@dataclass
+class VehicleBatch:
+    """
+    Columnar representation of many vehicle policies.
+    Attributes:
+        age (np.ndarray): int age in years, one value per policy.
+        accident_offsets (np.ndarray): policy i owns the accidents in
+            [accident_offsets[i], accident_offsets[i + 1]), so it has len(age) + 1 values.
+        accident_dates (np.ndarray): accident dates as proleptic ordinals (date.toordinal()).
+        accident_at_fault (np.ndarray): at-fault flag of every accident.
+    """
+    age: np.ndarray
+    accident_offsets: np.ndarray
+    accident_dates: np.ndarray
+    accident_at_fault: np.ndarray
+
+    def __post_init__(self):
+        self.age = np.asarray(self.age, dtype=np.int64)
+        self.accident_offsets = np.asarray(self.accident_offsets, dtype=np.int64)
+        self.accident_dates = np.asarray(self.accident_dates, dtype=np.int64)
+        self.accident_at_fault = np.asarray(self.accident_at_fault, dtype=bool)
+        if len(self.accident_offsets) != len(self.age) + 1:
+            raise ValueError("accident_offsets must have one more value than age")
+        if len(self.accident_dates) != len(self.accident_at_fault):
+            raise ValueError("accident_dates and accident_at_fault must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.age)
+
+    @classmethod
+    def from_policies(cls, policies: Iterable[VehiclePolicy]) -> "VehicleBatch":
+        """
+        Builds the columns from already validated VehiclePolicy objects.
+        """
+        ages, offsets, dates, at_fault = [], [0], [], []
+        for policy in policies:
+            ages.append(int(policy.age.split()[0]))
+            dates.extend(policy.accident_history.ordinals)
+            at_fault.extend(policy.accident_history.at_fault)
+            offsets.append(len(dates))
+        return cls(ages, offsets, dates, at_fault)
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict[str, Any]], validate: bool = True) -> "VehicleBatch":
+        """
+        Bulk constructor from quote payloads ({"age": "6 years", "accident_history": [...]}),
+        validating the whole batch with array operations instead of building one
+        VehiclePolicy (and one AccidentHistory per accident) per record.
+        Args:
+            records: payload dictionaries.
+            validate: False for trusted input, skips the checks but still parses the fields.
+        Raises:
+            ValueError, TypeError: same checks as VehiclePolicy, the message names the first bad record.
+            KeyError: a record has no accident_history, like main.quoting.build_policy.
+        """
+        ages = _parse_ages([record["age"] for record in records], validate)
+        try:
+            histories = [record["accident_history"] for record in records]
+        except KeyError:
+            position = next(i for i, record in enumerate(records) if "accident_history" not in record)
+            raise KeyError(f"Record {position}: accident_history") from None
+        if validate:
+            position = next((i for i, history in enumerate(histories) if not isinstance(history, list)), None)
+            if position is not None:
+                raise TypeError(f"Record {position}: accident_history must be a list.")
+        offsets = np.zeros(len(histories) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, histories), dtype=np.int64, count=len(histories)), out=offsets[1:])
+        accidents = [accident for history in histories for accident in history]
+        try:
+            dates = [accident["date"] for accident in accidents]
+            at_fault = [accident["at_fault"] for accident in accidents]
+        except (KeyError, TypeError) as e:
+            position = next(i for i, accident in enumerate(accidents) if _is_malformed_accident(accident))
+            record = int(np.searchsorted(offsets, position, side="right") - 1)
+            raise ValueError(f"Record {record}: Invalid accident history data: {e}") from e
+        if validate:
+            position = _first_invalid(np.fromiter((isinstance(f, bool) for f in at_fault), dtype=bool, count=len(at_fault)))
+            if position is not None:
+                record = int(np.searchsorted(offsets, position, side="right") - 1)
+                raise ValueError(f"Record {record}: Invalid accident history data: at_fault must be a boolean")
+        return cls(ages, offsets, _parse_iso_dates(dates, offsets), at_fault)
+
+    def record(self, index: int) -> VehicleRecord:
+        first, last = self.accident_offsets[index], self.accident_offsets[index + 1]
+        return VehicleRecord(int(self.age[index]), tuple(self.accident_dates[first:last].tolist()),
+                             tuple(self.accident_at_fault[first:last].tolist()))
+
+    def records(self) -> Iterator[VehicleRecord]:
+        return (self.record(i) for i in range(len(self)))
+
+    def slice(self, start: int, stop: int) -> "VehicleBatch":
+        """
+        Policies [start, stop) as a new batch of views (no copy of the accident arrays).
+        """
+        first, last = self.accident_offsets[start], self.accident_offsets[stop]
+        return VehicleBatch(
+            self.age[start:stop],
+            self.accident_offsets[start:stop + 1] - first,
+            self.accident_dates[first:last],
+            self.accident_at_fault[first:last],
+        )
+
+    def take(self, indices: np.ndarray) -> "VehicleBatch":
+        """
+        Policies at the given positions, in that order, as a new batch (copies).
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.accident_offsets[indices]
+        lengths = self.accident_offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        accidents = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return VehicleBatch(self.age[indices], offsets, self.accident_dates[accidents],
+                            self.accident_at_fault[accidents])
+
+
+@dataclass
+class HouseBatch:
+    """
+    Columnar representation of many house policies.
+    Attributes:
+        age (np.ndarray): int age in years.
+        flood_risk (np.ndarray): flood risk codes, see FLOOD_RISK_CODES.
+        n_parrots (np.ndarray): number of parrots.
+        windows_intact (np.ndarray): intact windows (0 when the key is missing).
+        windows_broken (np.ndarray): broken windows (0 when the key is missing).
+        has_intact (np.ndarray): whether the windows dictionary had an 'intact' key.
+        has_broken (np.ndarray): whether the windows dictionary had a 'broken' key.
+    """
+    age: np.ndarray
+    flood_risk: np.ndarray
+    n_parrots: np.ndarray
+    windows_intact: np.ndarray
+    windows_broken: np.ndarray
+    has_intact: np.ndarray
+    has_broken: np.ndarray
+
+    def __post_init__(self):
+        self.age = np.asarray(self.age, dtype=np.int64)
+        self.flood_risk = np.asarray(self.flood_risk, dtype=np.int8)
+        self.n_parrots = np.asarray(self.n_parrots, dtype=np.int64)
+        self.windows_intact = np.asarray(self.windows_intact, dtype=np.int64)
+        self.windows_broken = np.asarray(self.windows_broken, dtype=np.int64)
+        self.has_intact = np.asarray(self.has_intact, dtype=bool)
+        self.has_broken = np.asarray(self.has_broken, dtype=bool)
+        n = len(self.age)
+        for column in (self.flood_risk, self.n_parrots, self.windows_intact,
+                       self.windows_broken, self.has_intact, self.has_broken):
+            if len(column) != n:
+                raise ValueError("All house columns must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.age)
+
+    @classmethod
+    def from_policies(cls, policies: Iterable[HousePolicy]) -> "HouseBatch":
+        """
+        Builds the columns from already validated HousePolicy objects.
+        """
+        columns = ([], [], [], [], [], [], [])
+        for policy in policies:
+            values = (
+                int(policy.age.split()[0]),
+                FLOOD_RISK_CODES[policy.flood_risk],
+                policy.n_parrots,
+                policy.windows.get("intact", 0),
+                policy.windows.get("broken", 0),
+                "intact" in policy.windows,
+                "broken" in policy.windows,
+            )
+            for column, value in zip(columns, values):
+                column.append(value)
+        return cls(*columns)
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict[str, Any]], validate: bool = True) -> "HouseBatch":
+        """
+        Bulk constructor from quote payloads ({"age": "25 years", "flood_risk": "MEDIUM",
+        "n_parrots": 1, "windows": {"intact": 4, "broken": 1}}), validating the whole
+        batch with array operations instead of building one HousePolicy per record.
+        Args:
+            records: payload dictionaries.
+            validate: False for trusted input, skips the checks but still parses the fields.
+        Raises:
+            ValueError: same checks as HousePolicy, the message names the first bad record.
+        """
+        ages = _parse_ages([record["age"] for record in records], validate)
+        flood_risk = np.array([record.get("flood_risk", HousePolicy.DEFAULT_FLOOD_RISK) for record in records], dtype=object)
+        codes = np.full(len(records), -1, dtype=np.int8)
+        for risk in FloodRisk:
+            codes[flood_risk == risk.name] = risk
+        windows = [record.get("windows", {}) for record in records]
+        if not validate:
+            n_parrots = np.array([record.get("n_parrots", 0) for record in records], dtype=np.int64)
+        else:
+            position = _first_invalid(codes >= 0)
+            if position is not None:
+                raise ValueError(f"Record {position}: Flood risk must be one of 'HIGH', 'MEDIUM', 'LOW'")
+            n_parrots = _non_negative_ints([record.get("n_parrots", 0) for record in records],
+                                           "Number of parrots must be a non-negative integer")
+            position = next((i for i, w in enumerate(windows) if not isinstance(w, dict)), None)
+            if position is not None:
+                raise ValueError(f"Record {position}: Windows must be a dictionary")
+            counts = np.fromiter(map(len, windows), dtype=np.int64, count=len(windows))
+            _non_negative_ints([value for w in windows for value in w.values()],
+                               "Windows dictionary values must be non-negative integers",
+                               owners=np.repeat(np.arange(len(windows)), counts))
+        return cls(
+            age=ages,
+            flood_risk=codes,
+            n_parrots=n_parrots,
+            windows_intact=[w.get("intact", 0) for w in windows],
+            windows_broken=[w.get("broken", 0) for w in windows],
+            has_intact=["intact" in w for w in windows],
+            has_broken=["broken" in w for w in windows],
+        )
+
+    def record(self, index: int) -> HouseRecord:
+        return HouseRecord(int(self.age[index]), FloodRisk(int(self.flood_risk[index])), int(self.n_parrots[index]),
+                           int(self.windows_intact[index]), int(self.windows_broken[index]),
+                           bool(self.has_intact[index]), bool(self.has_broken[index]))
+
+    def records(self) -> Iterator[HouseRecord]:
+        return (self.record(i) for i in range(len(self)))
+
+    def slice(self, start: int, stop: int) -> "HouseBatch":
+        """
+        Policies [start, stop) as a new batch of views.
+        """
+        return HouseBatch(*(getattr(self, column.name)[start:stop] for column in fields(self)))
+
+    def take(self, indices: np.ndarray) -> "HouseBatch":
+        """
+        Policies at the given positions, in that order, as a new batch (copies).
+        """
+        return HouseBatch(*(getattr(self, column.name)[indices] for column in fields(self)))
+
+
+@dataclass
+class BatchResult:
+    """
+    Result of pricing a batch.
+    Attributes:
+        premiums (np.ndarray): premium per policy, NaN for rejected policies.
+        rejections (np.ndarray): RuleCode per policy (RuleCode.ACCEPTED when priced).
+    """
+    premiums: np.ndarray
+    rejections: np.ndarray
+
+    @property
+    def accepted(self) -> np.ndarray:
+        return self.rejections == RuleCode.ACCEPTED
+
+
+PolicyBatch = Union[VehicleBatch, HouseBatch]
+
+
+def calculate_premiums(batch: PolicyBatch, base_rate: float, as_of: date | None = None,
+                       rate_table: RateTable | None = None) -> BatchResult:
+    """
+    Applies the underwriting rules and the bonus-malus of PremiumCalculator to a whole
+    batch with array operations. Results are the same as calling
+    PremiumCalculator.calculate_premium for every policy with the same pricing date.
+    Args:
+        batch: VehicleBatch or HouseBatch.
+        base_rate: base premium.
+        as_of: pricing date, the accident windows are relative to it. Required for
+            vehicle batches, house premiums do not depend on it.
+        rate_table: when given, its base rates and lookup arrays replace base_rate and the factor arithmetic.
+    """
+    if isinstance(batch, VehicleBatch):
+        if as_of is None:
+            raise ValueError("Vehicle batches need the pricing date (as_of).")
+        return _calculate_vehicle_premiums(batch, base_rate, as_of, rate_table)
+    elif isinstance(batch, HouseBatch):
+        return _calculate_home_premiums(batch, base_rate, rate_table)
+    else:
+        raise ValueError("Unsupported policy type.")
+
+
+def count_accidents(batch: VehicleBatch, cutoff: int, at_fault_only: bool = False) -> np.ndarray:
+    """
+    Number of accidents per policy dated on or after the cutoff ordinal.
+    """
+    hits = batch.accident_dates >= cutoff
+    if at_fault_only:
+        hits &= batch.accident_at_fault
+    owners = np.repeat(np.arange(len(batch)), np.diff(batch.accident_offsets))
+    return np.bincount(owners[hits], minlength=len(batch))
+
+
+def vehicle_rejections(age: np.ndarray, at_fault_accidents_5yr: np.ndarray) -> np.ndarray:
+    """
+    Vehicle underwriting rules, RuleCode per policy (the first matching rule wins as in the scalar path).
+    """
+    return np.select(
+        [age > 15, at_fault_accidents_5yr > 2],
+        [RuleCode.CAR_TOO_OLD, RuleCode.DEMOLITION_DERBY],
+        default=RuleCode.ACCEPTED,
+    ).astype(np.int8)
+
+
+def vehicle_bonus_malus(age: np.ndarray, recent_accidents: np.ndarray, base_rate: float,
+                        rate_table: RateTable | None = None) -> np.ndarray:
+    """
+    Vehicle premiums before the underwriting rules are applied.
+    """
+    if rate_table is not None:
+        return rate_table.vehicle_premiums(age, recent_accidents)
+    age_factor = np.maximum(0, (age - 5) * 0.05)
+    accident_factor = recent_accidents * 0.20
+    return base_rate * (1 + age_factor + accident_factor)
+
+
+def vehicle_premiums(age: np.ndarray, at_fault_accidents_5yr: np.ndarray, recent_accidents: np.ndarray,
+                     base_rate: float, rate_table: RateTable | None = None) -> BatchResult:
+    """
+    Vehicle rules and bonus-malus from already counted accident windows.
+    Args:
+        age: int age in years.
+        at_fault_accidents_5yr: at-fault accidents in the last AT_FAULT_WINDOW_DAYS.
+        recent_accidents: accidents in the last RECENT_ACCIDENTS_WINDOW_DAYS.
+        base_rate: base premium.
+        rate_table: when given, replaces base_rate and the factor arithmetic.
+    """
+    rejections = vehicle_rejections(age, at_fault_accidents_5yr)
+    premiums = vehicle_bonus_malus(age, recent_accidents, base_rate, rate_table)
+    premiums[rejections != RuleCode.ACCEPTED] = np.nan
+    return BatchResult(premiums, rejections)
+
+
+def _calculate_vehicle_premiums(batch: VehicleBatch, base_rate: float, as_of: date,
+                                rate_table: RateTable | None = None) -> BatchResult:
+    today = as_of.toordinal()
+    at_fault_accidents_5yr = count_accidents(batch, today - AT_FAULT_WINDOW_DAYS, at_fault_only=True)
+    recent_accidents = count_accidents(batch, today - RECENT_ACCIDENTS_WINDOW_DAYS)
+    return vehicle_premiums(batch.age, at_fault_accidents_5yr, recent_accidents, base_rate, rate_table)
+
+
+def house_rejections(batch: HouseBatch) -> np.ndarray:
+    """
+    House underwriting rules, RuleCode per policy.
+    """
+    return np.select(
+        [
+            batch.n_parrots > 5,
+            batch.has_broken & batch.has_intact & (batch.windows_broken > batch.windows_intact),
+            batch.has_broken & ~batch.has_intact & (batch.windows_broken > 0),
+            ~batch.has_broken,
+        ],
+        [
+            RuleCode.TOO_MANY_PARROTS,
+            RuleCode.BROKEN_WINDOWS,
+            RuleCode.BROKEN_WINDOWS,
+            RuleCode.INVALID_WINDOWS,
+        ],
+        default=RuleCode.ACCEPTED,
+    ).astype(np.int8)
+
+
+def house_bonus_malus(batch: HouseBatch, base_rate: float, rate_table: RateTable | None = None) -> np.ndarray:
+    """
+    House premiums before the underwriting rules are applied.
+    """
+    if rate_table is not None:
+        return rate_table.house_premiums(batch.age, batch.flood_risk)
+    flood_factor = np.where(batch.flood_risk >= FLOOD_RISK_CODES["MEDIUM"], 0.15, 0.0)
+    age_factor = np.where(batch.age > 20, 0.10, 0.0)
+    return base_rate * (1 + age_factor + flood_factor)
+
+
+def _calculate_home_premiums(batch: HouseBatch, base_rate: float, rate_table: RateTable | None = None) -> BatchResult:
+    rejections = house_rejections(batch)
+    premiums = house_bonus_malus(batch, base_rate, rate_table)
+    premiums[rejections != RuleCode.ACCEPTED] = np.nan
+    return BatchResult(premiums, rejections)
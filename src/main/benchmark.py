@@ -0,0 +1,270 @@
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Iterator
+import numpy as np
+from .batch import (AT_FAULT_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS, HouseBatch, VehicleBatch, count_accidents,
+                    house_bonus_malus, house_rejections, vehicle_bonus_malus, vehicle_rejections)
+from .premium_calculator import PremiumCalculator
+from .quoting import BASE_RATES, build_policy
+from .rules import RuleCode
+from .synthetic import (ACCIDENT_DISTRIBUTIONS, generate_house_batch, generate_vehicle_batch, house_records,
+                        vehicle_records)
+
+
+# parse: NDJSON lines to dicts, validate: dicts to validated policies (VehicleBatch/HouseBatch
+# for the batch engine, VehiclePolicy/HousePolicy for the scalar one), underwrite: rules
+# (with the accident windows they need), price: bonus-malus. The scalar engine evaluates
+# the rules and the bonus-malus in one PremiumCalculator.evaluate call, timed as underwrite.
+STAGES = ("parse", "validate", "underwrite", "price")
+ENGINES = ("batch", "scalar")
+
+VEHICLE_OPTIONS = ("mean_accidents", "accident_distribution", "too_old_rate", "derby_rate")
+HOUSE_OPTIONS = ("parrot_rate", "broken_windows_rate")
+
+
+def portfolio_lines(product_type: str, n: int, as_of: date, seed: int = 0, chunk_size: int = 100_000,
+                    **options) -> Iterator[list[str]]:
+    """
+    Seeded synthetic portfolio as NDJSON payload lines, chunk_size lines at a time.
+    Args:
+        options: generate_vehicle_batch or generate_house_batch options (VEHICLE_OPTIONS, HOUSE_OPTIONS).
+    """
+    for chunk, start in enumerate(range(0, n, chunk_size)):
+        size = min(chunk_size, n - start)
+        if product_type == "vehicle":
+            records = vehicle_records(generate_vehicle_batch(size, as_of, seed=seed + chunk, **options))
+        elif product_type == "house":
+            records = house_records(generate_house_batch(size, seed=seed + chunk, **options))
+        else:
+            raise ValueError("No more insurance types, please select 'vehicle' or 'house'")
+        yield [json.dumps(record) for record in records]
+
+
+class _Stages:
+    """
+    Accumulates the time spent in each stage.
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self._stage, self._started = None, None
+
+    def __call__(self, stage: str):
+        self._stage = stage
+        return self
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.seconds[self._stage] += time.perf_counter() - self._started
+
+
+def _run_batch(product_type: str, chunks: Iterator[list[str]], as_of: date,
+               stages: _Stages) -> tuple[Counter, float]:
+    base_rate, today = BASE_RATES[product_type], as_of.toordinal()
+    outcomes, revenue = Counter(), 0.0
+    for lines in chunks:
+        with stages("parse"):
+            records = [json.loads(line) for line in lines]
+        with stages("validate"):
+            batch = (VehicleBatch if product_type == "vehicle" else HouseBatch).from_records(records)
+        del records
+        if product_type == "vehicle":
+            with stages("underwrite"):
+                at_fault_5yr = count_accidents(batch, today - AT_FAULT_WINDOW_DAYS, at_fault_only=True)
+                rejections = vehicle_rejections(batch.age, at_fault_5yr)
+            with stages("price"):
+                recent = count_accidents(batch, today - RECENT_ACCIDENTS_WINDOW_DAYS)
+                premiums = vehicle_bonus_malus(batch.age, recent, base_rate)
+                premiums[rejections != RuleCode.ACCEPTED] = np.nan
+        else:
+            with stages("underwrite"):
+                rejections = house_rejections(batch)
+            with stages("price"):
+                premiums = house_bonus_malus(batch, base_rate)
+                premiums[rejections != RuleCode.ACCEPTED] = np.nan
+        codes, counts = np.unique(rejections, return_counts=True)
+        outcomes.update(dict(zip(map(RuleCode, codes.tolist()), counts.tolist())))
+        revenue += float(np.nansum(premiums))
+    return outcomes, revenue
+
+
+def _run_scalar(product_type: str, chunks: Iterator[list[str]], as_of: date,
+                stages: _Stages) -> tuple[Counter, float]:
+    calculator = PremiumCalculator(BASE_RATES[product_type], as_of=as_of)
+    outcomes, revenue = Counter(), 0.0
+    for lines in chunks:
+        with stages("parse"):
+            records = [json.loads(line) for line in lines]
+        with stages("validate"):
+            policies = [build_policy(product_type, record) for record in records]
+        del records
+        with stages("underwrite"):
+            results = [calculator.evaluate(policy) for policy in policies]
+        outcomes.update(result.rule for result in results)
+        revenue += sum(result.premium for result in results if result.accepted)
+    return outcomes, revenue
+
+
+def measure(product_type: str, engine: str, n: int, as_of: date, seed: int = 0, chunk_size: int = 100_000,
+            **options) -> dict[str, Any]:
+    """
+    Runs one engine over a synthetic portfolio of n policies.
+    Returns:
+        the per stage timings (seconds), throughput, outcomes and peak resident memory of the process.
+    """
+    runner = {"batch": _run_batch, "scalar": _run_scalar}[engine]
+    stages = _Stages()
+    chunks = portfolio_lines(product_type, n, as_of, seed, chunk_size, **options)
+    outcomes, revenue = runner(product_type, chunks, as_of, stages)
+    total = sum(stages.seconds.values())
+    rejected = n - outcomes[RuleCode.ACCEPTED]
+    return {
+        "product_type": product_type,
+        "engine": engine,
+        "policies": n,
+        "stages": stages.seconds,
+        "total_seconds": total,
+        "policies_per_second": n / total if total else None,
+        "accepted": outcomes[RuleCode.ACCEPTED],
+        "rejection_rate": rejected / n if n else 0.0,
+        "rejections": {code.name: count for code, count in sorted(outcomes.items()) if code != RuleCode.ACCEPTED},
+        "revenue": revenue,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure_isolated(arguments: tuple) -> dict[str, Any]:
+    args, options = arguments
+    return measure(*args, **options)
+
+
+def run_benchmark(sizes: list[int], as_of: date, product_types: tuple[str, ...] = ("vehicle", "house"),
+                  engines: tuple[str, ...] = ENGINES, seed: int = 0, chunk_size: int = 100_000,
+                  scalar_limit: int = 100_000, isolate: bool = True, **options) -> dict[str, Any]:
+    """
+    Measures every product type x engine x size combination.
+    Args:
+        sizes: portfolio sizes.
+        as_of: pricing date (also the date the synthetic accidents are relative to).
+        scalar_limit: largest portfolio priced with the scalar engine.
+        isolate: run each measurement in a fresh process, so peak_rss_mb is the peak of
+            that measurement only (in process it is the peak of the whole run so far).
+        options: synthetic generator options, see VEHICLE_OPTIONS and HOUSE_OPTIONS.
+    Returns:
+        a JSON serializable report.
+    """
+    jobs = []
+    for product_type in product_types:
+        names = VEHICLE_OPTIONS if product_type == "vehicle" else HOUSE_OPTIONS
+        product_options = {name: value for name, value in options.items() if name in names and value is not None}
+        for engine in engines:
+            for n in sizes:
+                if engine == "scalar" and n > scalar_limit:
+                    continue
+                jobs.append(((product_type, engine, n, as_of, seed, chunk_size), product_options))
+
+    if isolate:
+        results = []
+        for job in jobs:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                results.append(pool.submit(_measure_isolated, job).result())
+    else:
+        results = [_measure_isolated(job) for job in jobs]
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "as_of": as_of.isoformat(),
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "generator": {name: value for name, value in options.items() if value is not None},
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "results": results,
+    }
+
+
+def compare_reports(baseline: dict[str, Any], current: dict[str, Any], tolerance: float = 0.20) -> list[str]:
+    """
+    Stages that got more than tolerance slower than in the baseline report.
+    Returns:
+        one line per regression, empty when none.
+    """
+    key = lambda result: (result["product_type"], result["engine"], result["policies"])
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        for stage in STAGES + ("total_seconds",):
+            old = before["total_seconds"] if stage == "total_seconds" else before["stages"][stage]
+            new = result["total_seconds"] if stage == "total_seconds" else result["stages"][stage]
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(f"{'/'.join(map(str, key(result)))} {stage}: {old:.4f}s -> {new:.4f}s "
+                                   f"(+{(new / old - 1):.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.benchmark --sizes 10000 1000000 10000000 --output benchmark.json
+    python3 -m main.benchmark --sizes 10000 --accident-distribution geometric --derby-rate 0.05 --baseline benchmark.json
+    """
+    parser = ArgumentParser(description="Pricing benchmark on synthetic portfolios")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--products", nargs="+", choices=["vehicle", "house"], default=["vehicle", "house"])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--scalar-limit", type=int, default=100_000)
+    parser.add_argument("--mean-accidents", type=float, default=None)
+    parser.add_argument("--accident-distribution", choices=ACCIDENT_DISTRIBUTIONS, default=None)
+    parser.add_argument("--too-old-rate", type=float, default=None)
+    parser.add_argument("--derby-rate", type=float, default=None)
+    parser.add_argument("--parrot-rate", type=float, default=None)
+    parser.add_argument("--broken-windows-rate", type=float, default=None)
+    parser.add_argument("--output", metavar="FILE", help="JSON report file (default stdout)")
+    parser.add_argument("--baseline", metavar="FILE", help="previous JSON report, exit with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    arguments = parser.parse_args()
+
+    report = run_benchmark(
+        arguments.sizes, arguments.as_of, tuple(arguments.products), tuple(arguments.engines), arguments.seed,
+        arguments.chunk_size, arguments.scalar_limit,
+        **{name: getattr(arguments, name) for name in VEHICLE_OPTIONS + HOUSE_OPTIONS},
+    )
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    for result in report["results"]:
+        stages = " ".join(f"{stage}={seconds:.3f}s" for stage, seconds in result["stages"].items())
+        print(f"{result['product_type']:<8}{result['engine']:<7}{result['policies']:>10} {stages} "
+              f"peak={result['peak_rss_mb']:.0f}MB", file=sys.stderr)
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline, encoding="utf-8") as source:
+            regressions = compare_reports(json.load(source), report, arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
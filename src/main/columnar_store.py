@@ -0,0 +1,286 @@
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+from argparse import ArgumentParser
+from contextlib import ExitStack
+from dataclasses import fields
+from datetime import date
+from typing import Iterable
+import numpy as np
+from .batch import HouseBatch, PolicyBatch, VehicleBatch, calculate_premiums
+from .quoting import BASE_RATES
+
+
+# File layout: MAGIC, the JSON header length (little endian uint64), the JSON header
+# ({"kind": ..., "policies": n, "columns": {name: {"dtype", "offset", "length"}}}) and
+# the fixed-width columns, each one starting on an ALIGNMENT boundary. Variable length
+# accident histories are the accident_offsets column plus the flat accident columns.
+MAGIC = b"PCOLv001"
+ALIGNMENT = 64
+
+BATCH_TYPES = {"vehicle": VehicleBatch, "house": HouseBatch}
+
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def write_store(path: str, batch: PolicyBatch):
+    """
+    Writes a VehicleBatch or HouseBatch as a columnar store file.
+    """
+    kind = next((name for name, batch_type in BATCH_TYPES.items() if isinstance(batch, batch_type)), None)
+    if kind is None:
+        raise ValueError("Unsupported policy type.")
+    columns = {column.name: np.ascontiguousarray(getattr(batch, column.name)) for column in fields(batch)}
+    header, directory, size = _header(kind, len(batch),
+                                      {name: (array.dtype, len(array)) for name, array in columns.items()})
+
+    with open(path, "wb") as output:
+        output.write(MAGIC)
+        output.write(struct.pack("<Q", len(header)))
+        output.write(header)
+        for name, array in columns.items():
+            output.seek(directory[name]["offset"])
+            output.write(array.tobytes())
+        output.truncate(size)
+
+
+class StoreWriter:
+    """
+    Writes a columnar store from batches appended one at a time, so a store larger than
+    memory can be built chunk by chunk. The header needs the final column lengths, so
+    every column is spooled to its own temporary file and close() copies the spools
+    into place behind the header: only the batch being appended is held in memory.
+    """
+
+    def __init__(self, path: str, kind: str):
+        """
+        Args:
+            path: store file, written by close().
+            kind: 'vehicle' or 'house'.
+        """
+        self.path = path
+        self.kind = kind
+        self.policies = 0
+        self._accidents = 0
+        self._dtypes = {}
+        self._lengths = {}
+        self._spools = {}
+        # An empty batch fixes the dtypes and writes the leading 0 of accident_offsets
+        empty = _empty_batch(kind)
+        for column in fields(empty):
+            array = getattr(empty, column.name)
+            self._dtypes[column.name], self._lengths[column.name] = array.dtype, 0
+            self._spools[column.name] = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+            self._spool(column.name, array)
+
+    def append(self, batch: PolicyBatch):
+        if not isinstance(batch, BATCH_TYPES[self.kind]):
+            raise ValueError(f"Expected a {BATCH_TYPES[self.kind].__name__}")
+        for column in fields(batch):
+            array = getattr(batch, column.name)
+            if column.name == "accident_offsets":
+                # the batch offsets start at 0, the store ones at the accidents already written
+                array = array[1:] + self._accidents
+            self._spool(column.name, array)
+        self.policies += len(batch)
+        if self.kind == "vehicle":
+            self._accidents += len(batch.accident_dates)
+
+    def close(self):
+        """
+        Writes the store file and removes the spools.
+        """
+        try:
+            header, directory, size = _header(self.kind, self.policies, {
+                name: (dtype, self._lengths[name]) for name, dtype in self._dtypes.items()})
+            with open(self.path, "wb") as output:
+                output.write(MAGIC)
+                output.write(struct.pack("<Q", len(header)))
+                output.write(header)
+                for name, spool in self._spools.items():
+                    output.seek(directory[name]["offset"])
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, output)
+                output.truncate(size)
+        finally:
+            self.discard()
+
+    def discard(self):
+        for spool in self._spools.values():
+            spool.close()
+        self._spools = {}
+
+    def __enter__(self) -> "StoreWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _spool(self, name: str, array: np.ndarray):
+        self._spools[name].write(np.ascontiguousarray(array, dtype=self._dtypes[name]).tobytes())
+        self._lengths[name] += len(array)
+
+
+def _header(kind: str, policies: int, columns: dict[str, tuple[np.dtype, int]]) -> tuple[bytes, dict, int]:
+    """
+    Lays out columns {name: (dtype, length)} behind the header.
+    Returns:
+        (encoded header, column directory, file size)
+    """
+    # The header holds the column offsets, so the columns start after a fixed-size header slot
+    directory, position = {}, _aligned(len(MAGIC) + 8 + 256 * (len(columns) + 1))
+    for name, (dtype, length) in columns.items():
+        directory[name] = {"dtype": dtype.str, "offset": position, "length": length}
+        position = _aligned(position + dtype.itemsize * length)
+    header = json.dumps({"kind": kind, "policies": policies, "columns": directory}).encode()
+    if len(MAGIC) + 8 + len(header) > directory[next(iter(directory))]["offset"]:
+        raise ValueError("Columnar store header too large")
+    return header, directory, position
+
+
+def open_store(path: str) -> PolicyBatch:
+    """
+    Memory-maps a columnar store file. The returned batch columns are read-only NumPy
+    views on the mapping: nothing is parsed or copied, pages are read on first access.
+    """
+    with open(path, "rb") as source:
+        mapping = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapping[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a columnar policy store")
+    (header_length,) = struct.unpack_from("<Q", mapping, len(MAGIC))
+    header_start = len(MAGIC) + 8
+    header = json.loads(mapping[header_start:header_start + header_length])
+    columns = {
+        name: np.frombuffer(mapping, dtype=np.dtype(spec["dtype"]), count=spec["length"], offset=spec["offset"])
+        for name, spec in header["columns"].items()
+    }
+    return BATCH_TYPES[header["kind"]](**columns)
+
+
+def convert_ndjson(lines: Iterable[str], vehicle_path: str | None = None, house_path: str | None = None,
+                   chunk_size: int = 100_000) -> dict[str, int]:
+    """
+    Converts NDJSON quote records (the app.py --stream format, with a product_type key)
+    into one columnar store per product type. Records are validated in chunks with
+    VehicleBatch/HouseBatch.from_records and each chunk is spooled to its store as soon
+    as it is parsed (see StoreWriter), so memory does not grow with the input.
+    Args:
+        lines: NDJSON lines.
+        vehicle_path: destination of the vehicle policies, vehicle records are skipped when None.
+        house_path: destination of the house policies, house records are skipped when None.
+        chunk_size: records validated together.
+    Returns:
+        number of policies written per product type.
+    Raises:
+        ValueError: a line is not a JSON object or not a valid record, the message names the line.
+    """
+    destinations = {product_type: path for product_type, path in (("vehicle", vehicle_path), ("house", house_path))
+                    if path is not None}
+    pending = {product_type: [] for product_type in destinations}
+    line_numbers = {product_type: [] for product_type in destinations}
+
+    with ExitStack() as stack:
+        writers = {product_type: stack.enter_context(StoreWriter(path, product_type))
+                   for product_type, path in destinations.items()}
+
+        def flush(product_type):
+            if pending[product_type]:
+                writers[product_type].append(_from_records(product_type, pending[product_type],
+                                                           line_numbers[product_type]))
+                pending[product_type], line_numbers[product_type] = [], []
+
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: Invalid JSON: {e}") from e
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {line_number}: Record must be a JSON object")
+            product_type = record.pop("product_type", None)
+            if product_type not in BATCH_TYPES:
+                raise ValueError(f"Line {line_number}: No more insurance types, please select 'vehicle' or 'house'")
+            if product_type not in destinations:
+                continue
+            pending[product_type].append(record)
+            line_numbers[product_type].append(line_number)
+            if len(pending[product_type]) >= chunk_size:
+                flush(product_type)
+
+        for product_type in destinations:
+            flush(product_type)
+        return {product_type: writer.policies for product_type, writer in writers.items()}
+
+
+def _from_records(product_type: str, records: list[dict], line_numbers: list[int]) -> PolicyBatch:
+    """
+    from_records of a chunk, its "Record i" errors renamed to the NDJSON line of record i.
+    """
+    try:
+        return BATCH_TYPES[product_type].from_records(records)
+    except (ValueError, TypeError, KeyError) as e:
+        message = str(e.args[0]) if e.args else str(e)
+        match = re.match(r"Record (\d+): ", message)
+        if match is None:
+            raise ValueError(f"Lines {line_numbers[0]}-{line_numbers[-1]}: {message}") from e
+        raise ValueError(f"Line {line_numbers[int(match.group(1))]}: {message[match.end():]}") from e
+
+
+def _empty_batch(product_type: str) -> PolicyBatch:
+    # the columns are built by __post_init__ from empty lists
+    if product_type == "house":
+        return HouseBatch(*([] for _ in fields(HouseBatch)))
+    return VehicleBatch([], [0], [], [])
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.columnar_store convert quotes.ndjson --vehicles vehicles.pcol --houses houses.pcol
+    python3 -m main.columnar_store price vehicles.pcol --as-of 2025-02-17
+    python3 -m main.columnar_store price houses.pcol --dedup
+    """
+    from .dedup import price_unique_profiles
+    from .premium_calculator import PremiumCalculator
+
+    parser = ArgumentParser(description="Columnar policy store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="convert NDJSON quote records")
+    convert.add_argument("source", type=str)
+    convert.add_argument("--vehicles", type=str, default=None)
+    convert.add_argument("--houses", type=str, default=None)
+    price = commands.add_parser("price", help="reprice a store file")
+    price.add_argument("store", type=str)
+    price.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    price.add_argument("--dedup", action="store_true", help="price each distinct risk profile once")
+    arguments = parser.parse_args()
+
+    if arguments.command == "convert":
+        with open(arguments.source, encoding="utf-8") as source:
+            print(convert_ndjson(source, arguments.vehicles, arguments.houses))
+    else:
+        started = time.perf_counter()
+        portfolio = open_store(arguments.store)
+        opened = time.perf_counter()
+        base_rate = BASE_RATES["vehicle" if isinstance(portfolio, VehicleBatch) else "house"]
+        if arguments.dedup:
+            result, stats = price_unique_profiles(PremiumCalculator(base_rate, as_of=arguments.as_of), portfolio)
+        else:
+            result, stats = calculate_premiums(portfolio, base_rate, arguments.as_of), None
+        finished = time.perf_counter()
+        print(f"Opened {len(portfolio)} policies in {(opened - started) * 1000:.1f}ms, "
+              f"priced in {finished - opened:.3f}s, accepted {int(result.accepted.sum())}, "
+              f"revenue {np.nansum(result.premiums):.2f}")
+        if stats is not None:
+            print(f"{stats.unique} distinct risk profiles, dedup ratio {stats.ratio:.1f}x")
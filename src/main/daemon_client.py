@@ -0,0 +1,55 @@
+import json
+import os
+from typing import Any
+
+# Standard library only: app.py imports this module before deciding whether it needs
+# the pricing modules (and numpy) at all. socket is only imported when a daemon socket
+# exists, a quote priced locally does not pay for it.
+
+SOCKET_ENVIRONMENT_VARIABLE = "PREMIUM_QUOTE_SOCKET"
+
+
+def default_socket_path() -> str:
+    """
+    $PREMIUM_QUOTE_SOCKET, else premium-quote-<uid>.sock in $TMPDIR (/tmp when unset).
+    """
+    path = os.environ.get(SOCKET_ENVIRONMENT_VARIABLE)
+    if path:
+        return path
+    return os.path.join(os.environ.get("TMPDIR") or "/tmp", f"premium-quote-{os.getuid()}.sock")
+
+
+def daemon_request(message: dict[str, Any], path: str | None = None, timeout: float = 5.0) -> dict[str, Any]:
+    """
+    Sends one JSON line to the quote daemon and returns its JSON reply.
+    Raises:
+        OSError: no daemon listening on path, or it did not answer within timeout seconds.
+        ValueError: the reply is not JSON.
+    """
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(path or default_socket_path())
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        with connection.makefile("rb") as replies:
+            line = replies.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the quote daemon")
+    return json.loads(line)
+
+
+def daemon_quote(product_type: str, payload: Any, path: str | None = None,
+                 timeout: float = 5.0) -> dict[str, Any] | None:
+    """
+    main.quoting.quote(product_type, payload) priced by a running quote daemon.
+    Returns:
+        the quote result, None when no daemon is reachable (the caller prices it itself).
+    """
+    path = path or default_socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return daemon_request({"product_type": product_type, "payload": payload}, path, timeout)
+    except (OSError, ValueError):
+        return None
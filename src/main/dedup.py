@@ -0,0 +1,141 @@
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from datetime import date
+import numpy as np
+from .batch import (AT_FAULT_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS, BatchResult, HouseBatch, PolicyBatch,
+                    VehicleBatch, calculate_premiums, count_accidents)
+from .premium_calculator import PremiumCalculator
+
+
+# Key spaces up to this many keys per policy are numbered with a lookup table, larger ones are sorted
+DENSE_KEYS_PER_POLICY = 4
+
+
+@dataclass(frozen=True)
+class DedupStats:
+    """
+    Attributes:
+        rows (int): policies in the batch.
+        unique (int): distinct risk profiles, the policies actually priced.
+    """
+    rows: int
+    unique: int
+
+    @property
+    def ratio(self) -> float:
+        """
+        Policies per distinct profile (1.0 means no duplicates).
+        """
+        return self.rows / self.unique if self.unique else 1.0
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows - self.unique
+
+
+def profile_columns(batch: PolicyBatch, as_of: date) -> list[np.ndarray]:
+    """
+    Canonical risk profile of every policy, as integer columns. A vehicle is its age and
+    its accident counts in the rule windows at the pricing date, so different histories
+    that the rules cannot tell apart (an empty one and one with only old accidents for
+    instance) share a profile. A house is all its columns.
+    """
+    if isinstance(batch, VehicleBatch):
+        today = as_of.toordinal()
+        return [batch.age, count_accidents(batch, today - AT_FAULT_WINDOW_DAYS, at_fault_only=True),
+                count_accidents(batch, today - RECENT_ACCIDENTS_WINDOW_DAYS)]
+    elif isinstance(batch, HouseBatch):
+        return [batch.age, batch.flood_risk, batch.n_parrots, batch.windows_intact, batch.windows_broken,
+                batch.has_intact, batch.has_broken]
+    raise ValueError("Unsupported policy type.")
+
+
+def profile_groups(batch: PolicyBatch, as_of: date) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Groups the policies with the same canonical profile.
+    Returns:
+        (representatives, inverse): the position of one policy of each distinct profile,
+        and for every policy the index of its profile in representatives.
+    """
+    keys, size = _profile_keys(profile_columns(batch, as_of))
+    if size > DENSE_KEYS_PER_POLICY * len(keys) + 1024:
+        _, representatives, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return representatives, inverse.reshape(-1)
+    # Small key space: number the keys with a lookup table instead of sorting them
+    present = np.bincount(keys, minlength=size).astype(bool)
+    inverse = (np.cumsum(present) - 1)[keys]
+    representatives = np.empty(int(np.count_nonzero(present)), dtype=np.int64)
+    representatives[inverse] = np.arange(len(keys))  # any policy of the profile will do
+    return representatives, inverse
+
+
+def price_unique_profiles(calculator: PremiumCalculator, batch: PolicyBatch) -> tuple[BatchResult, DedupStats]:
+    """
+    Same result as calculator.calculate_premiums(batch), but each distinct risk profile
+    is priced once and its result is copied back to the policies sharing it. With
+    calculator metrics, every policy of the batch is recorded, as calculate_premiums does.
+    """
+    metrics = calculator.metrics
+    started = metrics.clock() if metrics is not None else None
+    pricing_date = calculator.pricing_date()
+    representatives, inverse = profile_groups(batch, pricing_date)
+    unique = calculate_premiums(batch.take(representatives), calculator.base_rate, pricing_date,
+                                calculator.rate_table)
+    result = BatchResult(unique.premiums[inverse], unique.rejections[inverse])
+    if metrics is not None:
+        product = "vehicle" if isinstance(batch, VehicleBatch) else "house"
+        metrics.record_batch(product, result.rejections, metrics.clock() - started)
+    return result, DedupStats(len(batch), len(representatives))
+
+
+def _profile_keys(columns: list[np.ndarray]) -> tuple[np.ndarray, int]:
+    """
+    One int64 key per row, packing the columns in mixed radix when the value ranges
+    allow it, and numbering the distinct rows otherwise.
+    Returns:
+        (keys, size): the keys are in [0, size).
+    """
+    keys, size = np.zeros(len(columns[0]), dtype=np.int64), 1
+    for column in columns:
+        column = column.astype(np.int64, copy=False)
+        low = int(column.min()) if len(column) else 0
+        span = int(column.max()) - low + 1 if len(column) else 1
+        size *= span
+        if size >= 2 ** 63:
+            _, keys = np.unique(np.column_stack(columns), axis=0, return_inverse=True)
+            return keys.reshape(-1), int(keys.max()) + 1
+        keys = keys * span + (column - low)
+    return keys, size
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.dedup --product house --policies 1000000
+    """
+    from .synthetic import generate_house_batch, generate_vehicle_batch
+
+    parser = ArgumentParser(description="Pricing of a synthetic portfolio with and without profile deduplication")
+    parser.add_argument("--product", choices=["vehicle", "house"], default="house")
+    parser.add_argument("--policies", type=int, default=1_000_000)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    arguments = parser.parse_args()
+
+    if arguments.product == "vehicle":
+        portfolio, base_rate = generate_vehicle_batch(arguments.policies, arguments.as_of), 500
+    else:
+        portfolio, base_rate = generate_house_batch(arguments.policies), 300
+    calculator = PremiumCalculator(base_rate, as_of=arguments.as_of)
+
+    started = time.perf_counter()
+    expected = calculator.calculate_premiums(portfolio)
+    direct = time.perf_counter() - started
+    started = time.perf_counter()
+    result, stats = price_unique_profiles(calculator, portfolio)
+    deduplicated = time.perf_counter() - started
+
+    assert np.array_equal(result.rejections, expected.rejections)
+    assert np.array_equal(result.premiums, expected.premiums, equal_nan=True)
+    print(f"{stats.rows} policies, {stats.unique} distinct profiles (dedup ratio {stats.ratio:.1f}x)")
+    print(f"calculate_premiums {direct:.3f}s, price_unique_profiles {deduplicated:.3f}s")
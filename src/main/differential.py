@@ -0,0 +1,280 @@
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable
+import numpy as np
+from .batch import AT_FAULT_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS, BatchResult, HouseBatch, VehicleBatch
+from .dedup import price_unique_profiles
+from .premium_calculator import PremiumCalculator
+from .quoting import BASE_RATES, build_policy
+from .rate_tables import DEFAULT_RATE_TABLE
+from .rule_engine import HOUSE_RULES, VEHICLE_RULES, RuleEngine
+from .rules import RuleCode
+from .synthetic import (ACCIDENT_DISTRIBUTIONS, generate_house_batch, generate_vehicle_batch, house_records,
+                        vehicle_records)
+
+
+# An engine prices quote payloads: (product_type, records, as_of) -> BatchResult
+Engine = Callable[[str, list[dict[str, Any]], date], BatchResult]
+
+BATCH_TYPES = {"vehicle": VehicleBatch, "house": HouseBatch}
+
+# Accident dates placed on the edges of the rule windows (days before the pricing date)
+BOUNDARY_DAYS = (0, RECENT_ACCIDENTS_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS + 1,
+                 AT_FAULT_WINDOW_DAYS, AT_FAULT_WINDOW_DAYS + 1)
+
+# Keys dropped from some windows dictionaries
+MISSING_WINDOWS = (("intact",), ("broken",), ("intact", "broken"))
+
+# Spellings of "<n> years" every engine must accept
+AGE_SPELLINGS = ("{} years", "{} Years", "{}  years", "{}\tyears", " {} years ")
+
+
+def _scalar(product_type: str, records: list[dict[str, Any]], as_of: date) -> BatchResult:
+    calculator = PremiumCalculator(BASE_RATES[product_type], as_of=as_of)
+    results = [calculator.evaluate(build_policy(product_type, record)) for record in records]
+    return BatchResult(np.array([r.premium if r.accepted else np.nan for r in results], dtype=np.float64),
+                       np.array([r.rule for r in results], dtype=np.int8))
+
+
+def _batch(product_type: str, records: list[dict[str, Any]], as_of: date) -> BatchResult:
+    calculator = PremiumCalculator(BASE_RATES[product_type], as_of=as_of)
+    return calculator.calculate_premiums(BATCH_TYPES[product_type].from_records(records))
+
+
+def _rate_table(product_type: str, records: list[dict[str, Any]], as_of: date) -> BatchResult:
+    calculator = PremiumCalculator(as_of=as_of, rate_table=DEFAULT_RATE_TABLE)
+    return calculator.calculate_premiums(BATCH_TYPES[product_type].from_records(records))
+
+
+def _rule_engine(product_type: str, records: list[dict[str, Any]], as_of: date) -> BatchResult:
+    # Not adaptive: a reordered engine may report another rule for policies breaking several
+    engine = RuleEngine(VEHICLE_RULES if product_type == "vehicle" else HOUSE_RULES, BASE_RATES[product_type],
+                        as_of=as_of, adaptive=False)
+    return engine.evaluate_batch(BATCH_TYPES[product_type].from_records(records))
+
+
+def _dedup(product_type: str, records: list[dict[str, Any]], as_of: date) -> BatchResult:
+    calculator = PremiumCalculator(BASE_RATES[product_type], as_of=as_of)
+    return price_unique_profiles(calculator, BATCH_TYPES[product_type].from_records(records))[0]
+
+
+@lru_cache(maxsize=1)
+def _spark_session():
+    from .spark_job import build_session
+
+    return build_session("differential", "local[*]")
+
+
+def spark_unavailable(arrow: bool = False) -> str | None:
+    """
+    Why the Spark engines cannot run here (pyspark, pyarrow or Java missing), None when they can.
+    """
+    try:
+        import pyspark  # noqa: F401
+        if arrow:
+            import pyarrow  # noqa: F401
+            import pandas  # noqa: F401
+    except ImportError as e:
+        return str(e)
+    try:
+        _spark_session()
+    except Exception as e:
+        return f"Spark session failed: {e}"
+    return None
+
+
+def _spark_frame(product_type: str, records: list[dict[str, Any]]):
+    """
+    The records with the notebook schema (integer ages) plus an id column to restore the order.
+    """
+    from pyspark.sql.types import LongType, StructField, StructType
+    from .spark_job import house_policy_schema, vehicle_policy_schema
+
+    rows = []
+    for position, record in enumerate(records):
+        age = int(record["age"].split()[0])
+        if product_type == "vehicle":
+            history = [(accident["date"], accident["at_fault"]) for accident in record["accident_history"]]
+            rows.append((position, age, "vehicle", history))
+        else:
+            rows.append((position, age, "house", record["flood_risk"], record["n_parrots"], record["windows"]))
+    schema = vehicle_policy_schema if product_type == "vehicle" else house_policy_schema
+    return _spark_session().createDataFrame(rows, StructType([StructField("id", LongType(), False), *schema.fields]))
+
+
+def _spark_engine(arrow: bool) -> Engine:
+    def run(product_type: str, records: list[dict[str, Any]], as_of: date) -> BatchResult:
+        if arrow:
+            from .spark_arrow import price_houses_arrow as price_houses, price_vehicles_arrow as price_vehicles
+        else:
+            from .spark_job import price_houses, price_vehicles
+
+        frame = _spark_frame(product_type, records)
+        priced = (price_vehicles(frame, as_of, BASE_RATES["vehicle"]) if product_type == "vehicle"
+                  else price_houses(frame, BASE_RATES["house"]))
+        rows = priced.select("id", "rule_code", "premium").orderBy("id").collect()
+        return BatchResult(np.array([np.nan if row.premium is None else row.premium for row in rows], dtype=np.float64),
+                           np.array([row.rule_code for row in rows], dtype=np.int8))
+
+    return run
+
+
+ENGINES: dict[str, Engine] = {
+    "scalar": _scalar,
+    "batch": _batch,
+    "rate_table": _rate_table,
+    "rule_engine": _rule_engine,
+    "dedup": _dedup,
+    "spark": _spark_engine(arrow=False),
+    "spark_arrow": _spark_engine(arrow=True),
+}
+SPARK_ENGINES = {"spark": False, "spark_arrow": True}
+
+
+def random_portfolio(product_type: str, n: int, as_of: date, seed: int = 0) -> tuple[list[dict[str, Any]], dict]:
+    """
+    Randomized quote payloads: the synthetic generator with random options (rejection
+    rates, accident distribution), plus accidents on the rule window edges, unusual age
+    spellings and windows dictionaries missing a key.
+    Returns:
+        (records, the generator options drawn).
+    """
+    rng = np.random.default_rng(seed)
+    if product_type == "vehicle":
+        options = {"mean_accidents": round(float(rng.uniform(0, 3)), 2),
+                   "accident_distribution": str(rng.choice(ACCIDENT_DISTRIBUTIONS)),
+                   "too_old_rate": round(float(rng.uniform(0, 0.3)), 2),
+                   "derby_rate": round(float(rng.uniform(0, 0.2)), 2)}
+        batch = generate_vehicle_batch(n, as_of, seed=seed, **options)
+        edges = rng.random(len(batch.accident_dates)) < 0.1
+        batch.accident_dates[edges] = as_of.toordinal() - rng.choice(BOUNDARY_DAYS, size=int(edges.sum()))
+        records = vehicle_records(batch)
+    elif product_type == "house":
+        options = {"parrot_rate": round(float(rng.uniform(0, 0.3)), 2),
+                   "broken_windows_rate": round(float(rng.uniform(0, 0.3)), 2)}
+        records = house_records(generate_house_batch(n, seed=seed, **options))
+        for position in np.flatnonzero(rng.random(n) < 0.05).tolist():
+            for key in MISSING_WINDOWS[rng.integers(len(MISSING_WINDOWS))]:
+                records[position]["windows"].pop(key)
+    else:
+        raise ValueError("No more insurance types, please select 'vehicle' or 'house'")
+
+    for position in np.flatnonzero(rng.random(n) < 0.05).tolist():
+        years = records[position]["age"].split()[0]
+        records[position]["age"] = AGE_SPELLINGS[rng.integers(len(AGE_SPELLINGS))].format(years)
+    return records, options
+
+
+def mismatches(expected: BatchResult, actual: BatchResult, tolerance: float = 1e-9) -> np.ndarray:
+    """
+    Positions where the rule codes differ, or the premiums differ by more than tolerance
+    (relative and absolute). Rejected policies have NaN premiums on both sides.
+    """
+    return np.flatnonzero((actual.rejections != expected.rejections)
+                          | ~np.isclose(actual.premiums, expected.premiums, rtol=tolerance, atol=tolerance,
+                                        equal_nan=True))
+
+
+def _outcome(result: BatchResult, position: int) -> dict[str, Any]:
+    premium = float(result.premiums[position])
+    return {"rule": RuleCode(int(result.rejections[position])).name, "premium": None if np.isnan(premium) else premium}
+
+
+def run_differential(product_type: str, records: list[dict[str, Any]], as_of: date,
+                     engines: dict[str, Engine] | None = None, reference: str = "scalar",
+                     tolerance: float = 1e-9, examples: int = 5) -> dict[str, Any]:
+    """
+    Prices the same records with every engine and diffs each of them against the reference engine.
+    Args:
+        engines: name -> Engine, ENGINES when None. Spark engines are skipped when Spark cannot run.
+        reference: the engine the others are compared with.
+        tolerance: premium tolerance, see mismatches.
+        examples: mismatching policies kept per engine in the report.
+    Returns:
+        per engine: seconds, policies_per_second and mismatches (with examples),
+        or skipped with the reason.
+    """
+    engines = ENGINES if engines is None else engines
+    report, results = {}, {}
+    for name in [reference] + [name for name in engines if name != reference]:
+        if name in SPARK_ENGINES:
+            reason = spark_unavailable(SPARK_ENGINES[name])
+            if reason is not None:
+                report[name] = {"skipped": reason}
+                continue
+        started = time.perf_counter()
+        results[name] = engines[name](product_type, records, as_of)
+        seconds = time.perf_counter() - started
+        report[name] = {"seconds": seconds, "policies_per_second": len(records) / seconds if seconds else None}
+
+    expected = results[reference]
+    for name, result in results.items():
+        if name == reference:
+            continue
+        wrong = mismatches(expected, result, tolerance)
+        report[name]["mismatches"] = len(wrong)
+        report[name]["examples"] = [
+            {"position": position, "record": records[position],
+             "expected": _outcome(expected, position), "actual": _outcome(result, position)}
+            for position in wrong[:examples].tolist()
+        ]
+    return report
+
+
+def fuzz(n: int, rounds: int, as_of: date, seed: int = 0, product_types: tuple[str, ...] = ("vehicle", "house"),
+         engines: dict[str, Engine] | None = None, tolerance: float = 1e-9) -> list[dict[str, Any]]:
+    """
+    rounds random portfolios of n policies per product type, each diffed with run_differential.
+    """
+    report = []
+    for round_number in range(rounds):
+        for product_type in product_types:
+            round_seed = seed + round_number
+            records, options = random_portfolio(product_type, n, as_of, round_seed)
+            report.append({"product_type": product_type, "policies": n, "seed": round_seed, "options": options,
+                           "engines": run_differential(product_type, records, as_of, engines,
+                                                       tolerance=tolerance)})
+    return report
+
+
+def total_mismatches(report: list[dict[str, Any]]) -> int:
+    return sum(engine.get("mismatches", 0) for run in report for engine in run["engines"].values())
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.differential --policies 100000 --rounds 5 --as-of 2025-02-17
+    python3 -m main.differential --policies 10000 --engines scalar batch spark --output differential.json
+    """
+    parser = ArgumentParser(description="Differential test of the pricing engines on random portfolios")
+    parser.add_argument("--policies", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date(2025, 2, 17))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--products", nargs="+", choices=["vehicle", "house"], default=["vehicle", "house"])
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--output", metavar="FILE", help="JSON report file")
+    arguments = parser.parse_args()
+
+    selected = {name: ENGINES[name] for name in ["scalar"] + arguments.engines}
+    report = fuzz(arguments.policies, arguments.rounds, arguments.as_of, arguments.seed, tuple(arguments.products),
+                  selected, arguments.tolerance)
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    for run in report:
+        for name, engine in run["engines"].items():
+            if "skipped" in engine:
+                status = f"skipped ({engine['skipped']})"
+            else:
+                status = f"{engine['policies_per_second']:>12,.0f} policies/s"
+                if "mismatches" in engine:
+                    status += f"  {engine['mismatches']} mismatches"
+            print(f"{run['product_type']:<8} seed={run['seed']:<4} {name:<12} {status}")
+    sys.exit(1 if total_mismatches(report) else 0)
@@ -1,18 +1,19 @@
 class CarToOldException(Exception):
     def __init__(self, message = "Blocked by UW Rules"):
+        super().__init__(message)
         self.message = message
         
 class CarDemotionDerbyException(Exception):
     def __init__(self, message = "Too many at-fault accidents in the last 5 years"):
+        super().__init__(message)
         self.message = message
-        print(message)
         
 class TooManyParrotsException(Exception):
     def __init__(self, message = "Too many parrots"):
+        super().__init__(message)
         self.message = message
-        print(message)
         
 class BrokenWindowsException(Exception):
     def __init__(self, message = "More broken windows than intact windows"):
+        super().__init__(message)
         self.message = message
-        print(message)
\ No newline at end of file
@@ -0,0 +1,175 @@
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from datetime import date, timedelta
+import numpy as np
+from .batch import (AT_FAULT_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS, VehicleBatch, calculate_premiums,
+                    count_accidents, vehicle_premiums)
+
+
+@dataclass
+class PremiumChanges:
+    """
+    Policies whose premium or rule changed.
+    Attributes:
+        policies (np.ndarray): policy positions in the repriced batch, ascending.
+        premiums (np.ndarray): new premium per policy, NaN when rejected.
+        rejections (np.ndarray): new RuleCode per policy.
+    """
+    policies: np.ndarray
+    premiums: np.ndarray
+    rejections: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.policies)
+
+
+class IncrementalRepricer:
+    """
+    Keeps the premiums of a vehicle portfolio up to date without repricing the whole book.
+    A vehicle premium only changes when an accident leaves the recent (3 years) or the
+    at-fault (5 years) window, or when an accident is added. Every accident contributes
+    one expiry event per window it counts in, on the first day it no longer counts
+    (accident date + window + 1). The events are kept sorted by day, so moving the pricing
+    date is a binary search for the events in between, the window counts of their
+    policies are updated and only those policies are repriced.
+    """
+
+    def __init__(self, batch: VehicleBatch, base_rate: float, as_of: date):
+        """
+        Args:
+            batch: vehicle policies, the repricer owns the policy positions of this batch.
+            base_rate: base premium.
+            as_of: initial pricing date.
+        """
+        self.base_rate = base_rate
+        self.age = batch.age
+        self._today = as_of.toordinal()
+        self._at_fault_5yr = count_accidents(batch, self._today - AT_FAULT_WINDOW_DAYS, at_fault_only=True)
+        self._recent = count_accidents(batch, self._today - RECENT_ACCIDENTS_WINDOW_DAYS)
+        self.result = vehicle_premiums(self.age, self._at_fault_5yr, self._recent, base_rate)
+
+        self._event_days = np.empty(0, dtype=np.int64)
+        self._event_policies = np.empty(0, dtype=np.int64)
+        self._event_at_fault = np.empty(0, dtype=bool)
+        owners = np.repeat(np.arange(len(batch)), np.diff(batch.accident_offsets))
+        self._index(owners, batch.accident_dates, batch.accident_at_fault)
+
+    @property
+    def as_of(self) -> date:
+        return date.fromordinal(self._today)
+
+    @property
+    def pending_events(self) -> int:
+        """
+        Expiry events after the current pricing date.
+        """
+        return len(self._event_days) - int(np.searchsorted(self._event_days, self._today, side="right"))
+
+    def next_change(self) -> date | None:
+        """
+        First pricing date after as_of on which a window count changes, None when no
+        accident will expire anymore.
+        """
+        position = np.searchsorted(self._event_days, self._today, side="right")
+        return date.fromordinal(int(self._event_days[position])) if position < len(self._event_days) else None
+
+    def advance(self, as_of: date) -> PremiumChanges:
+        """
+        Moves the pricing date (forwards or backwards) and reprices the policies whose
+        window counts changed.
+        Returns:
+            the policies whose premium or rule changed.
+        """
+        today = as_of.toordinal()
+        start, stop = np.searchsorted(self._event_days, [min(self._today, today), max(self._today, today)],
+                                      side="right")
+        # Forwards the accidents in (old, new] leave their window, backwards they come back
+        step = -1 if today > self._today else 1
+        self._today = today
+        policies = self._event_policies[start:stop]
+        at_fault = self._event_at_fault[start:stop]
+        self._update_counts(policies[~at_fault], policies[at_fault], step)
+        return self._reprice(np.unique(policies))
+
+    def add_accidents(self, policies, dates, at_fault) -> PremiumChanges:
+        """
+        Appends accidents to existing policies and reprices them.
+        Args:
+            policies: policy position of every accident.
+            dates: accident dates as ordinals.
+            at_fault: at-fault flag of every accident.
+        Returns:
+            the policies whose premium or rule changed.
+        """
+        policies = np.asarray(policies, dtype=np.int64)
+        dates = np.asarray(dates, dtype=np.int64)
+        at_fault = np.asarray(at_fault, dtype=bool)
+        if not (len(policies) == len(dates) == len(at_fault)):
+            raise ValueError("policies, dates and at_fault must have the same length")
+        if len(policies) and (policies.min() < 0 or policies.max() >= len(self.age)):
+            raise ValueError("Unknown policy position")
+
+        recent = dates >= self._today - RECENT_ACCIDENTS_WINDOW_DAYS
+        counted_at_fault = at_fault & (dates >= self._today - AT_FAULT_WINDOW_DAYS)
+        self._update_counts(policies[recent], policies[counted_at_fault], 1)
+        self._index(policies, dates, at_fault)
+        return self._reprice(np.unique(policies))
+
+    def _index(self, policies: np.ndarray, dates: np.ndarray, at_fault: np.ndarray):
+        """
+        Merges the expiry events of new accidents into the sorted event arrays.
+        """
+        days = np.concatenate([dates + RECENT_ACCIDENTS_WINDOW_DAYS + 1,
+                               dates[at_fault] + AT_FAULT_WINDOW_DAYS + 1])
+        owners = np.concatenate([policies, policies[at_fault]])
+        kinds = np.concatenate([np.zeros(len(dates), dtype=bool), np.ones(int(at_fault.sum()), dtype=bool)])
+        order = np.argsort(days, kind="stable")
+        positions = np.searchsorted(self._event_days, days[order], side="right")
+        self._event_days = np.insert(self._event_days, positions, days[order])
+        self._event_policies = np.insert(self._event_policies, positions, owners[order])
+        self._event_at_fault = np.insert(self._event_at_fault, positions, kinds[order])
+
+    def _update_counts(self, recent: np.ndarray, at_fault: np.ndarray, step: int):
+        np.add.at(self._recent, recent, step)
+        np.add.at(self._at_fault_5yr, at_fault, step)
+
+    def _reprice(self, policies: np.ndarray) -> PremiumChanges:
+        repriced = vehicle_premiums(self.age[policies], self._at_fault_5yr[policies], self._recent[policies],
+                                    self.base_rate)
+        old_premiums = self.result.premiums[policies]
+        changed = ((repriced.rejections != self.result.rejections[policies])
+                   | ~((repriced.premiums == old_premiums) | (np.isnan(repriced.premiums) & np.isnan(old_premiums))))
+        policies = policies[changed]
+        self.result.premiums[policies] = repriced.premiums[changed]
+        self.result.rejections[policies] = repriced.rejections[changed]
+        return PremiumChanges(policies, repriced.premiums[changed], repriced.rejections[changed])
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.incremental --policies 1000000 --days 30
+    """
+    from .synthetic import generate_vehicle_batch
+
+    parser = ArgumentParser(description="Daily incremental repricing vs full repricing")
+    parser.add_argument("--policies", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    arguments = parser.parse_args()
+
+    portfolio = generate_vehicle_batch(arguments.policies, arguments.as_of)
+    repricer = IncrementalRepricer(portfolio, 500, arguments.as_of)
+    incremental = full = 0.0
+    changed = 0
+    for day in range(1, arguments.days + 1):
+        as_of = arguments.as_of + timedelta(days=day)
+        started = time.perf_counter()
+        changed += len(repricer.advance(as_of))
+        incremental += time.perf_counter() - started
+        started = time.perf_counter()
+        calculate_premiums(portfolio, 500, as_of)
+        full += time.perf_counter() - started
+    print(f"{arguments.days} days, {changed} premium changes: incremental {incremental:.3f}s, "
+          f"full repricing {full:.3f}s")
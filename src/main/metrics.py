@@ -0,0 +1,241 @@
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable
+from .rules import RuleCode
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Seconds, from a single rule check (about a microsecond) to a large batch
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0)
+
+
+class Histogram:
+    """
+    Cumulative-on-export latency histogram with fixed upper bounds (Prometheus style).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip([*map(repr, self.buckets), "+Inf"], self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Upper bound of the bucket holding the q quantile (q in [0, 1]), None when empty.
+        """
+        if not self.count:
+            return None
+        rank, total = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+
+class CalculatorMetrics:
+    """
+    Counters and latency histograms filled by an instrumented PremiumCalculator
+    (PremiumCalculator(metrics=CalculatorMetrics())) and by main.quoting when
+    quoting.instrument(metrics) was called. Calculators without metrics only pay for
+    an `is None` test per rule. Updates are not locked: use one instance per thread
+    (asyncio servers and single threaded runners are fine). snapshot and to_prometheus
+    may run in another thread (StatsDumper), they read copies of the dictionaries.
+    Attributes:
+        quotes (Counter): evaluated policies per (product, outcome), outcome is "accepted" or "rejected".
+        rejections (Counter): rejected policies per RuleCode name.
+        exceptions (Counter): rejections raised as exceptions by calculate_premium, per RuleCode name.
+        stages (dict): Histogram per stage: validate (policy construction), evaluate
+            (PremiumCalculator.evaluate), price (bonus-malus) and batch (calculate_premiums calls).
+        rules (dict): Histogram of every rule check, its count is the number of evaluations of the rule.
+        rule_hits (Counter): rule checks that matched (the policy is rejected by the rule), per RuleCode name.
+    """
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, namespace: str = "premium"):
+        self.namespace = namespace
+        self.quotes = Counter()
+        self.rejections = Counter()
+        self.exceptions = Counter()
+        self.batch_policies = Counter()
+        self.stages = {stage: Histogram() for stage in ("validate", "evaluate", "price", "batch")}
+        self.rules = {}
+        self.rule_hits = Counter()
+
+    def record_quote(self, product: str, evaluate: Callable, policy) -> Any:
+        """
+        Runs evaluate(policy) and records its latency and outcome.
+        """
+        started = self.clock()
+        result = evaluate(policy)
+        self.stages["evaluate"].observe(self.clock() - started)
+        self.quotes[product, "accepted" if result.accepted else "rejected"] += 1
+        if not result.accepted:
+            self.rejections[result.rule.name] += 1
+        return result
+
+    def check(self, rule: RuleCode, hit: bool, started: float) -> float:
+        """
+        Records a rule check that began at started.
+        Returns:
+            the current clock, the start of the next check.
+        """
+        now = self.clock()
+        histogram = self.rules.get(rule.name)
+        if histogram is None:
+            histogram = self.rules[rule.name] = Histogram()
+        histogram.observe(now - started)
+        if hit:
+            self.rule_hits[rule.name] += 1
+        return now
+
+    def priced(self, started: float):
+        self.stages["price"].observe(self.clock() - started)
+
+    def timed(self, stage: str, function: Callable, *args) -> Any:
+        """
+        Runs function(*args) and records its latency in the stage histogram, also when it raises.
+        """
+        started = self.clock()
+        try:
+            return function(*args)
+        finally:
+            self.stages[stage].observe(self.clock() - started)
+
+    def record_batch(self, product: str, rejections: "np.ndarray", seconds: float):
+        import numpy as np
+
+        self.stages["batch"].observe(seconds)
+        self.batch_policies[product] += len(rejections)
+        counts = np.bincount(rejections, minlength=len(RuleCode))
+        self.quotes[product, "accepted"] += int(counts[RuleCode.ACCEPTED])
+        self.quotes[product, "rejected"] += len(rejections) - int(counts[RuleCode.ACCEPTED])
+        for code in RuleCode:
+            if code != RuleCode.ACCEPTED and counts[code]:
+                self.rejections[code.name] += int(counts[code])
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        JSON friendly summary: counters, plus count, mean and p50/p99 bucket bounds of each histogram.
+        """
+        def summary(histogram: Histogram) -> dict[str, Any]:
+            return {"count": histogram.count, "mean": histogram.sum / histogram.count if histogram.count else None,
+                    "p50": histogram.quantile(0.50), "p99": histogram.quantile(0.99)}
+
+        rules, quotes = sorted(dict(self.rules).items()), sorted(dict(self.quotes).items())
+        return {
+            "quotes": {f"{product}/{outcome}": count for (product, outcome), count in quotes},
+            "rejections": dict(self.rejections),
+            "rule_checks": {rule: histogram.count for rule, histogram in rules},
+            "rule_hits": dict(self.rule_hits),
+            "exceptions": dict(self.exceptions),
+            "batch_policies": dict(self.batch_policies),
+            "stages_seconds": {stage: summary(histogram) for stage, histogram in self.stages.items()},
+            "rules_seconds": {rule: summary(histogram) for rule, histogram in rules},
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        ns, lines = self.namespace, []
+        # dict() copies in one call, iterating the live dictionaries fails when the
+        # pricing thread adds a key meanwhile
+        rules = sorted(dict(self.rules).items())
+
+        def counter(name: str, help_text: str, samples: list[tuple[str, int]]):
+            lines.extend([f"# HELP {ns}_{name} {help_text}", f"# TYPE {ns}_{name} counter"])
+            lines.extend(f"{ns}_{name}{{{labels}}} {value}" for labels, value in samples)
+
+        def histograms(name: str, help_text: str, label: str, values: dict[str, Histogram]):
+            lines.extend([f"# HELP {ns}_{name} {help_text}", f"# TYPE {ns}_{name} histogram"])
+            for key, histogram in values.items():
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{ns}_{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+                lines.append(f'{ns}_{name}_sum{{{label}="{key}"}} {histogram.sum!r}')
+                lines.append(f'{ns}_{name}_count{{{label}="{key}"}} {histogram.count}')
+
+        counter("quotes_total", "Evaluated policies.",
+                [(f'product="{product}",outcome="{outcome}"', count)
+                 for (product, outcome), count in sorted(dict(self.quotes).items())])
+        counter("rejections_total", "Rejected policies by underwriting rule.",
+                [(f'rule="{rule}"', count) for rule, count in sorted(dict(self.rejections).items())])
+        counter("rule_checks_total", "Underwriting rule evaluations.",
+                [(f'rule="{rule}"', histogram.count) for rule, histogram in rules])
+        counter("rule_hits_total", "Underwriting rule evaluations that rejected the policy.",
+                [(f'rule="{rule}"', count) for rule, count in sorted(dict(self.rule_hits).items())])
+        counter("rule_exceptions_total", "Rejections raised as exceptions by calculate_premium.",
+                [(f'rule="{rule}"', count) for rule, count in sorted(dict(self.exceptions).items())])
+        counter("batch_policies_total", "Policies priced by calculate_premiums.",
+                [(f'product="{product}"', count) for product, count in sorted(dict(self.batch_policies).items())])
+        histograms("stage_seconds", "Latency of each pricing stage.", "stage",
+                   {stage: histogram for stage, histogram in self.stages.items() if histogram.count})
+        histograms("rule_seconds", "Latency of each underwriting rule check.", "rule", dict(rules))
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, format: str = "prometheus"):
+        """
+        Writes the metrics atomically (temporary file and rename), as Prometheus text
+        (for a node exporter textfile collector) or as the JSON snapshot.
+        """
+        text = self.to_prometheus() if format == "prometheus" else json.dumps(self.snapshot(), indent=2)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as output:
+            output.write(text)
+        os.replace(temporary, path)
+
+
+class StatsDumper:
+    """
+    Writes the metrics to a file every interval seconds from a daemon thread, and a
+    last time on stop. A failed write is reported on stderr and kept in error, the
+    thread keeps dumping.
+    """
+
+    def __init__(self, metrics: CalculatorMetrics, path: str, interval: float = 10.0, format: str = "prometheus"):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.format = format
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stats-dumper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.metrics.write(self.path, self.format)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.metrics.write(self.path, self.format)
+            except Exception as e:
+                self.error = e
+                print(f"Could not write the metrics to {self.path}: {e}", file=sys.stderr)
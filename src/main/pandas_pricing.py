@@ -0,0 +1,71 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from .batch import HouseBatch, VehicleBatch, calculate_premiums
+from .rules import RuleCode
+
+# The pandas side of main.spark_arrow: prices the batches mapInPandas hands over, from
+# the helper columns prepared by Spark. Nothing here imports pyspark, so the pricing
+# can be run (and tested) on plain DataFrames.
+#
+# Null inputs price like main.spark_job: a null or malformed age (_invalid_age) is
+# rejected with RuleCode.INVALID_AGE, null parrot counts become 0, null or unknown
+# flood risks LOW and accidents without a valid date are left out. numpy columns
+# cannot hold the nulls, the Spark side fills them before the hand over.
+
+VEHICLE_HELPERS = ["_age", "_invalid_age", "_accidents", "_accident_dates", "_accident_at_fault"]
+HOUSE_HELPERS = ["_age", "_invalid_age", "_flood_risk", "_n_parrots", "_intact", "_broken", "_has_intact",
+                 "_has_broken"]
+
+
+def price_vehicle_frame(pdf: pd.DataFrame, base_rate: float, as_of: date) -> pd.DataFrame:
+    """
+    Prices one pandas batch of vehicle policies.
+    Args:
+        pdf: the VEHICLE_HELPERS columns plus the columns passed through: _age (0 when
+            invalid), _invalid_age, _accidents (per policy) and the per policy arrays
+            _accident_dates (ordinals) and _accident_at_fault.
+    Returns:
+        pdf without the helper columns, plus rule_code and premium (NaN when rejected).
+    """
+    dates, offsets = _flatten(pdf["_accident_dates"], pdf["_accidents"], np.int64)
+    at_fault, _ = _flatten(pdf["_accident_at_fault"], pdf["_accidents"], bool)
+    batch = VehicleBatch(pdf["_age"].to_numpy(np.int64), offsets, dates, at_fault)
+    return _with_results(pdf, VEHICLE_HELPERS, calculate_premiums(batch, base_rate, as_of))
+
+
+def price_house_frame(pdf: pd.DataFrame, base_rate: float) -> pd.DataFrame:
+    """
+    Prices one pandas batch of house policies, see price_vehicle_frame.
+    Args:
+        pdf: the HOUSE_HELPERS columns plus the columns passed through.
+    """
+    batch = HouseBatch(
+        age=pdf["_age"].to_numpy(np.int64),
+        flood_risk=pdf["_flood_risk"].to_numpy(np.int8),
+        n_parrots=pdf["_n_parrots"].to_numpy(np.int64),
+        windows_intact=pdf["_intact"].to_numpy(np.int64),
+        windows_broken=pdf["_broken"].to_numpy(np.int64),
+        has_intact=pdf["_has_intact"].to_numpy(bool),
+        has_broken=pdf["_has_broken"].to_numpy(bool),
+    )
+    return _with_results(pdf, HOUSE_HELPERS, calculate_premiums(batch, base_rate))
+
+
+def _with_results(pdf: pd.DataFrame, helpers: list[str], result) -> pd.DataFrame:
+    invalid_age = pdf["_invalid_age"].to_numpy(bool)
+    out = pdf.drop(columns=helpers)
+    out["rule_code"] = np.where(invalid_age, int(RuleCode.INVALID_AGE), result.rejections).astype(np.int32)
+    out["premium"] = np.where(invalid_age, np.nan, result.premiums)  # NaN (rejected) becomes null in Arrow
+    return out
+
+
+def _flatten(arrays: pd.Series, lengths: pd.Series, dtype) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates a Series of per-row arrays into one flat array plus offsets, the
+    lengths (computed by Spark) give the offsets without looking at every row.
+    """
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths.to_numpy(np.int64), out=offsets[1:])
+    flat = np.concatenate(arrays.to_numpy()).astype(dtype) if offsets[-1] else np.empty(0, dtype=dtype)
+    return flat, offsets
@@ -38,19 +38,24 @@ class Policy(abc.ABC):
         """
         Checks if a string is in the format '<number> years'.
         """
-        parts = age.split()  # Split on whitespace
-        if len(parts) != 2:
-            return False  # Must have two parts
-
-        number_part, word_part = parts
-
-        if word_part.lower() != "years":  # Case-insensitive check
-            return False
-
-        try:
-            age = int(number_part)  # Try to convert the number part to an integer
-            return age >= 0 # Additional check, age should be non-negative.
-        except ValueError:            
-            print("Age must be a string with the format '<number> years'.")
-            return False
-        
\ No newline at end of file
+        return parse_age_string(age) is not None
+
+
+def parse_age_string(age: str) -> int | None:
+    """
+    Age in years of a '<number> years' string, None when the string has another format.
+    """
+    parts = age.split()  # Split on whitespace
+    if len(parts) != 2:
+        return None  # Must have two parts
+
+    number_part, word_part = parts
+
+    if word_part.lower() != "years":  # Case-insensitive check
+        return None
+
+    try:
+        age = int(number_part)  # Try to convert the number part to an integer
+    except ValueError:
+        return None
+    return age if age >= 0 else None  # Additional check, age should be non-negative.
@@ -1,9 +1,19 @@
 
 from dataclasses import dataclass, field
+from enum import IntEnum
 from typing import ClassVar, Literal
 from .base_policy import Policy
 
 
+class FloodRisk(IntEnum):
+    """
+    Flood risk codes used by the columnar and compact representations.
+    """
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+
+
 @dataclass
 class HousePolicy(Policy):
     DEFAULT_FLOOD_RISK: ClassVar[Literal["HIGH", "MEDIUM", "LOW"]] = "LOW"    
@@ -1,6 +1,10 @@
 
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableSequence, Sequence
 from dataclasses import dataclass, field
-from typing import List
+from itertools import accumulate
+from typing import Iterable, List
 from main.policies.base_policy import Policy
 from datetime import date
 
@@ -17,6 +21,114 @@ class AccidentHistory:
             raise TypeError("at_fault must be a boolean")
 
 
+class AccidentLog(MutableSequence):
+    """
+    Compact accident history: date ordinals and at-fault flags in two parallel arrays
+    instead of one AccidentHistory object per accident.
+    Indexing and iterating give AccidentHistory objects (built on demand, in insertion
+    order), and it supports the list operations (append, extend, insert, item and slice
+    assignment, del, +=), so it can be used as the former list of AccidentHistory.
+    Window counts use a sorted copy of the dates and an at-fault prefix sum, built
+    lazily and dropped on every change, so count_since is a binary search.
+    """
+    __slots__ = ("_dates", "_at_fault", "_sorted_dates", "_at_fault_prefix")
+
+    def __init__(self, dates: Iterable[int] = (), at_fault: Iterable[bool] = ()):
+        """
+        Args:
+            dates: accident dates as ordinals (date.toordinal()).
+            at_fault: at-fault flag of each accident.
+        """
+        self._dates = array("l", dates)
+        self._at_fault = array("b", at_fault)
+        if len(self._dates) != len(self._at_fault):
+            raise ValueError("dates and at_fault must have the same length")
+        self._sorted_dates = None
+        self._at_fault_prefix = None
+
+    @property
+    def ordinals(self) -> memoryview:
+        """
+        Read-only view of the date ordinals (the log cannot grow or shrink while a view is alive).
+        """
+        return memoryview(self._dates).toreadonly()
+
+    @property
+    def at_fault(self) -> memoryview:
+        """
+        Read-only view of the at-fault flags, 0 or 1.
+        """
+        return memoryview(self._at_fault).toreadonly()
+
+    def append(self, accident: AccidentHistory):
+        self._check(accident)
+        self._dates.append(accident.date.toordinal())
+        self._at_fault.append(accident.at_fault)
+        self._sorted_dates = None
+
+    def insert(self, index: int, accident: AccidentHistory):
+        self._check(accident)
+        self._dates.insert(index, accident.date.toordinal())
+        self._at_fault.insert(index, accident.at_fault)
+        self._sorted_dates = None
+
+    def count_since(self, cutoff: int, at_fault_only: bool = False) -> int:
+        """
+        Number of accidents dated on or after the cutoff ordinal.
+        """
+        if self._sorted_dates is None:
+            order = sorted(range(len(self._dates)), key=self._dates.__getitem__)
+            self._sorted_dates = array("l", (self._dates[i] for i in order))
+            self._at_fault_prefix = array("l", accumulate((self._at_fault[i] for i in order), initial=0))
+        first = bisect_left(self._sorted_dates, cutoff)
+        if at_fault_only:
+            return self._at_fault_prefix[-1] - self._at_fault_prefix[first]
+        return len(self._sorted_dates) - first
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return AccidentHistory(date=date.fromordinal(self._dates[index]), at_fault=bool(self._at_fault[index]))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            accidents = list(value)
+            for accident in accidents:
+                self._check(accident)
+            self._dates[index] = array("l", (accident.date.toordinal() for accident in accidents))
+            self._at_fault[index] = array("b", (accident.at_fault for accident in accidents))
+        else:
+            self._check(value)
+            self._dates[index] = value.date.toordinal()
+            self._at_fault[index] = value.at_fault
+        self._sorted_dates = None
+
+    def __delitem__(self, index):
+        del self._dates[index]
+        del self._at_fault[index]
+        self._sorted_dates = None
+
+    @staticmethod
+    def _check(accident):
+        if not isinstance(accident, AccidentHistory):
+            raise TypeError("All items in accident_history must be AccidentHistory objects.")
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AccidentLog):
+            return self._dates == other._dates and self._at_fault == other._at_fault
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"AccidentLog({list(self)!r})"
+
+
 @dataclass
 class VehiclePolicy(Policy):
 
@@ -26,24 +138,30 @@ class VehiclePolicy(Policy):
     def __post_init__(self):
         self.validate()
         
+        if isinstance(self.accident_history, AccidentLog):
+            return
         if not isinstance(self.accident_history, list):
              raise TypeError("accident_history must be a list.")
 
-        # To convert each dict into a AccidentHistory instance
-        validated_history = []
+        # To store each dict or AccidentHistory instance in the compact log
+        dates, at_fault = [], []
         for item in self.accident_history:
             if isinstance(item, AccidentHistory): #If it is already an instance, append.
-                 validated_history.append(item)
-            elif isinstance(item, dict): #If it is a dictionary create and validate.
+                dates.append(item.date.toordinal())
+                at_fault.append(item.at_fault)
+            elif isinstance(item, dict): #If it is a dictionary validate.
                 try:                    
-                    accident = AccidentHistory(date=date.fromisoformat(item['date']), at_fault=item['at_fault'])
-                    validated_history.append(accident)
+                    accident_date = date.fromisoformat(item['date'])
+                    if not isinstance(item['at_fault'], bool):
+                        raise TypeError("at_fault must be a boolean")
                 except (KeyError, ValueError, TypeError) as e:
                     raise ValueError(f"Invalid accident history data: {e}") from e
+                dates.append(accident_date.toordinal())
+                at_fault.append(item['at_fault'])
             else:
                 raise TypeError("All items in accident_history must be AccidentHistory objects or dictionaries.")
 
-        self.accident_history = validated_history
+        self.accident_history = AccidentLog(dates, at_fault)
 
 
     def validate(self):
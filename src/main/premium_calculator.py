@@ -4,6 +4,39 @@ from .exceptions.insurance import BrokenWindowsException, CarToOldException, Car
 from .policies.base_policy import Policy
 from .policies.vehicle_policy import VehiclePolicy
 from .policies.house_policy import HousePolicy
+from typing import TYPE_CHECKING
+from .rate_tables import RateTable
+from .rules import QuoteResult, RuleCode
+
+if TYPE_CHECKING:
+    from .batch import BatchResult, PolicyBatch
+    from .metrics import CalculatorMetrics
+
+# main.batch (and numpy) is imported by calculate_premiums only, scalar quotes never load it
+
+
+INVALID_WINDOWS_MESSAGE = "Windows dictionary should have keys 'intact' and/or 'broken'"
+
+
+def _invalid_windows() -> ValueError:
+    return ValueError(INVALID_WINDOWS_MESSAGE)
+
+
+# Exceptions raised by calculate_premium for each rejecting rule
+_RULE_EXCEPTIONS = {
+    RuleCode.CAR_TOO_OLD: CarToOldException,
+    RuleCode.DEMOLITION_DERBY: CarDemotionDerbyException,
+    RuleCode.TOO_MANY_PARROTS: TooManyParrotsException,
+    RuleCode.BROKEN_WINDOWS: BrokenWindowsException,
+    RuleCode.INVALID_WINDOWS: _invalid_windows,
+}
+
+
+def rule_exception(rule: RuleCode) -> Exception:
+    """
+    Exception calculate_premium raises for a rejecting rule.
+    """
+    return _RULE_EXCEPTIONS[rule]()
 
 
 class PremiumCalculator:
@@ -11,77 +44,176 @@ class PremiumCalculator:
     Calculates the premium for an insurance policy.
     """
 
-    def __init__(self, base_rate: float = 0.01):
+    def __init__(self, base_rate: float = 0.01, as_of: date | None = None, rate_table: RateTable | None = None,
+                 metrics: "CalculatorMetrics | None" = None):
+        """
+        Args:
+            base_rate: base premium.
+            as_of: pricing date the accident windows are relative to, today when None.
+            rate_table: precompiled rates, when given its per product base rates and
+                lookup arrays replace base_rate and the bonus-malus arithmetic.
+            metrics: opt-in instrumentation (counters, rejections by rule, latency histograms).
+        """
         self.base_rate = base_rate
+        self.as_of = as_of
+        self.rate_table = rate_table
+        self.metrics = metrics
+        self._cutoffs_for = None
+        self._cutoffs = None
 
     def calculate_premium(self, policy: Policy) -> float:
+        """
+        Returns the premium of the policy.
+        Raises:
+            CarToOldException, CarDemotionDerbyException, TooManyParrotsException,
+            BrokenWindowsException: the policy is blocked by an underwriting rule.
+            ValueError: unsupported policy type or invalid windows dictionary.
+        """
+        result = self.evaluate(policy)
+        if not result.accepted:
+            if self.metrics is not None:
+                self.metrics.exceptions[result.rule.name] += 1
+            raise rule_exception(result.rule)
+        return result.premium
+
+    def evaluate(self, policy: Policy) -> QuoteResult:
+        """
+        Same rules as calculate_premium but rejections are returned as a QuoteResult
+        instead of raised, and nothing is printed.
+        Raises:
+            ValueError: unsupported policy type.
+        """
         if isinstance(policy, VehiclePolicy):
-            return self._calculate_vehicle_premium(policy)
+            product, evaluate = "vehicle", self._evaluate_vehicle
         elif isinstance(policy, HousePolicy):
-            return self._calculate_home_premium(policy)
+            product, evaluate = "house", self._evaluate_home
         else:
             raise ValueError("Unsupported policy type.")
+        if self.metrics is None:
+            return evaluate(policy)
+        return self.metrics.record_quote(product, evaluate, policy)
+
+    def calculate_premiums(self, batch: "PolicyBatch") -> "BatchResult":
+        """
+        Vectorized version of calculate_premium for a VehicleBatch or a HouseBatch.
+        Rejections are returned as RuleCode values instead of raising.
+        """
+        from .batch import VehicleBatch, calculate_premiums
+
+        if self.metrics is None:
+            return calculate_premiums(batch, self.base_rate, self.pricing_date(), self.rate_table)
+        started = self.metrics.clock()
+        result = calculate_premiums(batch, self.base_rate, self.pricing_date(), self.rate_table)
+        product = "vehicle" if isinstance(batch, VehicleBatch) else "house"
+        self.metrics.record_batch(product, result.rejections, self.metrics.clock() - started)
+        return result
+
+    @property
+    def rate_version(self) -> str | None:
+        """
+        Version of the rate table, None when pricing from base_rate.
+        """
+        return self.rate_table.version if self.rate_table is not None else None
+
+    def _evaluate_vehicle(self, policy: VehiclePolicy) -> QuoteResult:
+        metrics = self.metrics
+        started = metrics.clock() if metrics is not None else None
 
-    def _calculate_vehicle_premium(self, policy: VehiclePolicy) -> float:
         # Underwriting rules        
         
         ## Older than 15 years are not insurable
-        if self._get_age(policy.age) > 15:
-            raise CarToOldException()                    
+        age = self._get_age(policy.age)
+        if metrics is not None:
+            started = metrics.check(RuleCode.CAR_TOO_OLD, age > 15, started)
+        if age > 15:
+            return QuoteResult.rejected(RuleCode.CAR_TOO_OLD)
         
         ## Check for demolition derby drivers (more than 2 at-fault accidents in the last 5 years)
-        five_years_ago = date.today() - timedelta(days=5 * 365)
-        at_fault_accidents_5yr = 0
-        for accident in policy.accident_history:
-            if accident.date >= five_years_ago and accident.at_fault:
-                at_fault_accidents_5yr += 1
+        five_years_ago, three_years_ago = self._window_cutoffs()
+        at_fault_accidents_5yr = policy.accident_history.count_since(five_years_ago, at_fault_only=True)
+        if metrics is not None:
+            started = metrics.check(RuleCode.DEMOLITION_DERBY, at_fault_accidents_5yr > 2, started)
         if at_fault_accidents_5yr > 2:
-            raise CarDemotionDerbyException()                
+            return QuoteResult.rejected(RuleCode.DEMOLITION_DERBY)
         
         # Bonus-Malus        
+        recent_accidents = policy.accident_history.count_since(three_years_ago)
+        if self.rate_table is not None:
+            premium = self.rate_table.vehicle_premium(age, recent_accidents)
+        else:
+            ## classic cars come with a price tag of 5% more     
+            age_factor = max(0, (age - 5) * 0.05)
+            
+            ## Calculate accident_factor based on accidents in the last 3 years
+            accident_factor = recent_accidents * 0.20  # Apply a 20% crash course fee for each accident in the last 3 years         
+            premium = self.base_rate * (1 + age_factor + accident_factor)
+
+        if metrics is not None:
+            metrics.priced(started)
+        return QuoteResult.priced(premium)
         
-        ## classic cars come with a price tag of 5% more     
-        age_factor = max(0, (self._get_age(policy.age) - 5) * 0.05)
-        
-        ## Calculate accident_factor based on accidents in the last 3 years
-        three_years_ago = date.today() - timedelta(days=3*365)  # Approx 3 years
-        recent_accidents = 0
-        for accident in policy.accident_history:
-            if accident.date >= three_years_ago:
-                recent_accidents += 1
-        accident_factor = recent_accidents * 0.20  # Apply a 20% crash course fee for each accident in the last 3 years         
-        
-        return self.base_rate * (1 + age_factor + accident_factor)
-        
-    def _calculate_home_premium(self, policy: HousePolicy) -> float:
+    def _evaluate_home(self, policy: HousePolicy) -> QuoteResult:
+        metrics = self.metrics
+        started = metrics.clock() if metrics is not None else None
+
         # Discard houses with more than 5 parrots        
+        if metrics is not None:
+            started = metrics.check(RuleCode.TOO_MANY_PARROTS, policy.n_parrots > 5, started)
         if policy.n_parrots > 5:
-            raise TooManyParrotsException()
+            return QuoteResult.rejected(RuleCode.TOO_MANY_PARROTS)
         
         # Discard properties with more broken windows than intact ones.
+        windows_rule = None
         if "broken" in policy.windows and "intact" in policy.windows: 
             if policy.windows["broken"] > policy.windows["intact"]:
-                raise BrokenWindowsException("More broken windows than intact windows")                        
+                windows_rule = RuleCode.BROKEN_WINDOWS
         elif "broken" in policy.windows:
             if policy.windows["broken"] > 0:
-                raise BrokenWindowsException("More broken windows than intact windows")        
+                windows_rule = RuleCode.BROKEN_WINDOWS
         else:
-            raise ValueError("Windows dictionary should have keys 'intact' and/or 'broken'")
+            windows_rule = RuleCode.INVALID_WINDOWS
+        if metrics is not None:
+            started = metrics.check(windows_rule or RuleCode.BROKEN_WINDOWS, windows_rule is not None, started)
+        if windows_rule is not None:
+            return QuoteResult.rejected(windows_rule)
 
         # Bonus-Malus
-        
-        ## Boost 15% for houses in medium-risk
-        flood_factor = 0
-        if policy.flood_risk in ("HIGH","MEDIUM"): 
-            flood_factor = 0.15     
-        
-        ## 10% surcharge if the house is older than 20 years
-        age_factor = 0
-        if self._get_age(policy.age) > 20:
-            age_factor = 0.10        
-        
-        return self.base_rate * (1 + age_factor + flood_factor)
+        if self.rate_table is not None:
+            premium = self.rate_table.house_premium(self._get_age(policy.age), policy.flood_risk)
+        else:
+            ## Boost 15% for houses in medium-risk
+            flood_factor = 0
+            if policy.flood_risk in ("HIGH","MEDIUM"): 
+                flood_factor = 0.15     
+            
+            ## 10% surcharge if the house is older than 20 years
+            age_factor = 0
+            if self._get_age(policy.age) > 20:
+                age_factor = 0.10        
+            premium = self.base_rate * (1 + age_factor + flood_factor)
+
+        if metrics is not None:
+            metrics.priced(started)
+        return QuoteResult.priced(premium)
     
+    def pricing_date(self) -> date:
+        """
+        Date the accident windows are relative to.
+        """
+        return self.as_of if self.as_of is not None else date.today()
+
+    def _window_cutoffs(self) -> tuple[int, int]:
+        """
+        First day ordinals of the 5 years (at-fault) and 3 years (recent accidents) windows,
+        only recomputed when the pricing date changes.
+        """
+        today = self.pricing_date()
+        if self._cutoffs_for != today:
+            self._cutoffs = ((today - timedelta(days=5 * 365)).toordinal(),
+                             (today - timedelta(days=3 * 365)).toordinal())  # Approx 3 years
+            self._cutoffs_for = today
+        return self._cutoffs
+
     def _get_age(self, age: str) -> int:            
         """
         Get int part of age attribute.
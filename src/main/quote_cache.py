@@ -0,0 +1,176 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from .policies.base_policy import Policy
+from .policies.vehicle_policy import VehiclePolicy
+from .policies.house_policy import HousePolicy
+from .premium_calculator import PremiumCalculator, rule_exception
+from .rules import QuoteResult, RuleCode
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters of a QuoteCache.
+    Attributes:
+        hits (int): lookups answered from memory.
+        disk_hits (int): lookups answered from the SQLite tier (not counted in hits).
+        misses (int): lookups that had to be priced.
+        evictions (int): entries dropped from memory by the LRU policy.
+        invalidations (int): times the cache was invalidated because the pricing date changed.
+        expired (int): SQLite rows deleted by expire because they were older than the ttl.
+    """
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    expired: int = 0
+
+
+def policy_key(policy: Policy, base_rate: float, pricing_date: date, rate_digest: str | None = None) -> str:
+    """
+    Content hash of the normalized policy fields, the base rate, the pricing date and
+    the RateTable.digest (when pricing from a rate table). Not its version: two tables
+    can share a version string but never a digest.
+    Two policies with the same key always get the same quote.
+    """
+    if isinstance(policy, VehiclePolicy):
+        fields = ["vehicle", int(policy.age.split()[0]),
+                  sorted(zip(policy.accident_history.ordinals, map(bool, policy.accident_history.at_fault)))]
+    elif isinstance(policy, HousePolicy):
+        fields = ["house", int(policy.age.split()[0]), policy.flood_risk, policy.n_parrots,
+                  sorted(policy.windows.items())]
+    else:
+        raise ValueError("Unsupported policy type.")
+    parts = [fields, base_rate, pricing_date.toordinal()] + ([rate_digest] if rate_digest is not None else [])
+    canonical = json.dumps(parts, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class QuoteCache:
+    """
+    Memoizes PremiumCalculator.evaluate: an in memory LRU in front of an optional
+    SQLite file that several worker processes can share.
+    The accident windows depend on the pricing date, so keys include it and the in
+    memory entries are dropped the first time a new pricing date is seen. The shared
+    rows of every pricing date stay valid (other workers may still price as of an
+    earlier date), they are only deleted once they are older than ttl seconds.
+    """
+
+    def __init__(self, calculator: PremiumCalculator, max_entries: int = 100_000, path: str | None = None,
+                 ttl: float | None = None):
+        """
+        Args:
+            calculator: calculator used on misses.
+            max_entries: in memory entries before the least recently used ones are evicted.
+            path: SQLite file of the shared on-disk tier, memory only when None.
+            ttl: seconds after which a shared row is deleted by expire (which also runs
+                when the pricing date changes), rows are kept forever when None.
+        """
+        self.calculator = calculator
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._pricing_date = None
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS quotes ("
+                "key TEXT PRIMARY KEY, pricing_date INTEGER, accepted INTEGER, rule INTEGER, premium REAL, "
+                "stored_at REAL)"
+            )
+
+    def evaluate(self, policy: Policy) -> QuoteResult:
+        """
+        Cached PremiumCalculator.evaluate.
+        """
+        pricing_date = self.calculator.pricing_date()
+        if pricing_date != self._pricing_date:
+            self._invalidate(pricing_date)
+        rate_table = self.calculator.rate_table
+        key = policy_key(policy, self.calculator.base_rate, pricing_date,
+                         rate_table.digest if rate_table is not None else None)
+
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return result
+
+        result = self._load(key)
+        if result is not None:
+            self.stats.disk_hits += 1
+        else:
+            self.stats.misses += 1
+            result = self.calculator.evaluate(policy)
+            self._store(key, pricing_date, result)
+        self._remember(key, result)
+        return result
+
+    def calculate_premium(self, policy: Policy) -> float:
+        """
+        Cached PremiumCalculator.calculate_premium, raises the same exceptions.
+        """
+        result = self.evaluate(policy)
+        if not result.accepted:
+            raise rule_exception(result.rule)
+        return result.premium
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, result: QuoteResult):
+        self._entries[key] = result
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def expire(self, now: float | None = None) -> int:
+        """
+        Deletes the shared rows stored more than ttl seconds before now (time.time() when None).
+        Returns:
+            number of deleted rows.
+        """
+        if self._db is None or self.ttl is None:
+            return 0
+        now = time.time() if now is None else now
+        deleted = self._db.execute("DELETE FROM quotes WHERE stored_at < ?", (now - self.ttl,)).rowcount
+        self.stats.expired += deleted
+        return deleted
+
+    def _invalidate(self, pricing_date: date):
+        if self._pricing_date is not None:
+            self.stats.invalidations += 1
+        self._entries.clear()
+        self._pricing_date = pricing_date
+        self.expire()
+
+    def _load(self, key: str) -> QuoteResult | None:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT accepted, rule, premium FROM quotes WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        accepted, rule, premium = row
+        return QuoteResult(bool(accepted), RuleCode(rule), premium)
+
+    def _store(self, key: str, pricing_date: date, result: QuoteResult):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?, ?, ?)",
+            (key, pricing_date.toordinal(), int(result.accepted), int(result.rule), result.premium, time.time()),
+        )
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import random
+import time
+from argparse import ArgumentParser
+from typing import Any
+from .quote_server import percentile, read_http_message
+
+
+SAMPLE_RECORDS = [
+    {"product_type": "vehicle", "age": "16 years", "accident_history": [{"date": "2023-04-23", "at_fault": False}]},
+    {"product_type": "vehicle", "age": "6 years", "accident_history": [
+        {"date": "2022-07-20", "at_fault": False}, {"date": "2023-04-23", "at_fault": True},
+        {"date": "2024-01-12", "at_fault": False}]},
+    {"product_type": "vehicle", "age": "3 years", "accident_history": []},
+    {"product_type": "house", "age": "52 years", "flood_risk": "LOW", "n_parrots": 0,
+     "windows": {"intact": 2, "broken": 3}},
+    {"product_type": "house", "age": "25 years", "flood_risk": "MEDIUM", "n_parrots": 1,
+     "windows": {"intact": 4, "broken": 1}},
+]
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                  body: dict[str, Any] | None = None) -> dict[str, Any]:
+    """
+    Sends one request on a keep-alive connection and returns the decoded JSON response.
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: quote\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(payload)}\r\n\r\n").encode() + payload)
+    await writer.drain()
+    message = await read_http_message(reader)
+    if message is None:
+        raise ConnectionError("Connection closed by the quote server")
+    return json.loads(message[2])
+
+
+async def load_test(host: str, port: int, n_requests: int = 10_000, concurrency: int = 64,
+                    seed: int = 0) -> dict[str, Any]:
+    """
+    Sends n_requests quotes over `concurrency` keep-alive connections.
+    Returns:
+        client side throughput and latency percentiles plus the server /stats.
+    """
+    rng = random.Random(seed)
+    records = [dict(rng.choice(SAMPLE_RECORDS), request_id=i) for i in range(n_requests)]
+    latencies = []
+
+    async def worker(chunk):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for record in chunk:
+                started = time.perf_counter()
+                await request(reader, writer, "POST", "/quote", record)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(records[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    server_stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+    return {
+        "requests": n_requests,
+        "elapsed_s": elapsed,
+        "throughput_rps": n_requests / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {"p50": percentile(latencies, 50) * 1000, "p99": percentile(latencies, 99) * 1000},
+        "server": server_stats,
+    }
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/, with main.quote_server running):
+    python3 -m main.quote_client --requests 20000 --concurrency 128
+    """
+    parser = ArgumentParser(description="Quote server load test client")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    arguments = parser.parse_args()
+
+    report = asyncio.run(load_test(arguments.host, arguments.port, arguments.requests, arguments.concurrency))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from argparse import ArgumentParser
+from typing import Any
+from .daemon_client import default_socket_path
+from .metrics import CalculatorMetrics, StatsDumper
+from .quoting import RATES, instrument, quote
+
+
+# Priced once at start up so the first client does not pay for the lazy initialization
+# (calculator cache, rate table lookups)
+WARM_UP_QUOTE = ("vehicle", {"age": "3 years", "accident_history": []})
+
+
+class QuoteDaemon:
+    """
+    Warm quote worker behind a local Unix socket, for callers that would otherwise start
+    a Python process per quote (see main.daemon_client and app.py).
+    Protocol: one JSON object per line in each direction. {"product_type": "vehicle",
+    "payload": {...}} returns the main.quoting.quote result, {"command": "stats"} the
+    daemon counters. Connections may send any number of requests.
+    """
+
+    def __init__(self, path: str | None = None):
+        """
+        Args:
+            path: socket file, main.daemon_client.default_socket_path() when None.
+        """
+        self.path = path or default_socket_path()
+        self.requests = 0
+        self.connections = 0
+        self.started = None
+        self._server = None
+
+    async def start(self):
+        """
+        Raises:
+            RuntimeError: another daemon is already listening on path.
+        """
+        self._remove_stale_socket()
+        quote(*WARM_UP_QUOTE)
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+        os.chmod(self.path, 0o600)
+        self.started = time.time()
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def serve_forever(self):
+        """
+        Serves until SIGINT or SIGTERM, then removes the socket file.
+        """
+        await self.start()
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, stopping.set)
+        try:
+            await stopping.wait()
+        finally:
+            await self.stop()
+
+    def stats(self) -> dict[str, Any]:
+        return {"requests": self.requests, "connections": self.connections, "pid": os.getpid(),
+                "uptime_seconds": time.time() - self.started if self.started else 0.0,
+                "rate_version": RATES.current.version}
+
+    def reply(self, line: bytes) -> dict[str, Any]:
+        """
+        Answer to one request line.
+        """
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {"outcome": "ERROR", "premium": None, "rule": None,
+                    "message": f"Error processing quote: invalid JSON ({e})", "rate_version": None}
+        if message.get("command") == "stats":
+            return self.stats()
+        self.requests += 1
+        return quote(message.get("product_type"), message.get("payload"))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while line := await reader.readline():
+                writer.write(json.dumps(self.reply(line)).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a daemon that did not stop cleanly
+                os.unlink(self.path)
+                return
+        raise RuntimeError(f"A quote daemon is already listening on {self.path}")
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.quote_daemon &
+    python3 app.py vehicle '{"age": "6 years", "accident_history": []}'   # forwarded to the daemon
+    python3 -m main.quote_daemon --socket /run/quotes/quote.sock --rates rates.json --reload-interval 5
+    """
+    parser = ArgumentParser(description="Warm quote worker on a Unix socket")
+    parser.add_argument("--socket", metavar="PATH", default=None,
+                        help="socket file (default $PREMIUM_QUOTE_SOCKET or premium-quote-<uid>.sock in the "
+                             "temporary directory)")
+    parser.add_argument("--rates", metavar="FILE", help="rate table file (JSON), built-in rates when omitted")
+    parser.add_argument("--reload-interval", type=float, default=1.0, help="seconds between rate table file checks")
+    parser.add_argument("--metrics", metavar="FILE", help="write pricing metrics (Prometheus text format) to FILE")
+    parser.add_argument("--metrics-interval", type=float, default=15.0, help="seconds between --metrics dumps")
+    arguments = parser.parse_args()
+
+    if arguments.rates is not None:
+        RATES.load(arguments.rates)
+        RATES.watch(arguments.reload_interval)
+
+    dumper = None
+    if arguments.metrics is not None:
+        metrics = CalculatorMetrics()
+        instrument(metrics)
+        dumper = StatsDumper(metrics, arguments.metrics, arguments.metrics_interval)
+        dumper.start()
+
+    try:
+        asyncio.run(QuoteDaemon(arguments.socket).serve_forever())
+    finally:
+        if dumper is not None:
+            dumper.stop()
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import math
+import time
+from argparse import ArgumentParser
+from collections import deque
+from typing import Any, Callable
+from .metrics import CalculatorMetrics, StatsDumper
+from .quoting import RATES, instrument, quote_many
+
+
+def percentile(values, q: float) -> float | None:
+    """
+    Nearest-rank percentile (q in [0, 100]) of the values, None when empty.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent quote requests and prices them together: a batch is flushed
+    when it reaches max_batch_size requests or when its oldest request has waited
+    max_wait seconds, whichever comes first.
+    """
+
+    def __init__(self, price_batch: Callable[[list], list] = quote_many, max_batch_size: int = 256,
+                 max_wait: float = 0.002, latency_window: int = 10_000):
+        """
+        Args:
+            price_batch: prices a list of (product_type, payload) requests in one call.
+            max_batch_size: largest batch sent to price_batch.
+            max_wait: seconds a request may wait for the batch to fill.
+            latency_window: number of recent latencies kept for the percentiles.
+        """
+        self.price_batch = price_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, product_type: str, payload: dict[str, Any]) -> dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((product_type, payload), future, time.perf_counter()))
+        return await future
+
+    def stats(self) -> dict[str, Any]:
+        p50, p99 = percentile(self._latencies, 50), percentile(self._latencies, 99)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "latency_ms": {"p50": p50 and p50 * 1000, "p99": p99 and p99 * 1000},
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = self.price_batch([request for request, _, _ in batch])
+            except Exception as ex:
+                results = [{"outcome": "ERROR", "premium": None, "rule": None,
+                            "message": f"Unexpected error: {ex}", "rate_version": None}] * len(batch)
+            finished = time.perf_counter()
+            for (_, future, enqueued), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+                self._latencies.append(finished - enqueued)
+            self.requests += len(batch)
+            self.batches += 1
+
+
+async def read_http_message(reader: asyncio.StreamReader) -> tuple[str, dict[str, str], bytes] | None:
+    """
+    Reads one HTTP/1.1 message (request or response).
+    Returns:
+        (start line, lower-cased headers, body), None when the connection was closed.
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return start_line.decode("latin-1").strip(), headers, body
+
+
+def http_response(status: str, body: dict[str, Any]) -> bytes:
+    payload = json.dumps(body).encode()
+    return (f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n").encode() + payload
+
+
+class QuoteServer:
+    """
+    Minimal HTTP/JSON quote server (stdlib only).
+    POST /quote with a JSON record such as {"product_type": "vehicle", "age": "3 years", ...}
+    (the same records as app.py --stream) returns the main.quoting.quote result.
+    GET /stats returns the batcher counters, queue depth and p50/p99 latency.
+    """
+
+    def __init__(self, batcher: MicroBatcher, host: str = "127.0.0.1", port: int = 8080):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                message = await read_http_message(reader)
+                if message is None:
+                    break
+                start_line, headers, body = message
+                writer.write(await self._route(start_line, body))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, start_line: str, body: bytes) -> bytes:
+        method, path, *_ = start_line.split() + ["", ""]
+        if method == "GET" and path == "/stats":
+            return http_response("200 OK", self.batcher.stats())
+        if method != "POST" or path != "/quote":
+            return http_response("404 Not Found", {"message": f"Unknown route {method} {path}"})
+        try:
+            record = json.loads(body)
+            if not isinstance(record, dict):
+                raise ValueError("record must be a JSON object")
+        except ValueError as e:
+            return http_response("400 Bad Request", {"message": f"Error processing quote: invalid JSON ({e})"})
+        request_id = record.pop("request_id", None)
+        product_type = record.pop("product_type", None)
+        result = await self.batcher.submit(product_type, record)
+        return http_response("200 OK", {"request_id": request_id, "product_type": product_type, **result})
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.quote_server --port 8080 --max-batch-size 256 --max-wait-ms 2
+    python3 -m main.quote_server --rates rates.json --reload-interval 5
+    python3 -m main.quote_server --metrics /var/lib/node_exporter/textfile/quotes.prom --metrics-interval 15
+    """
+    parser = ArgumentParser(description="Asyncio quote server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--rates", metavar="FILE", help="rate table file (JSON), built-in rates when omitted")
+    parser.add_argument("--reload-interval", type=float, default=1.0, help="seconds between rate table file checks")
+    parser.add_argument("--metrics", metavar="FILE", help="write pricing metrics (Prometheus text format) to FILE")
+    parser.add_argument("--metrics-interval", type=float, default=15.0, help="seconds between --metrics dumps")
+    arguments = parser.parse_args()
+
+    if arguments.rates is not None:
+        RATES.load(arguments.rates)
+        RATES.watch(arguments.reload_interval)
+
+    dumper = None
+    if arguments.metrics is not None:
+        metrics = CalculatorMetrics()
+        instrument(metrics)
+        dumper = StatsDumper(metrics, arguments.metrics, arguments.metrics_interval)
+        dumper.start()
+
+    batcher = MicroBatcher(max_batch_size=arguments.max_batch_size, max_wait=arguments.max_wait_ms / 1000)
+    server = QuoteServer(batcher, arguments.host, arguments.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if dumper is not None:
+            dumper.stop()
@@ -0,0 +1,149 @@
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+from .policies.base_policy import Policy
+from .policies.vehicle_policy import VehiclePolicy
+from .policies.house_policy import HousePolicy
+from .premium_calculator import INVALID_WINDOWS_MESSAGE, PremiumCalculator
+from .rate_tables import DEFAULT_RATE_TABLE, RateTable, RateTableStore
+from .rules import RuleCode
+
+if TYPE_CHECKING:
+    from .metrics import CalculatorMetrics
+
+
+BASE_RATES = {product_type: DEFAULT_RATE_TABLE.base_rate(product_type) for product_type in ("vehicle", "house")}
+
+BLOCKED_MESSAGE = "Blocked by UW Rules"
+
+# Rate table used by quote and quote_many, RATES.load(path) / RATES.watch() to price from a file
+RATES = RateTableStore()
+
+# Set with instrument()
+METRICS = None
+
+
+def instrument(metrics: "CalculatorMetrics | None"):
+    """
+    Records the validation and pricing metrics of quote and quote_many in metrics
+    (None switches the instrumentation off again).
+    """
+    global METRICS
+    METRICS = metrics
+
+
+@lru_cache(maxsize=4)
+def _calculator(rate_table: RateTable, metrics: "CalculatorMetrics | None") -> PremiumCalculator:
+    return PremiumCalculator(rate_table=rate_table, metrics=metrics)
+
+
+def pricing_date() -> date:
+    """
+    Date quote and quote_many price as of, the accident windows are relative to it.
+    """
+    return _calculator(RATES.current, METRICS).pricing_date()
+
+
+def _build(product_type: str, payload: dict[str, Any], metrics: "CalculatorMetrics | None") -> Policy:
+    if metrics is None:
+        return build_policy(product_type, payload)
+    return metrics.timed("validate", build_policy, product_type, payload)
+
+
+def build_policy(product_type: str, payload: dict[str, Any]) -> Policy:
+    """
+    Creates (and validates) the policy of a quote request.
+    Raises:
+        ValueError: unknown product type.
+    """
+    if product_type == "vehicle":
+        return VehiclePolicy(
+            age=payload["age"],
+            policy_type=Policy.DEFAULT_POLICY,
+            accident_history=payload["accident_history"],
+        )
+    elif product_type == "house":
+        return HousePolicy(
+            age=payload["age"],
+            policy_type="house",
+            flood_risk=payload["flood_risk"],
+            n_parrots=payload["n_parrots"],
+            windows=payload["windows"],
+        )
+    raise ValueError("No more insurance types, please select 'vehicle' or 'house'")
+
+
+def quote(product_type: str, payload: dict[str, Any]) -> dict[str, Any]:
+    """
+    Processes a quote request and calculates the premium.
+    Args:
+        product_type: The type of insurance policy ("vehicle" or "house").
+        payload: A dictionary containing the policy details.
+    Returns:
+        A dictionary with the outcome ("OK", "BLOCKED" or "ERROR"), the premium
+        (None unless the outcome is "OK"), the blocking rule name, a human readable message
+        and the version of the rate table that priced it (None when it was not priced).
+    """
+    if product_type not in BASE_RATES:
+        return _result("ERROR", None, "Error: No more insurance types, please select 'vehicle' or 'house'")
+
+    rate_table, metrics = RATES.current, METRICS
+    try:
+        policy = _build(product_type, payload, metrics)
+        result = _calculator(rate_table, metrics).evaluate(policy)
+    except (ValueError, KeyError, TypeError) as e:
+        return _result("ERROR", None, f"Error processing quote: {e}")
+    except Exception as ex:
+        return _result("ERROR", None, f"Unexpected error: {ex}")
+
+    return _outcome(product_type, result.rule, result.premium, rate_table.version)
+
+
+def quote_many(requests: list[tuple[str, dict[str, Any]]]) -> list[dict[str, Any]]:
+    """
+    Same as calling quote for every (product_type, payload) request, but the valid
+    policies of each product type are priced together with one vectorized call.
+    The whole list is priced with the same rate table.
+    """
+    from .batch import HouseBatch, VehicleBatch
+
+    rate_table, metrics = RATES.current, METRICS
+    results = [None] * len(requests)
+    pending = {product_type: ([], []) for product_type in BASE_RATES}
+    for position, (product_type, payload) in enumerate(requests):
+        if product_type not in BASE_RATES:
+            results[position] = quote(product_type, payload)
+            continue
+        try:
+            policy = _build(product_type, payload, metrics)
+        except (ValueError, KeyError, TypeError) as e:
+            results[position] = _result("ERROR", None, f"Error processing quote: {e}")
+            continue
+        except Exception as ex:
+            results[position] = _result("ERROR", None, f"Unexpected error: {ex}")
+            continue
+        pending[product_type][0].append(position)
+        pending[product_type][1].append(policy)
+
+    for product_type, batch_type in (("vehicle", VehicleBatch), ("house", HouseBatch)):
+        positions, policies = pending[product_type]
+        if not policies:
+            continue
+        priced = _calculator(rate_table, metrics).calculate_premiums(batch_type.from_policies(policies))
+        for position, rule, premium in zip(positions, priced.rejections.tolist(), priced.premiums.tolist()):
+            results[position] = _outcome(product_type, RuleCode(rule), premium, rate_table.version)
+    return results
+
+
+def _outcome(product_type: str, rule: RuleCode, premium: float | None, rate_version: str) -> dict[str, Any]:
+    if rule == RuleCode.ACCEPTED:
+        return _result("OK", premium, f"Premium for {product_type} policy: ${premium:.2f}", rate_version=rate_version)
+    elif rule == RuleCode.INVALID_WINDOWS:
+        return _result("ERROR", None, f"Error processing quote: {INVALID_WINDOWS_MESSAGE}", rate_version=rate_version)
+    return _result("BLOCKED", None, BLOCKED_MESSAGE, rule, rate_version)
+
+
+def _result(outcome: str, premium: float | None, message: str, rule: RuleCode | None = None,
+            rate_version: str | None = None) -> dict[str, Any]:
+    return {"outcome": outcome, "premium": premium,
+            "rule": rule.name if rule is not None else None, "message": message, "rate_version": rate_version}
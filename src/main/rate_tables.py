@@ -0,0 +1,246 @@
+import json
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import TYPE_CHECKING, Any
+from .policies.house_policy import FloodRisk
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is only imported by the vectorized lookups (vehicle_premiums, house_premiums):
+# compiling a table and pricing single quotes use the plain Python rows, so a process
+# quoting one policy never loads it. Same for hashlib, only needed by the digests.
+
+
+# Rates of PremiumCalculator, also the layout of a rate table file (JSON):
+# {"version": "2025-03", "vehicle": {...}, "house": {...}} with the keys below.
+DEFAULT_RATES = {
+    "version": "builtin",
+    "vehicle": {"base_rate": 500, "vintage_age": 5, "vintage_tax": 0.05, "crash_course_fee": 0.20},
+    "house": {"base_rate": 300, "retro_age": 20, "retro_surcharge": 0.10, "flood_boost": 0.15},
+}
+
+# Ages in years, they index the lookup tables
+AGE_RATES = {"vehicle": "vintage_age", "house": "retro_age"}
+
+# Cars older than 15 years are rejected before pricing, larger ages and accident
+# counts fall back to the arithmetic
+VEHICLE_AGE_TABLE_SIZE = 16
+ACCIDENT_TABLE_SIZE = 16
+
+
+@dataclass(frozen=True, eq=False)
+class RateTable:
+    """
+    Rates compiled into lookup tables of premium multipliers.
+    Attributes:
+        version (str): version recorded with every quote priced by this table.
+        rates (dict): the rates it was compiled from, see DEFAULT_RATES.
+        vehicle_rows (tuple): 1 + vintage tax + crash course fee, indexed by [age][recent accidents].
+        house_rows (tuple): 1 + retro surcharge + flood boost, indexed by
+            [min(age, retro_age + 1)][flood risk code].
+    """
+    version: str
+    rates: dict[str, dict[str, float]]
+    vehicle_rows: tuple[tuple[float, ...], ...] = field(repr=False)
+    house_rows: tuple[tuple[float, ...], ...] = field(repr=False)
+
+    @classmethod
+    def compile(cls, rates: dict[str, Any]) -> "RateTable":
+        """
+        Validates a rate table specification (see DEFAULT_RATES) and precomputes its arrays.
+        Raises:
+            ValueError: missing version or rates, or an age that is not a non-negative integer.
+        """
+        version = rates.get("version")
+        if not isinstance(version, str) or not version:
+            raise ValueError("Rate table must have a non-empty string version")
+        specs = {}
+        for product, defaults in DEFAULT_RATES.items():
+            if product == "version":
+                continue
+            spec = rates.get(product)
+            if not isinstance(spec, dict) or set(spec) != set(defaults):
+                raise ValueError(f"Rate table '{product}' rates must have the keys {sorted(defaults)}")
+            if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in spec.values()):
+                raise ValueError(f"Rate table '{product}' rates must be numbers")
+            age = spec[AGE_RATES[product]]
+            if not isinstance(age, int) or age < 0:
+                raise ValueError(f"Rate table '{product}' {AGE_RATES[product]} must be a non-negative integer")
+            specs[product] = dict(spec)
+
+        vehicle, house = specs["vehicle"], specs["house"]
+        # Same expressions as PremiumCalculator so the premiums are bit for bit identical
+        vehicle_rows = tuple(
+            tuple(float(1 + max(0, (age - vehicle["vintage_age"]) * vehicle["vintage_tax"])
+                        + accidents * vehicle["crash_course_fee"])
+                  for accidents in range(ACCIDENT_TABLE_SIZE))
+            for age in range(VEHICLE_AGE_TABLE_SIZE)
+        )
+        house_rows = tuple(
+            tuple(float(1 + (house["retro_surcharge"] if age > house["retro_age"] else 0)
+                        + (house["flood_boost"] if risk >= FloodRisk.MEDIUM else 0)) for risk in FloodRisk)
+            for age in range(house["retro_age"] + 2)
+        )
+        return cls(version, specs, vehicle_rows, house_rows)
+
+    @cached_property
+    def digest(self) -> str:
+        """
+        Content hash of the version and rates: unlike the version, two tables with
+        different rates never share it, so caches of priced quotes are keyed by it.
+        """
+        import hashlib
+
+        canonical = json.dumps({"version": self.version, **self.rates}, sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+    @cached_property
+    def vehicle_multipliers(self) -> "np.ndarray":
+        """
+        vehicle_rows as an array, built on first use.
+        """
+        import numpy as np
+
+        return np.array(self.vehicle_rows)
+
+    @cached_property
+    def house_multipliers(self) -> "np.ndarray":
+        """
+        house_rows as an array, built on first use.
+        """
+        import numpy as np
+
+        return np.array(self.house_rows)
+
+    def base_rate(self, product_type: str) -> float:
+        return self.rates[product_type]["base_rate"]
+
+    def vehicle_premium(self, age: int, recent_accidents: int) -> float:
+        if age < VEHICLE_AGE_TABLE_SIZE and recent_accidents < ACCIDENT_TABLE_SIZE:
+            multiplier = self.vehicle_rows[age][recent_accidents]
+        else:
+            vehicle = self.rates["vehicle"]
+            multiplier = float(1 + max(0, (age - vehicle["vintage_age"]) * vehicle["vintage_tax"])
+                               + recent_accidents * vehicle["crash_course_fee"])
+        return self.rates["vehicle"]["base_rate"] * multiplier
+
+    def vehicle_premiums(self, age: "np.ndarray", recent_accidents: "np.ndarray") -> "np.ndarray":
+        inside = (age < VEHICLE_AGE_TABLE_SIZE) & (recent_accidents < ACCIDENT_TABLE_SIZE)
+        if inside.all():
+            multipliers = self.vehicle_multipliers[age, recent_accidents]
+        else:
+            multipliers = self._vehicle_multiplier(age, recent_accidents)
+            multipliers[inside] = self.vehicle_multipliers[age[inside], recent_accidents[inside]]
+        return self.rates["vehicle"]["base_rate"] * multipliers
+
+    def house_premium(self, age: int, flood_risk: str) -> float:
+        row = min(age, len(self.house_rows) - 1)
+        return self.rates["house"]["base_rate"] * self.house_rows[row][FloodRisk[flood_risk]]
+
+    def house_premiums(self, age: "np.ndarray", flood_risk: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+
+        rows = np.minimum(age, len(self.house_rows) - 1)
+        return self.rates["house"]["base_rate"] * self.house_multipliers[rows, flood_risk]
+
+    def _vehicle_multiplier(self, age, recent_accidents):
+        import numpy as np
+
+        vehicle = self.rates["vehicle"]
+        return (1 + np.maximum(0, (age - vehicle["vintage_age"]) * vehicle["vintage_tax"])
+                + recent_accidents * vehicle["crash_course_fee"])
+
+
+DEFAULT_RATE_TABLE = RateTable.compile(DEFAULT_RATES)
+
+
+def load_rate_table(path: str) -> RateTable:
+    with open(path, encoding="utf-8") as source:
+        return RateTable.compile(json.load(source))
+
+
+class RateTableStore:
+    """
+    Current rate table of a long running process. Reloads compile the new table
+    before publishing it with a single reference assignment, so pricing never waits
+    and every quote or batch uses one consistent table (read current once).
+    """
+
+    def __init__(self, path: str | None = None):
+        """
+        Args:
+            path: rate table file, DEFAULT_RATE_TABLE when None.
+        """
+        self.path = None
+        self.current = DEFAULT_RATE_TABLE
+        self.last_error = None
+        self._signature = None
+        self._stop = threading.Event()
+        self._watcher = None
+        if path is not None:
+            self.load(path)
+
+    def load(self, path: str):
+        """
+        Switches to a rate table file.
+        Raises:
+            OSError, ValueError: the file cannot be read or is not a valid rate table.
+        """
+        content = self._read(path)
+        self.current = RateTable.compile(json.loads(content))
+        self.path, self._signature, self.last_error = path, self._hash(content), None
+
+    def reload(self) -> bool:
+        """
+        Loads the file again when its content changed, compared by hash: a rewrite within
+        the same modification time and size is seen, a touch without changes is not
+        published. An invalid file keeps the current table and is reported in last_error.
+        Returns:
+            True when a new table was published.
+        """
+        if self.path is None:
+            return False
+        try:
+            content = self._read(self.path)
+            signature = self._hash(content)
+            if signature == self._signature:
+                return False
+            table = RateTable.compile(json.loads(content))
+        except (OSError, ValueError) as e:
+            self.last_error = f"{self.path}: {e}"
+            return False
+        self.current, self._signature, self.last_error = table, signature, None
+        return True
+
+    def watch(self, interval: float = 1.0):
+        """
+        Polls the file for changes every interval seconds in a daemon thread.
+        """
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._poll, args=(interval,), name="rate-table-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _poll(self, interval: float):
+        while not self._stop.wait(interval):
+            self.reload()
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as source:
+            return source.read()
+
+    @staticmethod
+    def _hash(content: bytes) -> str:
+        import hashlib
+
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
@@ -0,0 +1,205 @@
+import glob
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import zlib
+from datetime import date
+from typing import Any, Iterator
+
+# Keys of every record, a segment line is one JSON object with these keys in this order
+RECORD_FIELDS = ("request_id", "product_type", "outcome", "premium", "rule", "rate_version", "pricing_date")
+
+# Reused by the writer thread, json.dumps builds a new encoder per call when given separators
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+class ResultSink:
+    """
+    Append-only store of quote outcomes for auditing. Records are buffered in memory
+    and handed to a background writer thread buffer_records at a time (or every
+    flush_interval seconds), which appends them to gzip (or plain) segment files named
+    <prefix>-<number>.ndjson[.gz], one JSON object per line (see RECORD_FIELDS). The
+    records are encoded by the writer thread. A segment is closed once it holds
+    segment_bytes bytes and the next number is opened; existing segments are never
+    reopened, a new sink continues after the highest number in the directory.
+    Pricing only waits for the disk when max_pending buffers are already queued.
+    """
+
+    def __init__(self, directory: str, prefix: str = "quotes", compress: bool = True,
+                 segment_bytes: int = 64 * 1024 * 1024, buffer_records: int = 10_000,
+                 flush_interval: float = 1.0, max_pending: int = 16):
+        """
+        Args:
+            directory: segment directory, created when missing.
+            prefix: segment file name prefix.
+            compress: gzip the segments.
+            segment_bytes: size (on disk) from which a segment is rotated.
+            buffer_records: records per hand off to the writer thread.
+            flush_interval: seconds after which a partial buffer is written anyway.
+            max_pending: buffers queued for the writer before append blocks.
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.compress = compress
+        self.segment_bytes = segment_bytes
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.segments = []
+        self.error = None
+        os.makedirs(directory, exist_ok=True)
+        self._number = max(segment_numbers(directory, prefix), default=0)
+        self._file = None
+        self._stream = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._run, name="result-sink-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, request_id: Any, product_type: str | None, result: dict[str, Any], pricing_date: date):
+        """
+        Records a main.quoting.quote result.
+        Raises:
+            OSError: the writer thread failed, see error.
+            ValueError: the sink is closed.
+        """
+        self._check()
+        record = (request_id, product_type, result["outcome"], result["premium"], result["rule"],
+                  result["rate_version"], pricing_date.isoformat())
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.buffer_records:
+                records, self._buffer = self._buffer, []
+                self._queue.put(records)
+
+    def flush(self):
+        """
+        Waits until every appended record is written and flushed to the segment file.
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._queue.put(records)
+        self._queue.join()
+        self._check()
+
+    def close(self):
+        if self._writer is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._close_segment()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _check(self):
+        if self._writer is None:
+            raise ValueError("Result sink is closed")
+        if self.error is not None:
+            raise OSError(f"Result sink writer failed: {self.error}")
+
+    def _run(self):
+        while True:
+            try:
+                records = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._write_partial()
+                continue
+            try:
+                if records is None:
+                    return
+                self._write(records)
+            finally:
+                self._queue.task_done()
+
+    def _write_partial(self):
+        """
+        Writes the partial buffer while holding the lock that orders the hand offs, and
+        only when no earlier buffer is still queued, so records keep the append order.
+        A busy lock (an append in progress, possibly blocked on the full queue) skips this
+        round rather than waiting for it.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self._buffer and self._queue.empty():
+                records, self._buffer = self._buffer, []
+                self._write(records)
+        finally:
+            self._lock.release()
+
+    def _write(self, records: list[tuple]):
+        if self.error is not None:
+            return
+        try:
+            if records:
+                if self._file is None:
+                    self._open_segment()
+                lines = "".join(_ENCODER.encode(dict(zip(RECORD_FIELDS, record))) + "\n" for record in records)
+                self._stream.write(lines.encode())
+                self.records += len(records)
+            if self._stream is not None:
+                self._stream.flush()
+                if self._file.tell() >= self.segment_bytes:
+                    self._close_segment()
+        except Exception as e:
+            self.error = e
+
+    def _open_segment(self):
+        self._number += 1
+        suffix = ".ndjson.gz" if self.compress else ".ndjson"
+        path = os.path.join(self.directory, f"{self.prefix}-{self._number:06d}{suffix}")
+        self._file = open(path, "xb")  # append-only: never overwrite a segment
+        self._stream = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=6) if self.compress else self._file
+        self.segments.append(path)
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+        self._file, self._stream = None, None
+
+
+def segment_numbers(directory: str, prefix: str = "quotes") -> list[int]:
+    pattern = re.compile(rf"{re.escape(prefix)}-(\d+)\.ndjson(\.gz)?$")
+    matches = (pattern.match(os.path.basename(path)) for path in glob.glob(os.path.join(directory, f"{prefix}-*")))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+
+def read_segments(directory: str, prefix: str = "quotes") -> Iterator[dict[str, Any]]:
+    """
+    Records of every segment, oldest first.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, f"{prefix}-*.ndjson*")))
+    for path in paths:
+        for line in _segment_lines(path):
+            yield json.loads(line)
+
+
+def _segment_lines(path: str) -> Iterator[bytes]:
+    """
+    Complete lines of a segment. The segment of a writer that crashed has no gzip
+    trailer and may end in a partial line: the flushed prefix is read and the rest
+    ignored, instead of failing like gzip.open with EOFError.
+    """
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16) if path.endswith(".gz") else None
+    pending = b""
+    with open(path, "rb") as segment:
+        while chunk := segment.read(1024 * 1024):
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            *lines, pending = (pending + chunk).split(b"\n")
+            yield from lines
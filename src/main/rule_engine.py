@@ -0,0 +1,286 @@
+import operator
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable
+import numpy as np
+from .batch import (AT_FAULT_WINDOW_DAYS, FLOOD_RISK_CODES, RECENT_ACCIDENTS_WINDOW_DAYS,
+                    BatchResult, HouseBatch, PolicyBatch, VehicleBatch, count_accidents)
+from .policies.base_policy import Policy
+from .policies.vehicle_policy import VehiclePolicy
+from .policies.house_policy import HousePolicy
+from .rules import QuoteResult, RuleCode
+
+
+# The underwriting and bonus-malus rules of PremiumCalculator expressed as data.
+# Rejection rules block a policy when "<feature> <op> <value>" holds. Factor rules add
+# either max(0, (<feature> - above) * per_unit) or rate (when "<feature> <op> <value>")
+# to the premium multiplier, in the order they are listed. A "pinned" rejection rule
+# (input validation, reported as an error rather than a block) keeps its position
+# when an adaptive engine reorders the others.
+VEHICLE_RULES = {
+    "product": "vehicle",
+    "reject": [
+        {"code": "CAR_TOO_OLD", "feature": "age", "op": ">", "value": 15},
+        {"code": "DEMOLITION_DERBY", "feature": "at_fault_5y", "op": ">", "value": 2},
+    ],
+    "factors": [
+        {"name": "vintage_tax", "feature": "age", "above": 5, "per_unit": 0.05},
+        {"name": "crash_course_fee", "feature": "accidents_3y", "per_unit": 0.20},
+    ],
+}
+
+HOUSE_RULES = {
+    "product": "house",
+    "reject": [
+        {"code": "TOO_MANY_PARROTS", "feature": "n_parrots", "op": ">", "value": 5},
+        {"code": "BROKEN_WINDOWS", "feature": "broken_excess", "op": ">", "value": 0},
+        {"code": "INVALID_WINDOWS", "feature": "has_broken", "op": "==", "value": 0, "pinned": True},
+    ],
+    "factors": [
+        {"name": "retro_surcharge", "feature": "age", "op": ">", "value": 20, "rate": 0.10},
+        {"name": "flood_boost", "feature": "flood_risk", "op": ">=", "value": FLOOD_RISK_CODES["MEDIUM"], "rate": 0.15},
+    ],
+}
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+             "==": operator.eq, "!=": operator.ne}
+
+
+@dataclass(frozen=True)
+class Feature:
+    """
+    A policy feature the rules can refer to.
+    Attributes:
+        cost (int): relative cost of computing it, used to order the rejection checks.
+        scalar (Callable): (policy, cutoffs) -> value.
+        batch (Callable): (batch, cutoffs) -> array of values.
+    """
+    cost: int
+    scalar: Callable[[Any, tuple[int, int]], Any]
+    batch: Callable[[Any, tuple[int, int]], np.ndarray]
+
+
+def _age(policy: Policy, cutoffs: tuple[int, int]) -> int:
+    return int(policy.age.split()[0])
+
+
+def _broken_excess(policy: HousePolicy, cutoffs: tuple[int, int]) -> int:
+    return policy.windows.get("broken", 0) - policy.windows.get("intact", 0)
+
+
+def _batch_broken_excess(batch: HouseBatch, cutoffs: tuple[int, int]) -> np.ndarray:
+    return batch.windows_broken - np.where(batch.has_intact, batch.windows_intact, 0)
+
+
+# cutoffs are the (at-fault window, recent accidents window) first day ordinals
+FEATURES = {
+    "vehicle": {
+        "age": Feature(1, _age, lambda b, c: b.age),
+        "at_fault_5y": Feature(3, lambda p, c: p.accident_history.count_since(c[0], at_fault_only=True),
+                               lambda b, c: count_accidents(b, c[0], at_fault_only=True)),
+        "accidents_3y": Feature(3, lambda p, c: p.accident_history.count_since(c[1]),
+                                lambda b, c: count_accidents(b, c[1])),
+    },
+    "house": {
+        "age": Feature(1, _age, lambda b, c: b.age),
+        "n_parrots": Feature(1, lambda p, c: p.n_parrots, lambda b, c: b.n_parrots),
+        "flood_risk": Feature(1, lambda p, c: FLOOD_RISK_CODES[p.flood_risk], lambda b, c: b.flood_risk),
+        "broken_excess": Feature(2, _broken_excess, _batch_broken_excess),
+        "has_broken": Feature(1, lambda p, c: int("broken" in p.windows), lambda b, c: b.has_broken.astype(np.int64)),
+    },
+}
+
+PRODUCT_TYPES = {"vehicle": (VehiclePolicy, VehicleBatch), "house": (HousePolicy, HouseBatch)}
+
+
+@dataclass
+class RejectRule:
+    """
+    Compiled rejection rule with its runtime statistics.
+    """
+    code: RuleCode
+    feature: str
+    test: Callable[[Any], Any]
+    cost: int
+    pinned: bool = False
+    evaluated: int = 0
+    hits: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.evaluated if self.evaluated else 0.0
+
+
+@dataclass(frozen=True)
+class FactorRule:
+    """
+    Compiled bonus-malus rule, apply maps a feature value to the factor and
+    apply_batch does the same for an array of values.
+    """
+    name: str
+    feature: str
+    apply: Callable[[Any], float]
+    apply_batch: Callable[[np.ndarray], np.ndarray]
+
+
+@dataclass
+class RuleEngine:
+    """
+    Compiles a rule set (see VEHICLE_RULES and HOUSE_RULES) once and evaluates
+    policies in a single pass: rejection checks short-circuit on the first hit and
+    features are only computed when a rule needs them.
+    When adaptive, the rejection checks are periodically reordered so the most
+    selective and cheapest rules run first. Acceptance and premiums never depend on
+    the order, but when a policy breaks several rules the reported RuleCode is the
+    first hit in the current order, not necessarily the one PremiumCalculator reports.
+    Pinned rules (INVALID_WINDOWS) are never moved, so a blocked policy is not
+    reported as an input error instead.
+    Attributes:
+        rules (dict): the rule set.
+        base_rate (float): base premium.
+        as_of (date | None): pricing date, today when None.
+        adaptive (bool): reorder the rejection checks from the collected hit rates.
+        reorder_every (int): evaluations between two reorders.
+    """
+    rules: dict
+    base_rate: float
+    as_of: date | None = None
+    adaptive: bool = True
+    reorder_every: int = 1024
+    reject_rules: list[RejectRule] = field(init=False)
+    factor_rules: list[FactorRule] = field(init=False)
+
+    def __post_init__(self):
+        product = self.rules["product"]
+        if product not in FEATURES:
+            raise ValueError(f"Unsupported product type in rules: {product}")
+        self._features = FEATURES[product]
+        self._policy_type, self._batch_type = PRODUCT_TYPES[product]
+        self.reject_rules = [self._compile_reject(spec) for spec in self.rules["reject"]]
+        self.factor_rules = [self._compile_factor(spec) for spec in self.rules["factors"]]
+        self._until_reorder = self.reorder_every
+        self._cutoffs_for = (None, None)
+
+    def evaluate(self, policy: Policy) -> QuoteResult:
+        """
+        Evaluates one policy, same contract as PremiumCalculator.evaluate.
+        """
+        if not isinstance(policy, self._policy_type):
+            raise ValueError("Unsupported policy type.")
+        cutoffs = self._cutoffs()
+        values = {}
+
+        def value(name):
+            if name not in values:
+                values[name] = self._features[name].scalar(policy, cutoffs)
+            return values[name]
+
+        rejected = None
+        for rule in self.reject_rules:
+            rule.evaluated += 1
+            if rule.test(value(rule.feature)):
+                rule.hits += 1
+                rejected = rule.code
+                break
+        self._tick(1)
+        if rejected is not None:
+            return QuoteResult.rejected(rejected)
+
+        multiplier = 1
+        for rule in self.factor_rules:
+            multiplier = multiplier + rule.apply(value(rule.feature))
+        return QuoteResult.priced(self.base_rate * multiplier)
+
+    def evaluate_batch(self, batch: PolicyBatch) -> BatchResult:
+        """
+        Vectorized evaluation: each rejection rule only looks at the rows no earlier
+        rule has rejected.
+        """
+        if not isinstance(batch, self._batch_type):
+            raise ValueError("Unsupported policy type.")
+        cutoffs = self._cutoffs()
+        values = {}
+
+        def column(name):
+            if name not in values:
+                values[name] = self._features[name].batch(batch, cutoffs)
+            return values[name]
+
+        rejections = np.zeros(len(batch), dtype=np.int8)
+        pending = np.arange(len(batch))
+        for rule in self.reject_rules:
+            if len(pending) == 0:
+                break
+            hits = np.asarray(rule.test(column(rule.feature)[pending]), dtype=bool)
+            rule.evaluated += len(pending)
+            rule.hits += int(hits.sum())
+            rejections[pending[hits]] = rule.code
+            pending = pending[~hits]
+        self._tick(len(batch))
+
+        multiplier = 1
+        for rule in self.factor_rules:
+            multiplier = multiplier + rule.apply_batch(column(rule.feature))
+        premiums = self.base_rate * np.broadcast_to(np.asarray(multiplier, dtype=np.float64), (len(batch),))
+        premiums = np.where(rejections == RuleCode.ACCEPTED, premiums, np.nan)
+        return BatchResult(premiums, rejections)
+
+    def stats(self) -> list[dict[str, Any]]:
+        """
+        Per rule counters, in the current evaluation order.
+        """
+        return [{"code": rule.code.name, "evaluated": rule.evaluated, "hits": rule.hits,
+                 "hit_rate": rule.hit_rate} for rule in self.reject_rules]
+
+    def reorder(self):
+        """
+        Sorts the rejection checks by hit rate per unit of cost, highest first.
+        Pinned checks stay where they are, the others are sorted around them.
+        """
+        movable = sorted((rule for rule in self.reject_rules if not rule.pinned),
+                         key=lambda rule: -rule.hit_rate / rule.cost)
+        moved = iter(movable)
+        self.reject_rules = [rule if rule.pinned else next(moved) for rule in self.reject_rules]
+
+    def _tick(self, evaluated: int):
+        if not self.adaptive:
+            return
+        self._until_reorder -= evaluated
+        if self._until_reorder <= 0:
+            self.reorder()
+            self._until_reorder = self.reorder_every
+
+    def _cutoffs(self) -> tuple[int, int]:
+        today = self.as_of if self.as_of is not None else date.today()
+        if self._cutoffs_for[0] != today:
+            ordinal = today.toordinal()
+            self._cutoffs_for = (today, (ordinal - AT_FAULT_WINDOW_DAYS, ordinal - RECENT_ACCIDENTS_WINDOW_DAYS))
+        return self._cutoffs_for[1]
+
+    def _check_feature(self, name: str):
+        if name not in self._features:
+            raise ValueError(f"Unknown feature '{name}' for {self.rules['product']} rules")
+
+    def _compile_reject(self, spec: dict) -> RejectRule:
+        self._check_feature(spec["feature"])
+        compare, threshold = OPERATORS[spec["op"]], spec["value"]
+        return RejectRule(
+            code=RuleCode[spec["code"]],
+            feature=spec["feature"],
+            test=lambda x: compare(x, threshold),
+            cost=self._features[spec["feature"]].cost,
+            pinned=spec.get("pinned", False),
+        )
+
+    def _compile_factor(self, spec: dict) -> FactorRule:
+        self._check_feature(spec["feature"])
+        if "per_unit" in spec:
+            above, per_unit = spec.get("above", 0), spec["per_unit"]
+            # Same arithmetic as PremiumCalculator, max(0, (age - 5) * 0.05)
+            apply = lambda x: max(0, (x - above) * per_unit)
+            apply_batch = lambda x: np.maximum(0, (x - above) * per_unit)
+        else:
+            compare, threshold, rate = OPERATORS[spec["op"]], spec["value"], spec["rate"]
+            apply = lambda x: rate if compare(x, threshold) else 0
+            apply_batch = lambda x: np.where(compare(x, threshold), rate, 0.0)
+        return FactorRule(spec["name"], spec["feature"], apply, apply_batch)
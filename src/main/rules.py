@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from enum import IntEnum
+
+
+class RuleCode(IntEnum):
+    """
+    Outcome codes of the underwriting rules.
+    ACCEPTED means no underwriting rule blocked the policy, any other value
+    names the first rule that did (in the same order PremiumCalculator checks them).
+    """
+    ACCEPTED = 0
+    CAR_TOO_OLD = 1
+    DEMOLITION_DERBY = 2
+    TOO_MANY_PARROTS = 3
+    BROKEN_WINDOWS = 4
+    INVALID_WINDOWS = 5  # Windows dictionary without 'broken' key, PremiumCalculator raises ValueError
+    INVALID_AGE = 6  # Null, negative or malformed age in the Spark jobs, policy validation raises ValueError
+
+
+@dataclass(frozen=True, slots=True)
+class QuoteResult:
+    """
+    Outcome of evaluating one policy without raising.
+    Attributes:
+        accepted (bool): False when an underwriting rule blocked the policy.
+        rule (RuleCode): the blocking rule, RuleCode.ACCEPTED for accepted policies.
+        premium (float | None): the premium, None for rejected policies.
+    """
+    accepted: bool
+    rule: RuleCode
+    premium: float | None = None
+
+    @classmethod
+    def priced(cls, premium: float) -> "QuoteResult":
+        return cls(True, RuleCode.ACCEPTED, premium)
+
+    @classmethod
+    def rejected(cls, rule: RuleCode) -> "QuoteResult":
+        return cls(False, rule, None)
@@ -0,0 +1,232 @@
+import itertools
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass, fields, replace
+from datetime import date
+from typing import Any, Sequence, Union
+import numpy as np
+from .batch import (AT_FAULT_WINDOW_DAYS, FLOOD_RISK_CODES, RECENT_ACCIDENTS_WINDOW_DAYS, HouseBatch, PolicyBatch,
+                    VehicleBatch, count_accidents)
+from .rules import RuleCode
+
+# Result layout: row s of the S x N matrices is scenarios[s] in the order given (scenario_grid
+# varies the last parameter fastest), column i is policy i of the batch. Accidents expire by
+# date: one counts towards max_at_fault while dated on or after as_of - AT_FAULT_WINDOW_DAYS
+# and towards the crash course fee while on or after as_of - RECENT_ACCIDENTS_WINDOW_DAYS,
+# the cutoffs of main.batch.calculate_premiums. No scenario parameter moves them, so the
+# counts are computed once per policy and only the parameters are broadcast.
+
+
+@dataclass(frozen=True)
+class VehicleScenario:
+    """
+    Vehicle rule parameters, the defaults are the PremiumCalculator rules.
+    Attributes:
+        name (str): scenario label.
+        base_rate (float): base premium.
+        max_age (int): older cars are rejected (CAR_TOO_OLD).
+        max_at_fault (int): more at-fault accidents in 5 years are rejected (DEMOLITION_DERBY).
+        vintage_age (int): age from which the vintage tax applies.
+        vintage_tax (float): surcharge per year above vintage_age.
+        crash_course_fee (float): surcharge per accident in the last 3 years.
+    """
+    name: str = "baseline"
+    base_rate: float = 500
+    max_age: int = 15
+    max_at_fault: int = 2
+    vintage_age: int = 5
+    vintage_tax: float = 0.05
+    crash_course_fee: float = 0.20
+
+
+@dataclass(frozen=True)
+class HouseScenario:
+    """
+    House rule parameters, the defaults are the PremiumCalculator rules.
+    Attributes:
+        name (str): scenario label.
+        base_rate (float): base premium.
+        max_parrots (int): more parrots are rejected (TOO_MANY_PARROTS).
+        retro_age (int): houses older than this pay the retro surcharge.
+        retro_surcharge (float): surcharge of old houses.
+        flood_boost (float): surcharge of MEDIUM and HIGH flood risks.
+    """
+    name: str = "baseline"
+    base_rate: float = 300
+    max_parrots: int = 5
+    retro_age: int = 20
+    retro_surcharge: float = 0.10
+    flood_boost: float = 0.15
+
+
+Scenario = Union[VehicleScenario, HouseScenario]
+
+
+def scenario_grid(scenario_type: type, **values: Sequence) -> list[Scenario]:
+    """
+    Cartesian product of parameter values, the other parameters keep their defaults.
+    Example: scenario_grid(VehicleScenario, max_age=[15, 20], crash_course_fee=[0.2, 0.25])
+    gives 4 scenarios named like "max_age=20,crash_course_fee=0.25".
+    """
+    names = [f.name for f in fields(scenario_type) if f.name != "name"]
+    unknown = set(values) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown {scenario_type.__name__} parameters: {sorted(unknown)}")
+    grid = []
+    for combination in itertools.product(*values.values()):
+        parameters = dict(zip(values, combination))
+        label = ",".join(f"{key}={value}" for key, value in parameters.items()) or "baseline"
+        grid.append(replace(scenario_type(), name=label, **parameters))
+    return grid
+
+
+@dataclass
+class ScenarioResult:
+    """
+    Outcomes of S scenarios over N policies.
+    Attributes:
+        scenarios (list): the S scenarios, in row order.
+        premiums (np.ndarray): S x N premiums, NaN for rejected policies.
+        rejections (np.ndarray): S x N RuleCode values.
+    """
+    scenarios: list[Scenario]
+    premiums: np.ndarray
+    rejections: np.ndarray
+
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        Revenue, acceptance and rejections per rule of every scenario.
+        """
+        return _summaries(self.scenarios, self.premiums, self.rejections)
+
+
+def run_scenarios(batch: PolicyBatch, scenarios: Sequence[Scenario], as_of: date) -> ScenarioResult:
+    """
+    Prices a portfolio under every scenario at once. The policy features (age, window
+    counts, ...) are computed once and the scenario parameters are broadcast as a column
+    against them, so the cost is one pass over the policies plus S x N arithmetic.
+    Args:
+        batch: VehicleBatch or HouseBatch.
+        scenarios: VehicleScenario or HouseScenario parameter sets matching the batch.
+        as_of: pricing date, the accident windows are relative to it.
+    Returns:
+        premiums and RuleCode values indexed [scenario, policy].
+    """
+    if isinstance(batch, VehicleBatch) and all(isinstance(s, VehicleScenario) for s in scenarios):
+        premiums, rejections = _vehicle_scenarios(batch, scenarios, as_of)
+    elif isinstance(batch, HouseBatch) and all(isinstance(s, HouseScenario) for s in scenarios):
+        premiums, rejections = _house_scenarios(batch, scenarios)
+    else:
+        raise ValueError("Unsupported policy type.")
+    return ScenarioResult(list(scenarios), premiums, rejections)
+
+
+def summarize_scenarios(batch: PolicyBatch, scenarios: Sequence[Scenario], as_of: date,
+                        chunk_size: int = 100_000) -> list[dict[str, Any]]:
+    """
+    Same as run_scenarios(...).summary() without materializing the S x N matrices,
+    the portfolio is processed chunk_size policies at a time.
+    """
+    revenue = np.zeros(len(scenarios))
+    counts = np.zeros((len(scenarios), len(RuleCode)), dtype=np.int64)
+    for start in range(0, len(batch), chunk_size):
+        result = run_scenarios(batch.slice(start, min(start + chunk_size, len(batch))), scenarios, as_of)
+        revenue += np.nansum(result.premiums, axis=1)
+        counts += _rule_counts(result.rejections)
+    return [_summary(scenario, revenue[i], counts[i]) for i, scenario in enumerate(scenarios)]
+
+
+def _parameters(scenarios: Sequence[Scenario], name: str) -> np.ndarray:
+    return np.array([getattr(scenario, name) for scenario in scenarios])[:, np.newaxis]
+
+
+def _vehicle_scenarios(batch: VehicleBatch, scenarios: Sequence[VehicleScenario],
+                       as_of: date) -> tuple[np.ndarray, np.ndarray]:
+    today = as_of.toordinal()
+    age = batch.age[np.newaxis, :]
+    at_fault_5y = count_accidents(batch, today - AT_FAULT_WINDOW_DAYS, at_fault_only=True)[np.newaxis, :]
+    accidents_3y = count_accidents(batch, today - RECENT_ACCIDENTS_WINDOW_DAYS)[np.newaxis, :]
+    p = lambda name: _parameters(scenarios, name)
+
+    rejections = np.select(
+        [age > p("max_age"), at_fault_5y > p("max_at_fault")],
+        [RuleCode.CAR_TOO_OLD, RuleCode.DEMOLITION_DERBY],
+        default=RuleCode.ACCEPTED,
+    ).astype(np.int8)
+    premiums = p("base_rate") * (1 + np.maximum(0, (age - p("vintage_age")) * p("vintage_tax"))
+                                 + accidents_3y * p("crash_course_fee"))
+    premiums[rejections != RuleCode.ACCEPTED] = np.nan
+    return premiums, rejections
+
+
+def _house_scenarios(batch: HouseBatch, scenarios: Sequence[HouseScenario]) -> tuple[np.ndarray, np.ndarray]:
+    n_parrots, age = batch.n_parrots[np.newaxis, :], batch.age[np.newaxis, :]
+    flooded = (batch.flood_risk >= FLOOD_RISK_CODES["MEDIUM"])[np.newaxis, :]
+    p = lambda name: _parameters(scenarios, name)
+    # The window rules have no parameters, they are evaluated once per policy
+    windows = np.select(
+        [
+            batch.has_broken & batch.has_intact & (batch.windows_broken > batch.windows_intact),
+            batch.has_broken & ~batch.has_intact & (batch.windows_broken > 0),
+            ~batch.has_broken,
+        ],
+        [RuleCode.BROKEN_WINDOWS, RuleCode.BROKEN_WINDOWS, RuleCode.INVALID_WINDOWS],
+        default=RuleCode.ACCEPTED,
+    ).astype(np.int8)[np.newaxis, :]
+
+    rejections = np.where(n_parrots > p("max_parrots"), np.int8(RuleCode.TOO_MANY_PARROTS), windows)
+    premiums = p("base_rate") * (1 + np.where(age > p("retro_age"), p("retro_surcharge"), 0.0)
+                                 + np.where(flooded, p("flood_boost"), 0.0))
+    premiums[rejections != RuleCode.ACCEPTED] = np.nan
+    return premiums, rejections
+
+
+def _rule_counts(rejections: np.ndarray) -> np.ndarray:
+    """
+    S x len(RuleCode) number of policies per RuleCode.
+    """
+    offsets = np.arange(len(rejections))[:, np.newaxis] * len(RuleCode)
+    return np.bincount((rejections + offsets).ravel(),
+                       minlength=len(rejections) * len(RuleCode)).reshape(len(rejections), len(RuleCode))
+
+
+def _summary(scenario: Scenario, revenue: float, counts: np.ndarray) -> dict[str, Any]:
+    policies = int(counts.sum())
+    rejected = policies - int(counts[RuleCode.ACCEPTED])
+    return {
+        "scenario": scenario.name,
+        "policies": policies,
+        "accepted": policies - rejected,
+        "revenue": float(revenue),
+        "rejection_rate": rejected / policies if policies else 0.0,
+        "rejections": {code.name: int(counts[code]) for code in RuleCode
+                       if code != RuleCode.ACCEPTED and counts[code]},
+    }
+
+
+def _summaries(scenarios: Sequence[Scenario], premiums: np.ndarray, rejections: np.ndarray) -> list[dict[str, Any]]:
+    revenue, counts = np.nansum(premiums, axis=1), _rule_counts(rejections)
+    return [_summary(scenario, revenue[i], counts[i]) for i, scenario in enumerate(scenarios)]
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/):
+    python3 -m main.scenarios --policies 1000000
+    """
+    from .synthetic import generate_vehicle_batch
+
+    parser = ArgumentParser(description="What-if pricing of a synthetic vehicle portfolio")
+    parser.add_argument("--policies", type=int, default=1_000_000)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    arguments = parser.parse_args()
+
+    portfolio = generate_vehicle_batch(arguments.policies, arguments.as_of)
+    grid = scenario_grid(VehicleScenario, max_age=[15, 18, 20], max_at_fault=[2, 3],
+                         crash_course_fee=[0.15, 0.20, 0.25])
+    started = time.perf_counter()
+    report = summarize_scenarios(portfolio, grid, arguments.as_of)
+    elapsed = time.perf_counter() - started
+    for row in report:
+        print(f"{row['scenario']:<55} revenue {row['revenue']:>16,.2f}  rejected {row['rejection_rate']:.2%}")
+    print(f"{len(grid)} scenarios x {arguments.policies} policies in {elapsed:.2f}s")
@@ -0,0 +1,117 @@
+import time
+from argparse import ArgumentParser
+from datetime import date
+from typing import Iterator
+import pandas as pd
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import DoubleType, IntegerType, StructField, StructType
+from .batch import EPOCH_ORDINAL, FLOOD_RISK_CODES
+from .pandas_pricing import price_house_frame, price_vehicle_frame
+from .quoting import BASE_RATES
+from .spark_job import age_years, build_session, generate_vehicles, price_vehicles
+
+RESULT_FIELDS = [StructField("rule_code", IntegerType(), False), StructField("premium", DoubleType(), True)]
+
+
+def _output_schema(df: DataFrame, nested: str) -> StructType:
+    return StructType([f for f in df.schema.fields if f.name != nested] + RESULT_FIELDS)
+
+
+# Null inputs price like main.spark_job, see main.pandas_pricing: an invalid age is
+# flagged in _invalid_age (and filled with 0), the other nulls are replaced by Spark.
+
+
+def price_vehicles_arrow(df: DataFrame, as_of: date | None = None,
+                         base_rate: float = BASE_RATES["vehicle"]) -> DataFrame:
+    """
+    Prices vehicle policies with main.batch.calculate_premiums (the engine behind
+    PremiumCalculator.calculate_premiums) on Arrow record batches through mapInPandas.
+    The accident history is flattened by Spark into two primitive arrays first, so each
+    pandas batch becomes one VehicleBatch without per-row Python code.
+    Returns:
+        The input columns except accident_history, plus rule_code and premium (null when rejected).
+    """
+    as_of = as_of or date.today()
+    accidents = F.coalesce(F.filter(F.col("accident_history"), lambda a: F.to_date(a["date"]).isNotNull()),
+                           F.array().cast(df.schema["accident_history"].dataType))
+    age = age_years(df)
+    prepared = df.drop("accident_history").withColumns({
+        "_age": F.coalesce(age, F.lit(0)),
+        "_invalid_age": age.isNull(),
+        "_accidents": F.size(accidents),
+        "_accident_dates": F.transform(
+            accidents, lambda a: F.datediff(F.to_date(a["date"]), F.lit(date(1970, 1, 1))) + EPOCH_ORDINAL),
+        "_accident_at_fault": F.transform(accidents, lambda a: F.coalesce(a["at_fault"], F.lit(False))),
+    })
+
+    def price(frames: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        for pdf in frames:
+            yield price_vehicle_frame(pdf, base_rate, as_of)
+
+    return prepared.mapInPandas(price, schema=_output_schema(df, "accident_history"))
+
+
+def price_houses_arrow(df: DataFrame, base_rate: float = BASE_RATES["house"]) -> DataFrame:
+    """
+    Same as price_vehicles_arrow for house policies, the windows map is split by Spark
+    into intact/broken counts and key flags.
+    Returns:
+        The input columns except windows, plus rule_code and premium (null when rejected).
+    """
+    broken, intact = F.col("windows")["broken"], F.col("windows")["intact"]
+    flood_code = F.lit(FLOOD_RISK_CODES["LOW"])
+    for name, code in FLOOD_RISK_CODES.items():
+        flood_code = F.when(F.col("flood_risk") == name, code).otherwise(flood_code)
+    age = age_years(df)
+    prepared = df.drop("windows").withColumns({
+        "_age": F.coalesce(age, F.lit(0)),
+        "_invalid_age": age.isNull(),
+        "_flood_risk": flood_code,
+        "_n_parrots": F.coalesce(F.col("n_parrots"), F.lit(0)),
+        "_intact": F.coalesce(intact, F.lit(0)),
+        "_broken": F.coalesce(broken, F.lit(0)),
+        "_has_intact": intact.isNotNull(),
+        "_has_broken": broken.isNotNull(),
+    })
+
+    def price(frames: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        for pdf in frames:
+            yield price_house_frame(pdf, base_rate)
+
+    return prepared.mapInPandas(price, schema=_output_schema(df, "windows"))
+
+
+def compare_throughput(spark: SparkSession, n: int, as_of: date, seed: int = 0) -> dict[str, float]:
+    """
+    Times the native expression pipeline (main.spark_job) against the Arrow path on the
+    same cached synthetic vehicle portfolio.
+    Returns:
+        policies per second of each pipeline.
+    """
+    policies = generate_vehicles(spark, n, as_of, seed).cache()
+    policies.count()
+    report = {}
+    for name, pipeline in (("native", lambda: price_vehicles(policies, as_of)),
+                           ("arrow", lambda: price_vehicles_arrow(policies, as_of))):
+        started = time.perf_counter()
+        pipeline().agg(F.count(F.lit(1)), F.sum("premium")).collect()
+        report[name] = n / (time.perf_counter() - started)
+    policies.unpersist()
+    return report
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/, with requirements_approach_1.txt installed):
+    python3 -m main.spark_arrow --policies 2000000
+    """
+    parser = ArgumentParser(description="Arrow vs native Spark pricing throughput")
+    parser.add_argument("--policies", type=int, default=2_000_000)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    arguments = parser.parse_args()
+
+    spark = build_session("insurance_pricing_arrow")
+    for pipeline, throughput in compare_throughput(spark, arguments.policies, arguments.as_of).items():
+        print(f"{pipeline}: {throughput:.0f} policies/s")
+    spark.stop()
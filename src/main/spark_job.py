@@ -0,0 +1,200 @@
+from argparse import ArgumentParser
+from datetime import date
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import (ArrayType, BooleanType, IntegerType, MapType, StringType, StructField,
+                               StructType)
+from .batch import AT_FAULT_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS
+from .quoting import BASE_RATES
+from .rules import RuleCode
+
+
+# Same schemas as the notebook (integer ages); string ages such as "6 years" are accepted too
+accident_history_schema = StructType([
+    StructField("date", StringType(), True),
+    StructField("at_fault", BooleanType(), True),
+])
+
+vehicle_policy_schema = StructType([
+    StructField("age", IntegerType(), True),
+    StructField("policy_type", StringType(), True),
+    StructField("accident_history", ArrayType(accident_history_schema), True),
+])
+
+house_policy_schema = StructType([
+    StructField("age", IntegerType(), True),
+    StructField("policy_type", StringType(), True),
+    StructField("flood_risk", StringType(), True),
+    StructField("n_parrots", IntegerType(), True),
+    StructField("windows", MapType(StringType(), IntegerType()), True),
+])
+
+MAX_GENERATED_ACCIDENTS = 6
+
+
+# The '<number> years' strings accepted by main.policies.base_policy.parse_age_string
+AGE_PATTERN = r"^\s*\+?(\d+)\s+(?i:years)\s*$"
+
+
+def age_years(df: DataFrame) -> Column:
+    """
+    Integer age, parsing '<number> years' strings like the CLI does. Null for a null,
+    negative or malformed age: the policy is rejected with RuleCode.INVALID_AGE.
+    """
+    age = F.col("age")
+    if isinstance(df.schema["age"].dataType, StringType):
+        return F.when(age.rlike(AGE_PATTERN), F.regexp_extract(age, AGE_PATTERN, 1).cast("long"))
+    return F.when(age >= 0, age)
+
+
+def _count_accidents_since(cutoff: Column, at_fault_only: bool) -> Column:
+    """
+    Accidents dated on or after cutoff, counted with one aggregate over the array
+    (no explode, no shuffle). Null histories count as 0.
+    """
+    def add(count, accident):
+        hit = F.to_date(accident["date"]) >= cutoff
+        if at_fault_only:
+            hit = hit & F.coalesce(accident["at_fault"], F.lit(False))
+        return count + F.when(hit, 1).otherwise(0)
+
+    return F.coalesce(F.aggregate(F.col("accident_history"), F.lit(0), add), F.lit(0))
+
+
+def price_vehicles(df: DataFrame, as_of: date | None = None, base_rate: float = BASE_RATES["vehicle"]) -> DataFrame:
+    """
+    Adds the at_fault_5y, accidents_3y, rule_code (RuleCode values) and premium columns
+    (premium is null when rejected) in a single narrow projection. An invalid age is
+    rejected with RuleCode.INVALID_AGE, where quote() answers an ERROR.
+    Args:
+        df: vehicle policies with age and accident_history columns.
+        as_of: pricing date, current_date() when None.
+        base_rate: base premium.
+    """
+    today = F.lit(as_of) if as_of is not None else F.current_date()
+    age = age_years(df)
+    at_fault_5y = _count_accidents_since(F.date_sub(today, AT_FAULT_WINDOW_DAYS), at_fault_only=True)
+    accidents_3y = _count_accidents_since(F.date_sub(today, RECENT_ACCIDENTS_WINDOW_DAYS), at_fault_only=False)
+
+    priced = df.withColumns({"at_fault_5y": at_fault_5y, "accidents_3y": accidents_3y})
+    rule_code = (F.when(age.isNull(), int(RuleCode.INVALID_AGE))
+                 .when(age > 15, int(RuleCode.CAR_TOO_OLD))
+                 .when(F.col("at_fault_5y") > 2, int(RuleCode.DEMOLITION_DERBY))
+                 .otherwise(int(RuleCode.ACCEPTED)))
+    # Same arithmetic as PremiumCalculator: base * (1 + max(0, (age - 5) * 0.05) + recent * 0.20)
+    premium = F.lit(float(base_rate)) * (
+        F.lit(1) + F.greatest(F.lit(0.0), (age - 5) * 0.05) + F.col("accidents_3y") * 0.20
+    )
+    return priced.withColumns({
+        "rule_code": rule_code,
+        "premium": F.when(rule_code == int(RuleCode.ACCEPTED), premium),
+    })
+
+
+def price_houses(df: DataFrame, base_rate: float = BASE_RATES["house"]) -> DataFrame:
+    """
+    Adds the rule_code (RuleCode values) and premium columns (null when rejected), like
+    price_vehicles an invalid age is rejected with RuleCode.INVALID_AGE.
+    Args:
+        df: house policies with age, flood_risk, n_parrots and windows (map) columns.
+        base_rate: base premium.
+    """
+    age = age_years(df)
+    broken, intact = F.col("windows")["broken"], F.col("windows")["intact"]
+    has_broken, has_intact = broken.isNotNull(), intact.isNotNull()
+    rule_code = (F.when(age.isNull(), int(RuleCode.INVALID_AGE))
+                 .when(F.col("n_parrots") > 5, int(RuleCode.TOO_MANY_PARROTS))
+                 .when(has_broken & has_intact & (broken > intact), int(RuleCode.BROKEN_WINDOWS))
+                 .when(has_broken & ~has_intact & (broken > 0), int(RuleCode.BROKEN_WINDOWS))
+                 .when(~has_broken, int(RuleCode.INVALID_WINDOWS))
+                 .otherwise(int(RuleCode.ACCEPTED)))
+    age_factor = F.when(age > 20, 0.10).otherwise(0.0)
+    flood_factor = F.when(F.col("flood_risk").isin("HIGH", "MEDIUM"), 0.15).otherwise(0.0)
+    premium = F.lit(float(base_rate)) * (F.lit(1) + age_factor + flood_factor)
+    return df.withColumns({
+        "rule_code": rule_code,
+        "premium": F.when(rule_code == int(RuleCode.ACCEPTED), premium),
+    })
+
+
+def _uniform(seed: int, salt: str, *columns: Column) -> Column:
+    """
+    Deterministic pseudo random long from the row id (use it through pmod), no shuffle needed.
+    """
+    return F.xxhash64(F.lit(seed), F.lit(salt), *columns)
+
+
+def generate_vehicles(spark: SparkSession, n: int, as_of: date, seed: int = 0,
+                      history_days: int = 8 * 365) -> DataFrame:
+    """
+    Seeded synthetic vehicle portfolio of n rows, with up to MAX_GENERATED_ACCIDENTS
+    accidents in the history_days before as_of.
+    """
+    row = F.col("id")
+    n_accidents = F.pmod(_uniform(seed, "n_accidents", row), MAX_GENERATED_ACCIDENTS + 1).cast("int")
+    slots = F.slice(F.sequence(F.lit(1), F.lit(MAX_GENERATED_ACCIDENTS)), 1, n_accidents)
+    history = F.transform(slots, lambda i: F.struct(
+        F.date_format(F.date_sub(F.lit(as_of), F.pmod(_uniform(seed, "date", row, i), history_days).cast("int")),
+                      "yyyy-MM-dd").alias("date"),
+        (F.pmod(_uniform(seed, "at_fault", row, i), 2) == 0).alias("at_fault"),
+    ))
+    return spark.range(n).select(
+        F.pmod(_uniform(seed, "age", row), 21).cast("int").alias("age"),
+        F.lit("vehicle").alias("policy_type"),
+        history.cast(ArrayType(accident_history_schema)).alias("accident_history"),
+    )
+
+
+def generate_houses(spark: SparkSession, n: int, seed: int = 0) -> DataFrame:
+    """
+    Seeded synthetic house portfolio of n rows.
+    """
+    row = F.col("id")
+    flood_risks = F.array(F.lit("LOW"), F.lit("MEDIUM"), F.lit("HIGH"))
+    return spark.range(n).select(
+        F.pmod(_uniform(seed, "age", row), 80).cast("int").alias("age"),
+        F.lit("house").alias("policy_type"),
+        flood_risks[F.pmod(_uniform(seed, "flood", row), 3).cast("int")].alias("flood_risk"),
+        F.pmod(_uniform(seed, "parrots", row), 8).cast("int").alias("n_parrots"),
+        F.create_map(
+            F.lit("intact"), F.pmod(_uniform(seed, "intact", row), 12).cast("int"),
+            F.lit("broken"), F.pmod(_uniform(seed, "broken", row), 4).cast("int"),
+        ).alias("windows"),
+    )
+
+
+def summarize(priced: DataFrame) -> DataFrame:
+    """
+    Number of policies and revenue per rule code.
+    """
+    return priced.groupBy("rule_code").agg(
+        F.count(F.lit(1)).alias("policies"),
+        F.sum("premium").alias("revenue"),
+    ).orderBy("rule_code")
+
+
+def build_session(app_name: str = "insurance_pricing_job", master: str = "local[*]") -> SparkSession:
+    return SparkSession.builder.master(master).appName(app_name).getOrCreate()
+
+
+if __name__ == "__main__":
+    """
+    Example usage (from src/, with requirements_approach_1.txt installed):
+    python3 -m main.spark_job --vehicles 5000000 --houses 5000000 --as-of 2025-02-17
+    """
+    parser = ArgumentParser(description="Portfolio pricing Spark job")
+    parser.add_argument("--vehicles", type=int, default=2_000_000)
+    parser.add_argument("--houses", type=int, default=2_000_000)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--output", type=str, default=None, help="parquet output directory")
+    arguments = parser.parse_args()
+
+    spark = build_session()
+    vehicles = price_vehicles(generate_vehicles(spark, arguments.vehicles, arguments.as_of), arguments.as_of)
+    houses = price_houses(generate_houses(spark, arguments.houses))
+    if arguments.output is not None:
+        vehicles.write.mode("overwrite").parquet(f"{arguments.output}/vehicles")
+        houses.write.mode("overwrite").parquet(f"{arguments.output}/houses")
+    summarize(vehicles).show()
+    summarize(houses).show()
+    spark.stop()
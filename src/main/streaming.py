@@ -0,0 +1,104 @@
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import nullcontext, redirect_stdout
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, TextIO
+from .quoting import pricing_date, quote
+from .result_sink import ResultSink
+
+
+@dataclass
+class StreamStats:
+    """
+    Counters of a streaming run.
+    """
+    processed: int = 0
+    outcomes: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        outcomes = ", ".join(f"{outcome}={count}" for outcome, count in sorted(self.outcomes.items()))
+        return (f"Processed {self.processed} quotes in {self.elapsed:.3f}s "
+                f"({self.throughput:.0f} quotes/s) [{outcomes}]")
+
+
+def read_requests(lines: Iterable[str]) -> Iterator[tuple[Any, dict[str, Any] | None, str | None]]:
+    """
+    Parses NDJSON quote requests lazily, one line at a time.
+    Every record must contain a 'product_type' key, the remaining keys are the payload.
+    The request id is the record's 'request_id' when present, otherwise its line number.
+    Yields:
+        (request_id, record, error) tuples, record is None when the line is not valid JSON.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Error processing quote: invalid JSON ({e})"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Error processing quote: record must be a JSON object"
+            continue
+        yield record.pop("request_id", line_number), record, None
+
+
+def price_requests(requests: Iterable[tuple[Any, dict[str, Any] | None, str | None]]) -> Iterator[dict[str, Any]]:
+    """
+    Prices the parsed requests with the same logic as app.main.
+    """
+    for request_id, record, error in requests:
+        if record is None:
+            yield {"request_id": request_id, "product_type": None, "outcome": "ERROR", "premium": None,
+                   "rule": None, "message": error, "rate_version": None}
+            continue
+        product_type = record.pop("product_type", None)
+        yield {"request_id": request_id, "product_type": product_type, **quote(product_type, record)}
+
+
+def stream_quotes(source: TextIO, sink: TextIO, stats: StreamStats | None = None) -> StreamStats:
+    """
+    Reads NDJSON quote requests from source and writes one NDJSON result per request
+    to sink. Only one record is held in memory at a time.
+    When sink is stdout, anything printed while pricing goes to stderr instead, so
+    the output stays valid NDJSON.
+    """
+    stats = stats if stats is not None else StreamStats()
+    with redirect_stdout(sys.stderr) if sink is sys.stdout else nullcontext():
+        for result in price_requests(read_requests(source)):
+            sink.write(json.dumps(result))
+            sink.write("\n")
+            stats.processed += 1
+            stats.outcomes[result["outcome"]] += 1
+    sink.flush()
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def record_quotes(source: TextIO, results: ResultSink, stats: StreamStats | None = None) -> StreamStats:
+    """
+    Same as stream_quotes, but the results are appended to a ResultSink (with the
+    pricing date of the calculator that priced them) instead of being written as JSON lines.
+    """
+    stats = stats if stats is not None else StreamStats()
+    for result in price_requests(read_requests(source)):
+        results.append(result["request_id"], result["product_type"], result, pricing_date())
+        stats.processed += 1
+        stats.outcomes[result["outcome"]] += 1
+    results.flush()
+    stats.finished = time.perf_counter()
+    return stats
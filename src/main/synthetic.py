@@ -0,0 +1,119 @@
+from datetime import date
+from typing import Any
+import numpy as np
+from .batch import AT_FAULT_WINDOW_DAYS, EPOCH_ORDINAL, HouseBatch, VehicleBatch
+
+ACCIDENT_DISTRIBUTIONS = ("poisson", "geometric", "fixed")
+
+
+def _accident_counts(rng: np.random.Generator, n: int, distribution: str, mean: float) -> np.ndarray:
+    if distribution == "poisson":
+        return rng.poisson(mean, size=n)
+    elif distribution == "geometric":
+        # Long tailed: most policies have no accident, a few have many
+        return rng.geometric(1 / (1 + mean), size=n) - 1
+    elif distribution == "fixed":
+        return np.full(n, round(mean))
+    raise ValueError(f"Unknown accident distribution '{distribution}', expected one of {ACCIDENT_DISTRIBUTIONS}")
+
+
+def generate_vehicle_batch(n: int, as_of: date, seed: int = 0, mean_accidents: float = 1.0,
+                           history_days: int = 8 * 365, accident_distribution: str = "poisson",
+                           too_old_rate: float | None = None, derby_rate: float | None = None) -> VehicleBatch:
+    """
+    Seeded synthetic vehicle portfolio.
+    Args:
+        n: number of policies.
+        as_of: accidents are dated within history_days before this date.
+        seed: random seed, the same seed always gives the same portfolio.
+        mean_accidents: mean accident history length.
+        history_days: how far back accidents go.
+        accident_distribution: distribution of the history lengths, one of ACCIDENT_DISTRIBUTIONS.
+        too_old_rate: share of cars older than 15 years, ages are uniform in [0, 20] when None.
+        derby_rate: share of policies given 3 extra at-fault accidents in the 5 years window,
+            none when None (random histories still break the at-fault rule now and then).
+    """
+    rng = np.random.default_rng(seed)
+    if too_old_rate is None:
+        age = rng.integers(0, 21, size=n)
+    else:
+        age = np.where(rng.random(n) < too_old_rate, rng.integers(16, 31, size=n), rng.integers(0, 16, size=n))
+    counts = _accident_counts(rng, n, accident_distribution, mean_accidents)
+    derby = rng.random(n) < derby_rate if derby_rate is not None else np.zeros(n, dtype=bool)
+    counts = counts + 3 * derby
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    n_accidents = int(offsets[-1])
+    dates = as_of.toordinal() - rng.integers(0, history_days, size=n_accidents)
+    at_fault = rng.random(n_accidents) < 0.5
+    if derby.any():
+        # The last 3 accidents of each derby driver
+        last = np.repeat(offsets[1:][derby], 3) - np.tile([1, 2, 3], int(derby.sum()))
+        dates[last] = as_of.toordinal() - rng.integers(0, AT_FAULT_WINDOW_DAYS, size=len(last))
+        at_fault[last] = True
+    return VehicleBatch(age, offsets, dates, at_fault)
+
+
+def generate_house_batch(n: int, seed: int = 0, parrot_rate: float | None = None,
+                         broken_windows_rate: float | None = None) -> HouseBatch:
+    """
+    Seeded synthetic house portfolio.
+    Args:
+        n: number of policies.
+        seed: random seed.
+        parrot_rate: share of houses with more than 5 parrots, uniform in [0, 7] parrots when None.
+        broken_windows_rate: share of houses with more broken than intact windows,
+            uniform in [0, 11] intact and [0, 3] broken windows when None.
+    """
+    rng = np.random.default_rng(seed)
+    intact = rng.integers(0, 12, size=n)
+    age = rng.integers(0, 80, size=n)
+    flood_risk = rng.integers(0, 3, size=n)
+    if parrot_rate is None:
+        n_parrots = rng.integers(0, 8, size=n)
+    else:
+        n_parrots = np.where(rng.random(n) < parrot_rate, rng.integers(6, 10, size=n), rng.integers(0, 6, size=n))
+    if broken_windows_rate is None:
+        broken = rng.integers(0, 4, size=n)
+    else:
+        broken = np.where(rng.random(n) < broken_windows_rate, intact + rng.integers(1, 4, size=n),
+                          np.minimum(intact, rng.integers(0, 4, size=n)))
+    return HouseBatch(
+        age=age,
+        flood_risk=flood_risk,
+        n_parrots=n_parrots,
+        windows_intact=intact,
+        windows_broken=broken,
+        has_intact=np.ones(n, dtype=bool),
+        has_broken=np.ones(n, dtype=bool),
+    )
+
+
+def vehicle_records(batch: VehicleBatch) -> list[dict[str, Any]]:
+    """
+    The batch as quote payloads ({"age": "6 years", "accident_history": [...]}).
+    """
+    iso_dates = np.datetime_as_string((batch.accident_dates - EPOCH_ORDINAL).astype("datetime64[D]")).tolist()
+    at_fault = batch.accident_at_fault.tolist()
+    offsets = batch.accident_offsets.tolist()
+    return [
+        {"age": f"{age} years",
+         "accident_history": [{"date": iso_dates[i], "at_fault": at_fault[i]} for i in range(offsets[p], offsets[p + 1])]}
+        for p, age in enumerate(batch.age.tolist())
+    ]
+
+
+def house_records(batch: HouseBatch) -> list[dict[str, Any]]:
+    """
+    The batch as quote payloads, the windows keys follow has_intact/has_broken.
+    """
+    records = []
+    for record in batch.records():
+        windows = {}
+        if record.has_intact:
+            windows["intact"] = record.windows_intact
+        if record.has_broken:
+            windows["broken"] = record.windows_broken
+        records.append({"age": f"{record.age} years", "flood_risk": record.flood_risk.name,
+                        "n_parrots": record.n_parrots, "windows": windows})
+    return records
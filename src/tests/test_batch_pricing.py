@@ -0,0 +1,229 @@
+import random
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from main.batch import HouseBatch, VehicleBatch, calculate_premiums
+from main.policies.vehicle_policy import VehiclePolicy, AccidentHistory
+from main.policies.house_policy import FloodRisk, HousePolicy
+from main.premium_calculator import PremiumCalculator
+from main.rules import RuleCode
+from main.exceptions.insurance import BrokenWindowsException, CarToOldException, CarDemotionDerbyException, TooManyParrotsException
+
+AS_OF = date(2025, 2, 17)
+
+SCALAR_RULE_CODES = {
+    CarToOldException: RuleCode.CAR_TOO_OLD,
+    CarDemotionDerbyException: RuleCode.DEMOLITION_DERBY,
+    TooManyParrotsException: RuleCode.TOO_MANY_PARROTS,
+    BrokenWindowsException: RuleCode.BROKEN_WINDOWS,
+    ValueError: RuleCode.INVALID_WINDOWS,
+}
+
+
+def scalar_outcomes(calculator, policies):
+    premiums, codes = [], []
+    for policy in policies:
+        try:
+            premiums.append(calculator.calculate_premium(policy))
+            codes.append(RuleCode.ACCEPTED)
+        except tuple(SCALAR_RULE_CODES) as e:
+            premiums.append(np.nan)
+            codes.append(SCALAR_RULE_CODES[type(e)])
+    return np.array(premiums), np.array(codes)
+
+
+def random_vehicle_policies(n, seed=0):
+    rng = random.Random(seed)
+    policies = []
+    for _ in range(n):
+        history = [
+            AccidentHistory(date=AS_OF - timedelta(days=rng.randint(-30, 8 * 365)), at_fault=rng.random() < 0.5)
+            for _ in range(rng.choice([0, 0, 1, 2, 3, 5]))
+        ]
+        policies.append(VehiclePolicy(age=f"{rng.randint(0, 20)} years", accident_history=history))
+    return policies
+
+
+def random_house_policies(n, seed=0):
+    rng = random.Random(seed)
+    policies = []
+    for _ in range(n):
+        windows = rng.choice([
+            {"intact": rng.randint(0, 10), "broken": rng.randint(0, 10)},
+            {"broken": rng.randint(0, 2)},
+            {"intact": rng.randint(0, 10)},
+            {},
+        ])
+        policies.append(HousePolicy(
+            age=f"{rng.randint(0, 60)} years",
+            flood_risk=rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            n_parrots=rng.randint(0, 7),
+            windows=windows,
+        ))
+    return policies
+
+
+def test_vehicle_batch_matches_scalar_path():
+    policies = random_vehicle_policies(500)
+    calculator = PremiumCalculator(500, as_of=AS_OF)
+    expected_premiums, expected_codes = scalar_outcomes(calculator, policies)
+
+    result = calculator.calculate_premiums(VehicleBatch.from_policies(policies))
+
+    np.testing.assert_array_equal(result.rejections, expected_codes)
+    np.testing.assert_array_equal(result.premiums, expected_premiums)
+
+
+def test_house_batch_matches_scalar_path():
+    policies = random_house_policies(500)
+    calculator = PremiumCalculator(300, as_of=AS_OF)
+    expected_premiums, expected_codes = scalar_outcomes(calculator, policies)
+
+    result = calculator.calculate_premiums(HouseBatch.from_policies(policies))
+
+    np.testing.assert_array_equal(result.rejections, expected_codes)
+    np.testing.assert_array_equal(result.premiums, expected_premiums)
+
+
+def test_vehicle_batch_from_columns():
+    accident = date(2024, 1, 12).toordinal()
+    batch = VehicleBatch(
+        age=[16, 6, 3],
+        accident_offsets=[0, 0, 3, 3],
+        accident_dates=[accident, accident, accident],
+        accident_at_fault=[True, True, True],
+    )
+    result = calculate_premiums(batch, 500, AS_OF)
+    assert list(result.rejections) == [RuleCode.CAR_TOO_OLD, RuleCode.DEMOLITION_DERBY, RuleCode.ACCEPTED]
+    assert list(result.accepted) == [False, False, True]
+    assert result.premiums[2] == pytest.approx(500)
+
+
+def test_vehicle_batch_invalid_offsets():
+    with pytest.raises(ValueError):
+        VehicleBatch(age=[1, 2], accident_offsets=[0, 0], accident_dates=[], accident_at_fault=[])
+
+
+def test_calculate_premiums_unsupported_batch():
+    with pytest.raises(ValueError) as e:
+        calculate_premiums([], 500, AS_OF)
+    assert "Unsupported policy type." in str(e.value)
+
+
+def test_vehicle_batch_from_records_matches_from_policies():
+    records = [
+        {"age": "16 years", "accident_history": [{"date": "2023-04-23", "at_fault": False}]},
+        {"age": "6 Years", "accident_history": [{"date": "2022-07-20", "at_fault": False},
+                                                {"date": "2024-01-12", "at_fault": True}]},
+        {"age": " 3  years ", "accident_history": []},
+    ]
+    batch = VehicleBatch.from_records(records)
+    expected = VehicleBatch.from_policies(VehiclePolicy(**record) for record in records)
+
+    for column in ("age", "accident_offsets", "accident_dates", "accident_at_fault"):
+        np.testing.assert_array_equal(getattr(batch, column), getattr(expected, column))
+    assert batch.record(1).age == 6
+    assert batch.record(1).accident_at_fault == (False, True)
+    assert not hasattr(batch.record(0), "__dict__")
+
+
+def test_house_batch_from_records_matches_from_policies():
+    records = [
+        {"age": "25 years", "flood_risk": "MEDIUM", "n_parrots": 1, "windows": {"intact": 4, "broken": 1}},
+        {"age": "52 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {"broken": 3}},
+        {"age": "3 years", "flood_risk": "HIGH", "n_parrots": 6, "windows": {}},
+    ]
+    batch = HouseBatch.from_records(records)
+    expected = HouseBatch.from_policies(HousePolicy(**record) for record in records)
+
+    for column in ("age", "flood_risk", "n_parrots", "windows_intact", "windows_broken", "has_intact", "has_broken"):
+        np.testing.assert_array_equal(getattr(batch, column), getattr(expected, column))
+    assert [record.flood_risk for record in batch.records()] == [FloodRisk.MEDIUM, FloodRisk.LOW, FloodRisk.HIGH]
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"age": "old", "flood_risk": "LOW", "n_parrots": 0, "windows": {}}, "Record 1: Age must be a string"),
+    ({"age": "3 years", "flood_risk": "NONE", "n_parrots": 0, "windows": {}}, "Record 1: Flood risk must be one of"),
+    ({"age": "3 years", "flood_risk": "LOW", "n_parrots": -1, "windows": {}}, "Record 1: Number of parrots"),
+    ({"age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": []}, "Record 1: Windows must be a dictionary"),
+    ({"age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {"broken": "2"}}, "Record 1: Windows dictionary values"),
+])
+def test_house_batch_from_records_validation(record, message):
+    valid = {"age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {"intact": 1}}
+    with pytest.raises(ValueError) as e:
+        HouseBatch.from_records([valid, record])
+    assert message in str(e.value)
+
+
+def test_vehicle_batch_from_records_validation():
+    valid = {"age": "3 years", "accident_history": []}
+    with pytest.raises(ValueError) as e:
+        VehicleBatch.from_records([valid, {"age": "3 years", "accident_history": [{"date": "2023-04-23", "at_fault": "no"}]}])
+    assert "Record 1: Invalid accident history data: at_fault must be a boolean" in str(e.value)
+    with pytest.raises(ValueError) as e:
+        VehicleBatch.from_records([{"age": "3 years", "accident_history": [{"date": "2023-02-30", "at_fault": True}]}])
+    assert "Invalid accident history data" in str(e.value)
+    with pytest.raises(ValueError) as e:
+        VehicleBatch.from_records([valid, valid, {"age": "3 years", "accident_history": [{"date": "2023-04-23"}]}])
+    assert "Record 2: Invalid accident history data" in str(e.value)
+    with pytest.raises(TypeError):
+        VehicleBatch.from_records([valid, {"age": "3 years", "accident_history": "none"}])
+
+
+def test_empty_batches_from_records():
+    vehicles = VehicleBatch.from_records([])
+    houses = HouseBatch.from_records([])
+
+    assert len(vehicles) == len(houses) == 0
+    np.testing.assert_array_equal(vehicles.accident_offsets, [0])
+    for batch in (vehicles, houses):
+        result = calculate_premiums(batch, 100, AS_OF)
+        assert len(result.premiums) == len(result.rejections) == 0
+
+
+@pytest.mark.parametrize("age", ["3 years", "+3 years", "3\nyears", "3\u00a0years", "03 YEARS", "3 years extra",
+                                 "-1 years", "3 months", "years", "3.5 years"])
+def test_age_validation_agrees_with_policy(age):
+    try:
+        VehiclePolicy(age=age, accident_history=[])
+        expected = int(age.split()[0])
+    except ValueError:
+        expected = None
+    try:
+        records = [{"age": "1 years", "accident_history": []}, {"age": age, "accident_history": []}]
+        parsed = int(VehicleBatch.from_records(records).age[1])
+    except ValueError as e:
+        assert "Record 1: Age must be a string" in str(e)
+        parsed = None
+    assert parsed == expected
+
+
+@pytest.mark.parametrize("day", ["2023-04-23", "20230423", "2023-W16-7", "2023-02-30", "2023-4-23",
+                                 "\u0662\u0660\u0662\u0663-04-23", 20230423])
+def test_accident_date_validation_agrees_with_policy(day):
+    history = [{"date": "2024-01-12", "at_fault": False}, {"date": day, "at_fault": True}]
+    try:
+        expected = VehiclePolicy(age="3 years", accident_history=history).accident_history.ordinals[1]
+    except ValueError:
+        expected = None
+    try:
+        batch = VehicleBatch.from_records([{"age": "1 years", "accident_history": []},
+                                          {"age": "3 years", "accident_history": history}])
+        parsed = int(batch.accident_dates[1])
+    except ValueError as e:
+        assert "Record 1: Invalid accident history data" in str(e)
+        parsed = None
+    assert parsed == expected
+
+
+def test_from_records_missing_history_and_out_of_range_integers():
+    with pytest.raises(KeyError, match="Record 1: accident_history"):
+        VehicleBatch.from_records([{"age": "3 years", "accident_history": []}, {"age": "3 years"}])
+    with pytest.raises(ValueError, match="Record 1: Age must be at most"):
+        VehicleBatch.from_records([{"age": "3 years", "accident_history": []},
+                                   {"age": f"{2 ** 64} years", "accident_history": []}])
+    house = {"age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {"intact": 1}}
+    with pytest.raises(ValueError, match="Record 1: Number of parrots"):
+        HouseBatch.from_records([house, {**house, "n_parrots": 2 ** 70}])
+    with pytest.raises(ValueError, match="Record 1: Windows dictionary values"):
+        HouseBatch.from_records([house, {**house, "windows": {"intact": 2 ** 70}}])
@@ -0,0 +1,64 @@
+import copy
+import numpy as np
+import pytest
+from main.batch import HouseBatch, VehicleBatch, calculate_premiums
+from main.benchmark import STAGES, compare_reports, measure, run_benchmark
+from main.rules import RuleCode
+from main.synthetic import generate_house_batch, generate_vehicle_batch, house_records, vehicle_records
+from tests.test_batch_pricing import AS_OF
+
+
+def test_generator_rates():
+    batch = generate_vehicle_batch(20_000, AS_OF, seed=1, accident_distribution="geometric",
+                                   too_old_rate=0.10, derby_rate=0.05)
+    rejections = calculate_premiums(batch, 500, AS_OF).rejections
+
+    assert (rejections == RuleCode.CAR_TOO_OLD).mean() == pytest.approx(0.10, abs=0.01)
+    # Derby drivers that are not also too old, plus the random histories breaking the rule
+    assert (rejections == RuleCode.DEMOLITION_DERBY).mean() == pytest.approx(0.05 * 0.9, abs=0.015)
+
+    houses = generate_house_batch(20_000, seed=1, parrot_rate=0.02, broken_windows_rate=0.30)
+    rejections = calculate_premiums(houses, 300, AS_OF).rejections
+    assert (rejections == RuleCode.TOO_MANY_PARROTS).mean() == pytest.approx(0.02, abs=0.005)
+    assert (rejections == RuleCode.BROKEN_WINDOWS).mean() == pytest.approx(0.30 * 0.98, abs=0.02)
+
+
+def test_generator_defaults_are_unchanged():
+    batch = generate_vehicle_batch(5, AS_OF, seed=0)
+    assert batch.age.tolist() == np.random.default_rng(0).integers(0, 21, size=5).tolist()
+    with pytest.raises(ValueError):
+        generate_vehicle_batch(5, AS_OF, accident_distribution="uniform")
+
+
+def test_records_round_trip():
+    vehicles = generate_vehicle_batch(200, AS_OF, seed=2, mean_accidents=2)
+    houses = generate_house_batch(200, seed=2)
+    for batch, records in ((vehicles, VehicleBatch.from_records(vehicle_records(vehicles))),
+                           (houses, HouseBatch.from_records(house_records(houses)))):
+        for column in batch.__dataclass_fields__:
+            np.testing.assert_array_equal(getattr(records, column), getattr(batch, column))
+
+
+@pytest.mark.parametrize("product_type", ["vehicle", "house"])
+def test_engines_agree(product_type):
+    batch = measure(product_type, "batch", 2500, AS_OF, seed=3, chunk_size=1000)
+    scalar = measure(product_type, "scalar", 2500, AS_OF, seed=3, chunk_size=1000)
+
+    assert set(batch["stages"]) == set(STAGES)
+    assert batch["accepted"] == scalar["accepted"] and batch["rejections"] == scalar["rejections"]
+    assert batch["revenue"] == pytest.approx(scalar["revenue"])
+    assert batch["peak_rss_mb"] > 0
+
+
+def test_run_benchmark_report():
+    report = run_benchmark([500, 1500], AS_OF, product_types=("vehicle",), scalar_limit=1000, isolate=False,
+                           derby_rate=0.1, parrot_rate=0.5)
+
+    assert [(r["engine"], r["policies"]) for r in report["results"]] == [("batch", 500), ("batch", 1500),
+                                                                         ("scalar", 500)]
+    assert report["generator"] == {"derby_rate": 0.1, "parrot_rate": 0.5}
+
+    slower = copy.deepcopy(report)
+    slower["results"][0]["stages"]["validate"] = report["results"][0]["stages"]["validate"] * 2 + 1
+    assert compare_reports(report, report) == []
+    assert len(compare_reports(report, slower)) == 1
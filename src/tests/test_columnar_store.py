@@ -0,0 +1,120 @@
+import json
+import numpy as np
+import pytest
+from main.batch import HouseBatch, VehicleBatch, calculate_premiums
+from main.columnar_store import StoreWriter, convert_ndjson, open_store, write_store
+from main.synthetic import generate_house_batch, generate_vehicle_batch
+from tests.test_batch_pricing import AS_OF
+
+
+def assert_same_columns(batch, expected, columns):
+    for column in columns:
+        np.testing.assert_array_equal(getattr(batch, column), getattr(expected, column))
+
+
+def test_vehicle_store_round_trip_is_zero_copy(tmp_path):
+    path = tmp_path / "vehicles.pcol"
+    expected = generate_vehicle_batch(1000, AS_OF, seed=3)
+    write_store(path, expected)
+
+    batch = open_store(path)
+
+    assert isinstance(batch, VehicleBatch)
+    assert_same_columns(batch, expected, ("age", "accident_offsets", "accident_dates", "accident_at_fault"))
+    assert not batch.accident_dates.flags.owndata and not batch.accident_dates.flags.writeable
+    np.testing.assert_array_equal(calculate_premiums(batch, 500, AS_OF).premiums,
+                                  calculate_premiums(expected, 500, AS_OF).premiums)
+
+
+def test_house_store_round_trip(tmp_path):
+    path = tmp_path / "houses.pcol"
+    expected = generate_house_batch(1000, seed=3)
+    write_store(path, expected)
+
+    batch = open_store(path)
+
+    assert isinstance(batch, HouseBatch)
+    assert_same_columns(batch, expected, ("age", "flood_risk", "n_parrots", "windows_intact", "windows_broken",
+                                          "has_intact", "has_broken"))
+
+
+def test_convert_ndjson(tmp_path):
+    records = [
+        {"product_type": "vehicle", "age": "16 years", "accident_history": [{"date": "2023-04-23", "at_fault": False}]},
+        {"product_type": "house", "age": "25 years", "flood_risk": "MEDIUM", "n_parrots": 1,
+         "windows": {"intact": 4, "broken": 1}},
+        {"product_type": "vehicle", "age": "6 years", "accident_history": [{"date": "2022-07-20", "at_fault": False},
+                                                                           {"date": "2024-01-12", "at_fault": True}]},
+        {"product_type": "vehicle", "age": "3 years", "accident_history": []},
+    ]
+    lines = [json.dumps(record) for record in records] + [""]
+    vehicles, houses = tmp_path / "vehicles.pcol", tmp_path / "houses.pcol"
+
+    written = convert_ndjson(lines, vehicles, houses, chunk_size=2)
+
+    assert written == {"vehicle": 3, "house": 1}
+    expected = VehicleBatch.from_records([{k: v for k, v in r.items() if k != "product_type"}
+                                          for r in records if r["product_type"] == "vehicle"])
+    assert_same_columns(open_store(vehicles), expected, ("age", "accident_offsets", "accident_dates", "accident_at_fault"))
+    assert open_store(houses).record(0).windows_broken == 1
+
+
+def test_convert_ndjson_unknown_product_type(tmp_path):
+    with pytest.raises(ValueError) as e:
+        convert_ndjson(['{"product_type": "boat"}'], tmp_path / "vehicles.pcol")
+    assert "Line 1: No more insurance types" in str(e.value)
+
+
+def test_open_store_rejects_other_files(tmp_path):
+    path = tmp_path / "quotes.ndjson"
+    path.write_text('{"product_type": "vehicle"}\n')
+    with pytest.raises(ValueError):
+        open_store(path)
+
+
+def test_convert_single_product_input(tmp_path):
+    lines = ['{"product_type": "vehicle", "age": "3 years", "accident_history": []}']
+    vehicles, houses = tmp_path / "vehicles.pcol", tmp_path / "houses.pcol"
+
+    assert convert_ndjson(lines, vehicles, houses) == {"vehicle": 1, "house": 0}
+    empty = open_store(houses)
+    assert isinstance(empty, HouseBatch) and len(empty) == 0
+    assert len(calculate_premiums(empty, 300, AS_OF).premiums) == 0
+
+
+def test_convert_ndjson_invalid_json(tmp_path):
+    with pytest.raises(ValueError) as e:
+        convert_ndjson(['{"product_type": "vehicle", "age": "3 years"}', "{"], tmp_path / "vehicles.pcol")
+    assert "Line 2: Invalid JSON" in str(e.value)
+
+
+def test_store_writer_appends_chunks(tmp_path):
+    expected = generate_vehicle_batch(1000, AS_OF, seed=5)
+    with StoreWriter(str(tmp_path / "vehicles.pcol"), "vehicle") as writer:
+        for start in range(0, 1000, 300):
+            writer.append(expected.slice(start, min(start + 300, 1000)))
+    write_store(tmp_path / "whole.pcol", expected)
+
+    assert_same_columns(open_store(tmp_path / "vehicles.pcol"), expected,
+                        ("age", "accident_offsets", "accident_dates", "accident_at_fault"))
+    assert (tmp_path / "vehicles.pcol").read_bytes() == (tmp_path / "whole.pcol").read_bytes()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["vehicles.pcol", "whole.pcol"]
+
+
+@pytest.mark.parametrize("bad, message", [
+    ('{"product_type": "vehicle", "age": "3 months", "accident_history": []}', "Line 5: Age must be"),
+    ('{"product_type": "vehicle", "age": "3 years", "accident_history": [{"date": "2023-04-23"}]}',
+     "Line 5: Invalid accident history data"),
+    ('{"product_type": "vehicle", "age": "3 years"}', "Line 5: accident_history"),
+    ("[1, 2]", "Line 5: Record must be a JSON object"),
+    ("3", "Line 5: Record must be a JSON object"),
+])
+def test_convert_ndjson_errors_name_the_line(tmp_path, bad, message):
+    vehicle = '{"product_type": "vehicle", "age": "3 years", "accident_history": []}'
+    house = '{"product_type": "house", "age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {}}'
+    lines = [vehicle, house, vehicle, vehicle, bad, vehicle]
+
+    with pytest.raises(ValueError) as e:
+        convert_ndjson(lines, tmp_path / "vehicles.pcol", tmp_path / "houses.pcol", chunk_size=2)
+    assert message in str(e.value)
+    assert list(tmp_path.iterdir()) == []
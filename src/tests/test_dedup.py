@@ -0,0 +1,51 @@
+from datetime import timedelta
+import numpy as np
+from main.batch import HouseBatch, VehicleBatch
+from main.dedup import profile_groups, price_unique_profiles
+from main.metrics import CalculatorMetrics
+from main.premium_calculator import PremiumCalculator
+from main.synthetic import generate_house_batch, generate_vehicle_batch
+from tests.test_batch_pricing import AS_OF
+
+
+def assert_same_result(calculator, batch):
+    expected = calculator.calculate_premiums(batch)
+    result, stats = price_unique_profiles(calculator, batch)
+    np.testing.assert_array_equal(result.rejections, expected.rejections)
+    np.testing.assert_array_equal(result.premiums, expected.premiums)
+    return stats
+
+
+def test_deduplicated_pricing_matches_batch_pricing():
+    vehicles = assert_same_result(PremiumCalculator(500, as_of=AS_OF), generate_vehicle_batch(5000, AS_OF, seed=3))
+    houses = assert_same_result(PremiumCalculator(300), generate_house_batch(5000, seed=3))
+    assert vehicles.unique < vehicles.rows == 5000
+    assert houses.unique < houses.rows == 5000
+    assert houses.ratio == 5000 / houses.unique
+
+
+def test_vehicle_histories_reduce_to_window_counts():
+    old = (AS_OF - timedelta(days=6 * 365)).toordinal()
+    recent = (AS_OF - timedelta(days=30)).toordinal()
+    # empty history, an accident older than both windows, a recent one twice
+    batch = VehicleBatch(age=[3, 3, 3, 3], accident_offsets=[0, 0, 1, 2, 3],
+                         accident_dates=[old, recent, recent], accident_at_fault=[True, False, False])
+    representatives, inverse = profile_groups(batch, AS_OF)
+
+    assert len(representatives) == 2
+    assert inverse[0] == inverse[1] != inverse[2] == inverse[3]
+
+
+def test_wide_key_space_and_metrics_count_every_policy():
+    batch = HouseBatch(age=[2 ** 40, 5, 2 ** 40, 5], flood_risk=[0, 2, 0, 2], n_parrots=[0, 7, 0, 7],
+                       windows_intact=[2 ** 40, 1, 2 ** 40, 1], windows_broken=[0, 0, 0, 0],
+                       has_intact=[True] * 4, has_broken=[True] * 4)
+    metrics = CalculatorMetrics()
+    stats = assert_same_result(PremiumCalculator(300, metrics=metrics), batch)
+
+    assert (stats.rows, stats.unique, stats.duplicates) == (4, 2, 2)
+    # calculate_premiums and price_unique_profiles both record the 4 policies
+    assert metrics.batch_policies["house"] == 4 + 4
+    assert metrics.rejections == {"TOO_MANY_PARROTS": 2 + 2}
+    assert metrics.stages["batch"].count == 2
+    assert price_unique_profiles(PremiumCalculator(300), batch.take(np.array([], dtype=np.int64)))[1].ratio == 1.0
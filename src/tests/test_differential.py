@@ -0,0 +1,64 @@
+import pytest
+from main.batch import BatchResult
+from main.differential import (AGE_SPELLINGS, ENGINES, SPARK_ENGINES, fuzz, random_portfolio, run_differential,
+                               spark_unavailable, total_mismatches)
+from tests.test_batch_pricing import AS_OF
+
+LOCAL_ENGINES = {name: engine for name, engine in ENGINES.items() if name not in SPARK_ENGINES}
+
+
+def test_local_engines_agree_on_random_portfolios():
+    report = fuzz(3000, rounds=2, as_of=AS_OF, seed=11, engines=LOCAL_ENGINES)
+
+    assert len(report) == 4
+    assert total_mismatches(report) == 0
+    for run in report:
+        assert set(run["engines"]) == set(LOCAL_ENGINES)
+        assert all(engine["policies_per_second"] > 0 for engine in run["engines"].values())
+
+
+def test_random_portfolio_covers_edge_cases():
+    vehicles, options = random_portfolio("vehicle", 2000, AS_OF, seed=4)
+    houses, _ = random_portfolio("house", 2000, AS_OF, seed=4)
+
+    assert random_portfolio("vehicle", 2000, AS_OF, seed=4) == (vehicles, options)
+    assert set(options) == {"mean_accidents", "accident_distribution", "too_old_rate", "derby_rate"}
+    spellings = {spelling for spelling in AGE_SPELLINGS for record in vehicles
+                 if record["age"] == spelling.format(record["age"].split()[0])}
+    assert len(spellings) == len(AGE_SPELLINGS)
+    assert any(set(record["windows"]) != {"intact", "broken"} for record in houses)
+
+
+def test_mismatches_are_reported_beyond_tolerance():
+    records, _ = random_portfolio("house", 500, AS_OF, seed=2)
+
+    def close(product_type, records, as_of):
+        result = ENGINES["batch"](product_type, records, as_of)
+        return BatchResult(result.premiums * (1 + 1e-12), result.rejections)
+
+    def wrong(product_type, records, as_of):
+        result = ENGINES["batch"](product_type, records, as_of)
+        premiums = result.premiums.copy()
+        premiums[0] = 1.0
+        return BatchResult(premiums, result.rejections)
+
+    report = run_differential("house", records, AS_OF, {"scalar": ENGINES["scalar"], "close": close, "wrong": wrong})
+
+    assert report["close"]["mismatches"] == 0
+    assert report["wrong"]["mismatches"] == 1
+    example = report["wrong"]["examples"][0]
+    assert (example["position"], example["actual"]["premium"]) == (0, 1.0)
+    assert example["record"] == records[0]
+
+
+def test_spark_engines_agree():
+    pytest.importorskip("pyspark")
+    reason = spark_unavailable()
+    if reason is not None:
+        pytest.skip(reason)
+    engines = {name: ENGINES[name] for name in ["scalar", "batch", *SPARK_ENGINES]}
+    for product_type in ("vehicle", "house"):
+        records, _ = random_portfolio(product_type, 1000, AS_OF, seed=6)
+        report = run_differential(product_type, records, AS_OF, engines)
+        assert all(engine.get("mismatches", 0) == 0 for engine in report.values()), report
+        assert report["spark"]["policies_per_second"] > 0
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+import numpy as np
+from main.batch import VehicleBatch, calculate_premiums
+from main.incremental import IncrementalRepricer
+from main.rules import RuleCode
+from main.synthetic import generate_vehicle_batch
+from tests.test_batch_pricing import AS_OF
+
+
+def assert_matches_full_repricing(repricer, batch):
+    expected = calculate_premiums(batch, repricer.base_rate, repricer.as_of)
+    np.testing.assert_array_equal(repricer.result.rejections, expected.rejections)
+    np.testing.assert_allclose(repricer.result.premiums, expected.premiums)
+
+
+def test_advance_matches_full_repricing():
+    batch = generate_vehicle_batch(2000, AS_OF, seed=5, mean_accidents=2.0)
+    repricer = IncrementalRepricer(batch, 500, AS_OF)
+    previous = calculate_premiums(batch, 500, AS_OF)
+
+    for days in (1, 7, 30, 400, 3 * 365, 2, -90, -1000, 6 * 365):
+        as_of = repricer.as_of + timedelta(days=days)
+        changes = repricer.advance(as_of)
+        assert_matches_full_repricing(repricer, batch)
+        expected = calculate_premiums(batch, 500, as_of)
+        moved = np.flatnonzero((expected.rejections != previous.rejections)
+                               | ~np.isclose(expected.premiums, previous.premiums, equal_nan=True))
+        np.testing.assert_array_equal(changes.policies, moved)
+        previous = expected
+    assert repricer.next_change() is None or repricer.next_change() > repricer.as_of
+
+
+def test_next_change_is_the_first_expiry():
+    accident = date(2023, 2, 17)
+    batch = VehicleBatch(age=[3], accident_offsets=[0, 1], accident_dates=[accident.toordinal()],
+                         accident_at_fault=[False])
+    repricer = IncrementalRepricer(batch, 500, AS_OF)
+
+    assert repricer.result.premiums[0] == 600
+    assert repricer.next_change() == accident + timedelta(days=3 * 365 + 1)
+    assert len(repricer.advance(repricer.next_change() - timedelta(days=1))) == 0
+    changes = repricer.advance(repricer.next_change())
+    assert list(changes.policies) == [0] and changes.premiums[0] == 500
+    assert repricer.next_change() is None and repricer.pending_events == 0
+
+
+def test_add_accidents_reprices_only_those_policies():
+    batch = VehicleBatch(age=[3, 3, 3], accident_offsets=[0, 2, 2, 2],
+                         accident_dates=[date(2024, 1, 1).toordinal()] * 2, accident_at_fault=[True, True])
+    repricer = IncrementalRepricer(batch, 500, AS_OF)
+
+    changes = repricer.add_accidents([0, 2], [date(2025, 1, 1).toordinal(), date(2015, 1, 1).toordinal()],
+                                     [True, True])
+
+    assert list(changes.policies) == [0]
+    assert changes.rejections[0] == RuleCode.DEMOLITION_DERBY
+    updated = VehicleBatch(age=[3, 3, 3], accident_offsets=[0, 3, 3, 4],
+                           accident_dates=[date(2024, 1, 1).toordinal()] * 2 + [date(2025, 1, 1).toordinal(),
+                                                                                 date(2015, 1, 1).toordinal()],
+                           accident_at_fault=[True] * 4)
+    assert_matches_full_repricing(repricer, updated)
+    repricer.advance(date(2029, 6, 1))
+    assert_matches_full_repricing(repricer, updated)
@@ -1,9 +1,10 @@
 import pytest
 from datetime import date, timedelta
-from main.policies.vehicle_policy import VehiclePolicy, AccidentHistory
+from main.policies.vehicle_policy import VehiclePolicy, AccidentHistory, AccidentLog
 from main.policies.house_policy import HousePolicy
 from main.premium_calculator import PremiumCalculator
 from main.exceptions.insurance import CarToOldException, CarDemotionDerbyException, TooManyParrotsException, BrokenWindowsException
+from main.rules import QuoteResult, RuleCode
 # Vehicle Policy Tests
 
 
@@ -56,6 +57,57 @@ def test_vehicle_policy_accident_history_mixed():
     assert isinstance(policy.accident_history[2], AccidentHistory)
     assert not policy.accident_history[2].at_fault
 
+def test_accident_log_view_and_window_counts():
+    accidents = [
+        AccidentHistory(date=date(2024, 1, 1), at_fault=True),
+        AccidentHistory(date=date(2019, 6, 1), at_fault=True),
+        AccidentHistory(date=date(2022, 3, 1), at_fault=False),
+    ]
+    policy = VehiclePolicy(age="5 years", accident_history=list(accidents))
+    assert isinstance(policy.accident_history, AccidentLog)
+    assert policy.accident_history == accidents
+    assert policy.accident_history[-2:] == accidents[-2:]
+
+    for cutoff in (date(2019, 6, 1), date(2019, 6, 2), date(2022, 3, 1), date(2025, 1, 1)):
+        expected = [a for a in accidents if a.date >= cutoff]
+        assert policy.accident_history.count_since(cutoff.toordinal()) == len(expected)
+        assert policy.accident_history.count_since(cutoff.toordinal(), at_fault_only=True) == \
+            sum(a.at_fault for a in expected)
+
+    policy.accident_history.append(AccidentHistory(date=date(2024, 6, 1), at_fault=True))
+    assert policy.accident_history.count_since(date(2023, 1, 1).toordinal(), at_fault_only=True) == 2
+
+def test_accident_log_list_operations_refresh_window_counts():
+    log = AccidentLog()
+    cutoff = date(2023, 1, 1).toordinal()
+    recent = AccidentHistory(date=date(2024, 1, 1), at_fault=True)
+    old = AccidentHistory(date=date(2019, 1, 1), at_fault=True)
+    assert log.count_since(cutoff) == 0
+
+    log.extend([old, old])
+    log.insert(0, recent)
+    assert log.count_since(cutoff, at_fault_only=True) == 1
+    log[1] = recent
+    assert log.count_since(cutoff) == 2
+    log[1:] = [old]
+    log += [recent]
+    assert log == [recent, old, recent]
+    assert log.count_since(cutoff) == 2
+    del log[0]
+    assert log.pop() == recent
+    assert log.count_since(cutoff) == 0 and len(log) == 1
+
+    with pytest.raises(TypeError):
+        log.append({"date": "2024-01-01", "at_fault": True})
+    with pytest.raises(TypeError):
+        log.ordinals[0] = 0
+    assert list(log.ordinals) == [old.date.toordinal()] and list(log.at_fault) == [1]
+
+def test_vehicle_policy_accident_history_invalid_at_fault():
+    with pytest.raises(ValueError) as e:
+        VehiclePolicy(age="25 years", accident_history=[{"date": "2023-04-23", "at_fault": "yes"}])
+    assert "at_fault must be a boolean" in str(e.value)
+
 # House Policy Tests
 def test_house_policy_valid():
     policy = HousePolicy(age="50 years", flood_risk="LOW", n_parrots=2, windows={"intact": 10, "broken": 2})
@@ -201,4 +253,33 @@ def test_calculate_home_premium_with_all_factors(premium_calculator_house):
     age_factor = 0.10
     flood_factor = 0.15
     expected_premium = 300 * (1 + age_factor + flood_factor )
-    assert premium == pytest.approx(expected_premium)
\ No newline at end of file
+    assert premium == pytest.approx(expected_premium)
+
+
+# Non-raising evaluation tests
+def test_evaluate_vehicle_rejected_without_output(premium_calculator_vehicle, capsys):
+    policy = VehiclePolicy(age="10 years", accident_history=[AccidentHistory(date=date.today(), at_fault=True)] * 3)
+    result = premium_calculator_vehicle.evaluate(policy)
+    assert result == QuoteResult(accepted=False, rule=RuleCode.DEMOLITION_DERBY, premium=None)
+    assert capsys.readouterr().out == ""
+
+def test_evaluate_vehicle_priced(premium_calculator_vehicle):
+    policy = VehiclePolicy(age="10 years", accident_history=[])
+    result = premium_calculator_vehicle.evaluate(policy)
+    assert result.accepted
+    assert result.rule == RuleCode.ACCEPTED
+    assert result.premium == premium_calculator_vehicle.calculate_premium(policy)
+
+def test_evaluate_house_rules(premium_calculator_house):
+    parrots = HousePolicy(age="20 years", n_parrots=6, windows={"intact": 10, "broken": 2})
+    windows = HousePolicy(age="20 years", n_parrots=2, windows={"intact": 2, "broken": 10})
+    no_windows = HousePolicy(age="20 years", n_parrots=2, windows={})
+    assert premium_calculator_house.evaluate(parrots).rule == RuleCode.TOO_MANY_PARROTS
+    assert premium_calculator_house.evaluate(windows).rule == RuleCode.BROKEN_WINDOWS
+    assert premium_calculator_house.evaluate(no_windows).rule == RuleCode.INVALID_WINDOWS
+
+def test_rule_exception_message(premium_calculator_house):
+    policy = HousePolicy(age="20 years", n_parrots=6, windows={"intact": 10, "broken": 2})
+    with pytest.raises(TooManyParrotsException) as e:
+        premium_calculator_house.calculate_premium(policy)
+    assert str(e.value) == "Too many parrots"
@@ -0,0 +1,118 @@
+import json
+import time
+import pytest
+from main import quoting
+from main.batch import VehicleBatch
+from main.exceptions.insurance import CarToOldException
+from main.metrics import CalculatorMetrics, Histogram, StatsDumper
+from main.policies.house_policy import HousePolicy
+from main.policies.vehicle_policy import VehiclePolicy
+from main.premium_calculator import PremiumCalculator
+from tests.test_batch_pricing import AS_OF, random_house_policies, random_vehicle_policies
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+    assert Histogram().quantile(0.5) is None
+
+
+def test_instrumented_calculator_gives_the_same_results():
+    policies = random_vehicle_policies(300) + random_house_policies(300)
+    metrics = CalculatorMetrics()
+    plain, instrumented = PremiumCalculator(500, as_of=AS_OF), PremiumCalculator(500, as_of=AS_OF, metrics=metrics)
+
+    results = [instrumented.evaluate(policy) for policy in policies]
+
+    assert results == [plain.evaluate(policy) for policy in policies]
+    rejected = [result for result in results if not result.accepted]
+    assert sum(metrics.rejections.values()) == len(rejected)
+    assert sum(metrics.quotes.values()) == metrics.stages["evaluate"].count == len(policies)
+    assert metrics.stages["price"].count == len(results) - len(rejected)
+    checks = metrics.snapshot()["rule_checks"]
+    assert checks["CAR_TOO_OLD"] == checks["TOO_MANY_PARROTS"] == 300
+    assert checks["DEMOLITION_DERBY"] == 300 - metrics.rejections["CAR_TOO_OLD"]
+    assert metrics.rule_hits == metrics.rejections
+
+
+def test_windows_check_records_the_rule_that_applied():
+    metrics = CalculatorMetrics()
+    calculator = PremiumCalculator(300, metrics=metrics)
+    calculator.evaluate(HousePolicy(age="30 years", n_parrots=0, windows={"intact": 3}))
+    calculator.evaluate(HousePolicy(age="30 years", n_parrots=0, windows={"broken": 1}))
+
+    assert metrics.snapshot()["rule_checks"] == {"TOO_MANY_PARROTS": 2, "INVALID_WINDOWS": 1, "BROKEN_WINDOWS": 1}
+    assert metrics.rule_hits == {"INVALID_WINDOWS": 1, "BROKEN_WINDOWS": 1}
+    assert 'premium_rule_hits_total{rule="INVALID_WINDOWS"} 1' in metrics.to_prometheus()
+
+
+def test_exceptions_and_batches_are_counted():
+    metrics = CalculatorMetrics()
+    calculator = PremiumCalculator(500, as_of=AS_OF, metrics=metrics)
+    with pytest.raises(CarToOldException):
+        calculator.calculate_premium(VehiclePolicy(age="16 years", accident_history=[]))
+    calculator.calculate_premiums(VehicleBatch.from_policies(random_vehicle_policies(200)))
+
+    assert metrics.exceptions == {"CAR_TOO_OLD": 1}
+    assert metrics.batch_policies["vehicle"] == 200
+    assert metrics.quotes["vehicle", "accepted"] + metrics.quotes["vehicle", "rejected"] == 201
+    assert metrics.stages["batch"].count == 1
+
+
+def test_prometheus_export(tmp_path):
+    metrics = CalculatorMetrics()
+    calculator = PremiumCalculator(300, metrics=metrics)
+    calculator.evaluate(HousePolicy(age="30 years", n_parrots=7, windows={"broken": 0}))
+
+    text = metrics.to_prometheus()
+
+    assert '# TYPE premium_rejections_total counter' in text
+    assert 'premium_rejections_total{rule="TOO_MANY_PARROTS"} 1' in text
+    assert 'premium_rule_seconds_bucket{rule="TOO_MANY_PARROTS",le="+Inf"} 1' in text
+    assert 'premium_stage_seconds_count{stage="evaluate"} 1' in text
+    for line in text.splitlines():
+        assert line.startswith("#") or len(line.rsplit(" ", 1)) == 2
+
+    path = tmp_path / "metrics.json"
+    dumper = StatsDumper(metrics, str(path), interval=60, format="json")
+    dumper.start()
+    dumper.stop()
+    assert json.loads(path.read_text())["rejections"] == {"TOO_MANY_PARROTS": 1}
+
+
+def test_stats_dumper_survives_write_errors(tmp_path, capsys):
+    metrics = CalculatorMetrics()
+    path = tmp_path / "metrics.prom"
+    dumper = StatsDumper(metrics, str(tmp_path / "missing" / "metrics.prom"), interval=0.01)
+    dumper.start()
+    deadline = time.monotonic() + 5
+    while dumper.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    dumper.path = str(path)
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    dumper.stop()
+
+    assert isinstance(dumper.error, OSError)
+    assert "Could not write the metrics" in capsys.readouterr().err
+    assert path.exists()
+
+
+def test_quoting_instrumentation():
+    metrics = CalculatorMetrics()
+    quoting.instrument(metrics)
+    try:
+        quoting.quote("vehicle", {"age": "3 years", "accident_history": []})
+        quoting.quote("vehicle", {"age": "three", "accident_history": []})
+        quoting.quote_many([("house", {"age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {"broken": 0}})])
+    finally:
+        quoting.instrument(None)
+
+    assert metrics.stages["validate"].count == 3
+    assert +metrics.quotes == {("vehicle", "accepted"): 1, ("house", "accepted"): 1}
+    assert quoting.METRICS is None
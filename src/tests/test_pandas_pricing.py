@@ -0,0 +1,51 @@
+import math
+import pytest
+from datetime import date
+
+pd = pytest.importorskip("pandas")
+
+import numpy as np
+from main.pandas_pricing import price_house_frame, price_vehicle_frame
+from main.quoting import quote
+from main.rules import RuleCode
+
+AS_OF = date(2025, 2, 17)
+
+
+def test_vehicle_frame_rejects_invalid_ages_like_quote():
+    # the frame Spark hands to mapInPandas: age_years is null for "3 months", None and -1
+    ages = ["6 years", "3 months", None, "-1 years", "16 years"]
+    pdf = pd.DataFrame({
+        "policy_type": ["vehicle"] * 5,
+        "_age": [6, 0, 0, 0, 16],
+        "_invalid_age": [False, True, True, True, False],
+        "_accidents": [0] * 5,
+        "_accident_dates": [np.array([], dtype=np.int64)] * 5,
+        "_accident_at_fault": [np.array([], dtype=bool)] * 5,
+    })
+
+    out = price_vehicle_frame(pdf, 500, AS_OF)
+
+    assert list(out.columns) == ["policy_type", "rule_code", "premium"]
+    for age, (_, row) in zip(ages, out.iterrows()):
+        expected = quote("vehicle", {"age": age, "accident_history": []})
+        if expected["outcome"] == "ERROR":
+            assert row["rule_code"] == RuleCode.INVALID_AGE and math.isnan(row["premium"])
+        elif expected["outcome"] == "BLOCKED":
+            assert RuleCode(row["rule_code"]).name == expected["rule"] and math.isnan(row["premium"])
+        else:
+            assert (row["rule_code"], row["premium"]) == (RuleCode.ACCEPTED, expected["premium"])
+
+
+def test_house_frame_rejects_invalid_ages():
+    pdf = pd.DataFrame({
+        "_age": [25, 0], "_invalid_age": [False, True], "_flood_risk": [1, 1], "_n_parrots": [0, 0],
+        "_intact": [4, 4], "_broken": [0, 0], "_has_intact": [True, True], "_has_broken": [True, True],
+    })
+
+    out = price_house_frame(pdf, 300)
+
+    assert list(out["rule_code"]) == [RuleCode.ACCEPTED, RuleCode.INVALID_AGE]
+    assert out["premium"][0] == quote("house", {"age": "25 years", "flood_risk": "MEDIUM", "n_parrots": 0,
+                                                "windows": {"intact": 4, "broken": 0}})["premium"]
+    assert math.isnan(out["premium"][1])
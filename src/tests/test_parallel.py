@@ -0,0 +1,38 @@
+import numpy as np
+from datetime import date
+from main.batch import calculate_premiums
+from main.parallel import price_portfolio_parallel
+from main.synthetic import generate_house_batch, generate_vehicle_batch
+
+AS_OF = date(2025, 2, 17)
+
+
+def test_parallel_vehicle_matches_serial():
+    batch = generate_vehicle_batch(20_000, AS_OF, seed=1)
+    expected = calculate_premiums(batch, 500, AS_OF)
+
+    result = price_portfolio_parallel(batch, 500, AS_OF, workers=2)
+
+    np.testing.assert_array_equal(result.rejections, expected.rejections)
+    np.testing.assert_array_equal(result.premiums, expected.premiums)
+
+
+def test_parallel_house_matches_serial():
+    batch = generate_house_batch(20_000, seed=2)
+    expected = calculate_premiums(batch, 300, AS_OF)
+
+    result = price_portfolio_parallel(batch, 300, AS_OF, workers=3, shards_per_worker=7)
+
+    np.testing.assert_array_equal(result.rejections, expected.rejections)
+    np.testing.assert_array_equal(result.premiums, expected.premiums)
+
+
+def test_vehicle_batch_slice_rebases_offsets():
+    batch = generate_vehicle_batch(100, AS_OF, seed=3, mean_accidents=3)
+    part = batch.slice(40, 60)
+    expected = calculate_premiums(batch, 500, AS_OF)
+
+    result = calculate_premiums(part, 500, AS_OF)
+
+    assert part.accident_offsets[0] == 0
+    np.testing.assert_array_equal(result.premiums, expected.premiums[40:60])
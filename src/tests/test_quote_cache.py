@@ -0,0 +1,109 @@
+import time
+import pytest
+from datetime import date
+from main.exceptions.insurance import CarToOldException
+from main.policies.house_policy import HousePolicy
+from main.policies.vehicle_policy import VehiclePolicy
+from main.premium_calculator import PremiumCalculator
+from main.quote_cache import QuoteCache, policy_key
+from main.rate_tables import DEFAULT_RATES, RateTable
+
+AS_OF = date(2025, 2, 17)
+
+
+def vehicle(age="6 years", history=None):
+    return VehiclePolicy(age=age, accident_history=history if history is not None else
+                         [{"date": "2024-01-12", "at_fault": False}, {"date": "2023-04-23", "at_fault": True}])
+
+
+def test_cache_hits_misses_and_key_normalization():
+    cache = QuoteCache(PremiumCalculator(500, as_of=AS_OF))
+    reordered = vehicle(history=[{"date": "2023-04-23", "at_fault": True}, {"date": "2024-01-12", "at_fault": False}])
+
+    first = cache.evaluate(vehicle())
+    second = cache.evaluate(reordered)
+
+    assert first == second == PremiumCalculator(500, as_of=AS_OF).evaluate(vehicle())
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_cache_lru_eviction():
+    cache = QuoteCache(PremiumCalculator(500, as_of=AS_OF), max_entries=2)
+    for age in ("1 years", "2 years", "3 years", "1 years"):
+        cache.evaluate(vehicle(age=age, history=[]))
+    assert len(cache) == 2
+    assert cache.stats.evictions == 2
+    assert cache.stats.misses == 4
+
+
+def test_cache_invalidated_on_pricing_date_change():
+    calculator = PremiumCalculator(500, as_of=date(2027, 1, 11))
+    cache = QuoteCache(calculator)
+    assert cache.evaluate(vehicle()).premium == pytest.approx(500 * 1.25)
+
+    calculator.as_of = date(2027, 1, 12)  # the 2024-01-12 accident leaves the 3 years window
+    assert cache.evaluate(vehicle()).premium == pytest.approx(500 * 1.05)
+    assert cache.stats.invalidations == 1
+    assert cache.stats.hits == 0
+
+
+def test_cache_sqlite_tier_shared(tmp_path):
+    path = str(tmp_path / "quotes.sqlite")
+    writer = QuoteCache(PremiumCalculator(300, as_of=AS_OF), path=path)
+    house = HousePolicy(age="25 years", flood_risk="MEDIUM", n_parrots=1, windows={"intact": 4, "broken": 1})
+    expected = writer.evaluate(house)
+
+    reader = QuoteCache(PremiumCalculator(300, as_of=AS_OF), path=path)
+    assert reader.evaluate(house) == expected
+    assert (reader.stats.disk_hits, reader.stats.misses) == (1, 0)
+    writer.close()
+    reader.close()
+
+
+def test_cache_sqlite_rows_of_other_pricing_dates_are_kept(tmp_path):
+    path = str(tmp_path / "quotes.sqlite")
+    backdated = QuoteCache(PremiumCalculator(500, as_of=AS_OF), path=path)
+    backdated.evaluate(vehicle())
+    calculator = PremiumCalculator(500, as_of=date(2027, 1, 11))
+    live = QuoteCache(calculator, path=path, ttl=3600)
+    live.evaluate(vehicle())
+    calculator.as_of = date(2027, 1, 12)  # rolling forward keeps the other dates' rows
+    live.evaluate(vehicle())
+
+    reader = QuoteCache(PremiumCalculator(500, as_of=AS_OF), path=path)
+    reader.evaluate(vehicle())
+    assert (reader.stats.disk_hits, reader.stats.misses) == (1, 0)
+    rows = live._db.execute("SELECT pricing_date FROM quotes ORDER BY pricing_date").fetchall()
+    assert rows == [(AS_OF.toordinal(),), (date(2027, 1, 11).toordinal(),), (date(2027, 1, 12).toordinal(),)]
+
+    assert live.expire(now=time.time() + 7200) == 3
+    assert live.stats.expired == 3
+    for cache in (backdated, live, reader):
+        cache.close()
+
+
+def test_cache_calculate_premium_raises_rule_exception():
+    cache = QuoteCache(PremiumCalculator(500, as_of=AS_OF))
+    with pytest.raises(CarToOldException):
+        cache.calculate_premium(vehicle(age="16 years"))
+
+
+def test_policy_key_depends_on_base_rate_and_date():
+    policy = vehicle()
+    assert policy_key(policy, 500, AS_OF) != policy_key(policy, 300, AS_OF)
+    assert policy_key(policy, 500, AS_OF) != policy_key(policy, 500, date(2025, 2, 18))
+
+
+def test_tables_sharing_a_version_do_not_share_cached_quotes(tmp_path):
+    path = str(tmp_path / "quotes.sqlite")
+    spec = {**DEFAULT_RATES, "version": "2025-03"}
+    cheap = RateTable.compile(spec)
+    dear = RateTable.compile({**spec, "vehicle": {**DEFAULT_RATES["vehicle"], "base_rate": 900}})
+    first = QuoteCache(PremiumCalculator(as_of=AS_OF, rate_table=cheap), path=path).evaluate(vehicle())
+
+    cache = QuoteCache(PremiumCalculator(as_of=AS_OF, rate_table=dear), path=path)
+    second = cache.evaluate(vehicle())
+
+    assert second == PremiumCalculator(as_of=AS_OF, rate_table=dear).evaluate(vehicle()) != first
+    assert cache.stats.disk_hits == 0
+    assert cheap.digest == RateTable.compile(spec).digest != dear.digest
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import subprocess
+import sys
+import pytest
+from main.daemon_client import daemon_quote, daemon_request
+from main.quote_client import SAMPLE_RECORDS
+from main.quote_daemon import QuoteDaemon
+from main.quoting import quote
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_with_daemon(path, client):
+    """
+    Runs the blocking client(path) in a worker thread while a daemon serves path.
+    """
+    async def scenario():
+        daemon = QuoteDaemon(str(path))
+        await daemon.start()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, client, str(path))
+        finally:
+            await daemon.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_daemon_quotes_match_direct_quotes(tmp_path):
+    requests = [(record["product_type"], {k: v for k, v in record.items() if k != "product_type"})
+                for record in SAMPLE_RECORDS]
+    requests += [("house", {"age": "3 years"}), ("boat", {})]
+
+    def client(path):
+        return ([daemon_quote(product_type, payload, path) for product_type, payload in requests],
+                daemon_request({"command": "stats"}, path))
+
+    replies, stats = run_with_daemon(tmp_path / "quote.sock", client)
+
+    assert replies == [quote(product_type, payload) for product_type, payload in requests]
+    assert stats["requests"] == len(requests)
+    assert stats["rate_version"] == "builtin"
+    assert not (tmp_path / "quote.sock").exists()
+
+
+def test_no_daemon_returns_none(tmp_path):
+    assert daemon_quote("vehicle", {"age": "3 years", "accident_history": []}, str(tmp_path / "none.sock")) is None
+
+
+def test_stale_socket_is_replaced_and_live_one_refused(tmp_path):
+    path = tmp_path / "quote.sock"
+    path.touch()
+    assert run_with_daemon(path, lambda p: daemon_quote("vehicle", {"age": "3 years", "accident_history": []}, p)
+                           )["premium"] == 500
+
+    async def twice():
+        first = QuoteDaemon(str(path))
+        await first.start()
+        try:
+            with pytest.raises(RuntimeError, match="already listening"):
+                await QuoteDaemon(str(path)).start()
+        finally:
+            await first.stop()
+
+    asyncio.run(twice())
+
+
+def test_app_falls_back_without_daemon_and_client_imports_no_numpy(tmp_path):
+    environment = dict(os.environ, PREMIUM_QUOTE_SOCKET=str(tmp_path / "none.sock"))
+    completed = subprocess.run([sys.executable, "app.py", "vehicle", '{"age": "3 years", "accident_history": []}'],
+                               cwd=SRC, env=environment, capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "Premium for vehicle policy: $500.00"
+
+    imported = subprocess.run([sys.executable, "-c", "import sys, main.daemon_client; print('numpy' in sys.modules)"],
+                              cwd=SRC, capture_output=True, text=True, check=True)
+    assert imported.stdout.strip() == "False"
+
+
+def test_single_quote_imports_no_numpy():
+    script = ("import sys; from main.quoting import quote; "
+              "quote('vehicle', {'age': '7 years', 'accident_history': []}); "
+              "quote('house', {'age': '30 years', 'flood_risk': 'HIGH', 'n_parrots': 0, 'windows': {'broken': 0}}); "
+              "print(sorted(name for name in ('numpy', 'main.batch') if name in sys.modules))")
+    imported = subprocess.run([sys.executable, "-c", script], cwd=SRC, capture_output=True, text=True, check=True)
+    assert imported.stdout.strip() == "[]"
@@ -0,0 +1,51 @@
+import asyncio
+from main.quote_client import SAMPLE_RECORDS, load_test, request
+from main.quote_server import MicroBatcher, QuoteServer, percentile
+from main.quoting import quote, quote_many
+
+
+def test_quote_many_matches_quote():
+    requests = [(record["product_type"], {k: v for k, v in record.items() if k != "product_type"})
+                for record in SAMPLE_RECORDS]
+    requests += [("house", {"age": "3 years"}), ("boat", {}),
+                 ("house", {"age": "3 years", "flood_risk": "LOW", "n_parrots": 0, "windows": {}})]
+    assert quote_many(requests) == [quote(product_type, payload) for product_type, payload in requests]
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(range(1, 101), 99) == 99
+
+
+def test_server_micro_batches_concurrent_requests():
+    async def scenario():
+        batches = []
+
+        def price_batch(requests):
+            batches.append(len(requests))
+            return quote_many(requests)
+
+        server = QuoteServer(MicroBatcher(price_batch, max_batch_size=16, max_wait=0.05), port=0)
+        await server.start()
+        try:
+            report = await load_test(server.host, server.port, n_requests=64, concurrency=32)
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            ok = await request(reader, writer, "POST", "/quote", dict(SAMPLE_RECORDS[2], request_id="r1"))
+            missing = await request(reader, writer, "GET", "/nothing")
+            writer.close()
+        finally:
+            await server.stop()
+        return batches, report, ok, missing
+
+    batches, report, ok, missing = asyncio.run(scenario())
+
+    assert sum(batches) == 65
+    assert max(batches) <= 16
+    assert len(batches) < 65
+    assert report["server"]["requests"] == 64
+    assert report["server"]["latency_ms"]["p99"] is not None
+    assert ok["request_id"] == "r1"
+    assert ok["outcome"] == "OK"
+    assert ok["premium"] == 500
+    assert "Unknown route" in missing["message"]
@@ -0,0 +1,115 @@
+import json
+import os
+import numpy as np
+import pytest
+from main import quoting
+from main.batch import HouseBatch, VehicleBatch
+from main.premium_calculator import PremiumCalculator
+from main.rate_tables import DEFAULT_RATE_TABLE, DEFAULT_RATES, RateTable, RateTableStore
+from main.rules import RuleCode
+from tests.test_batch_pricing import AS_OF, random_house_policies, random_vehicle_policies
+
+
+def rates(version, vehicle_base_rate=500, crash_course_fee=0.20):
+    return {"version": version,
+            "vehicle": {**DEFAULT_RATES["vehicle"], "base_rate": vehicle_base_rate, "crash_course_fee": crash_course_fee},
+            "house": dict(DEFAULT_RATES["house"])}
+
+
+def write_rates(path, spec):
+    path.write_text(json.dumps(spec))
+
+
+@pytest.mark.parametrize("policies, batch_type, base_rate", [
+    (random_vehicle_policies(500), VehicleBatch, 500),
+    (random_house_policies(500), HouseBatch, 300),
+])
+def test_default_table_is_bit_identical(policies, batch_type, base_rate):
+    arithmetic = PremiumCalculator(base_rate, as_of=AS_OF)
+    table = PremiumCalculator(as_of=AS_OF, rate_table=DEFAULT_RATE_TABLE)
+
+    assert [table.evaluate(p) for p in policies] == [arithmetic.evaluate(p) for p in policies]
+    batch = batch_type.from_policies(policies)
+    expected, result = arithmetic.calculate_premiums(batch), table.calculate_premiums(batch)
+    np.testing.assert_array_equal(result.rejections, expected.rejections)
+    np.testing.assert_array_equal(result.premiums, expected.premiums)
+
+
+def test_table_lookups():
+    table = RateTable.compile(rates("v2", vehicle_base_rate=600, crash_course_fee=0.25))
+
+    assert table.vehicle_premium(7, 2) == pytest.approx(600 * (1 + 0.10 + 0.50))
+    # Beyond the lookup arrays the arithmetic is used
+    assert table.vehicle_premium(7, 40) == pytest.approx(600 * (1 + 0.10 + 10.0))
+    np.testing.assert_allclose(table.vehicle_premiums(np.array([7, 3]), np.array([40, 1])),
+                               [600 * 11.1, 600 * 1.25])
+    assert table.house_premium(80, "HIGH") == pytest.approx(300 * 1.25)
+    assert table.base_rate("vehicle") == 600
+
+
+@pytest.mark.parametrize("spec", [
+    {"vehicle": DEFAULT_RATES["vehicle"], "house": DEFAULT_RATES["house"]},
+    {"version": "v2", "vehicle": DEFAULT_RATES["vehicle"]},
+    {"version": "v2", "vehicle": {**DEFAULT_RATES["vehicle"], "vintage_tax": "5%"}, "house": DEFAULT_RATES["house"]},
+    {"version": "v2", "vehicle": DEFAULT_RATES["vehicle"], "house": {**DEFAULT_RATES["house"], "retro_age": -1}},
+    {"version": "v2", "vehicle": DEFAULT_RATES["vehicle"], "house": {**DEFAULT_RATES["house"], "retro_age": 20.5}},
+    {"version": "v2", "vehicle": {**DEFAULT_RATES["vehicle"], "vintage_age": -5}, "house": DEFAULT_RATES["house"]},
+])
+def test_invalid_rate_tables(spec):
+    with pytest.raises(ValueError):
+        RateTable.compile(spec)
+
+
+def test_store_hot_reload(tmp_path):
+    path = tmp_path / "rates.json"
+    write_rates(path, rates("v1"))
+    store = RateTableStore(str(path))
+    first = store.current
+
+    assert first.version == "v1" and not store.reload()
+
+    write_rates(path, rates("v2", vehicle_base_rate=650))
+    os.utime(path, ns=(1, 1))
+    assert store.reload()
+    assert store.current.version == "v2" and first.version == "v1"
+
+    path.write_text("{not json")
+    assert not store.reload()
+    assert store.current.version == "v2" and store.last_error is not None
+
+
+def test_store_reload_compares_the_content(tmp_path):
+    path = tmp_path / "rates.json"
+    write_rates(path, rates("v1", vehicle_base_rate=500))
+    store = RateTableStore(str(path))
+    first = store.current
+
+    # touched, same content: the table is kept
+    os.utime(path, ns=(1, 1))
+    assert not store.reload() and store.current is first
+
+    # rewritten with the same size and modification time: the change is still seen
+    status = os.stat(path)
+    write_rates(path, rates("v1", vehicle_base_rate=900))
+    os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns))
+    assert os.stat(path).st_size == status.st_size
+    assert store.reload()
+    assert store.current.base_rate("vehicle") == 900 and store.current.digest != first.digest
+
+
+def test_quotes_record_the_rate_version(monkeypatch):
+    payload = {"age": "6 years", "accident_history": []}
+    assert quoting.quote("vehicle", payload)["rate_version"] == "builtin"
+
+    monkeypatch.setattr(quoting.RATES, "current", RateTable.compile(rates("2025-03", vehicle_base_rate=1000)))
+    result = quoting.quote("vehicle", payload)
+    assert result["rate_version"] == "2025-03"
+    assert result["premium"] == pytest.approx(1050)
+    [batched] = quoting.quote_many([("vehicle", payload)])
+    assert batched["rate_version"] == "2025-03" and batched["premium"] == result["premium"]
+    assert quoting.quote("boat", payload)["rate_version"] is None
+
+
+def test_blocked_quotes_record_the_rate_version():
+    result = quoting.quote("vehicle", {"age": "16 years", "accident_history": []})
+    assert result["rule"] == RuleCode.CAR_TOO_OLD.name and result["rate_version"] == "builtin"
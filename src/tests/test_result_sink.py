@@ -0,0 +1,120 @@
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from datetime import date
+import pytest
+from main import quoting
+from main.quoting import quote
+from main.result_sink import ResultSink, read_segments, segment_numbers
+from main.streaming import record_quotes
+
+PRICING_DATE = date(2025, 2, 17)
+OK = {"outcome": "OK", "premium": 525.0, "rule": None, "message": "Premium for vehicle policy: $525.00",
+      "rate_version": "builtin"}
+BLOCKED = {"outcome": "BLOCKED", "premium": None, "rule": "CAR_TOO_OLD", "message": "Blocked by UW Rules",
+           "rate_version": "builtin"}
+
+
+def test_segments_rotate_and_are_never_reopened(tmp_path):
+    with ResultSink(str(tmp_path), segment_bytes=200, buffer_records=10) as sink:
+        for i in range(100):
+            sink.append(f"r{i}", "vehicle", OK if i % 3 else BLOCKED, PRICING_DATE)
+    first = segment_numbers(str(tmp_path))
+    with ResultSink(str(tmp_path)) as sink:
+        sink.append("last", "house", OK, PRICING_DATE)
+
+    assert len(first) > 1
+    assert segment_numbers(str(tmp_path)) == first + [first[-1] + 1]
+    assert all(path.endswith(".ndjson.gz") for path in sink.segments)
+    records = list(read_segments(str(tmp_path)))
+    assert [record["request_id"] for record in records] == [f"r{i}" for i in range(100)] + ["last"]
+    assert records[0] == {"request_id": "r0", "product_type": "vehicle", "outcome": "BLOCKED", "premium": None,
+                          "rule": "CAR_TOO_OLD", "rate_version": "builtin", "pricing_date": "2025-02-17"}
+    assert records[1]["premium"] == 525.0
+    with gzip.open(tmp_path / "quotes-000001.ndjson.gz", "rt") as segment:
+        assert json.loads(segment.readline()) == records[0]
+
+
+def test_segment_of_a_crashed_writer_is_read_up_to_the_last_flush(tmp_path):
+    sink = ResultSink(str(tmp_path), buffer_records=2)
+    for i in range(4):
+        sink.append(i, "vehicle", OK, PRICING_DATE)
+    sink.flush()
+    # crash: the gzip trailer is never written and the last line is cut short
+    sink._stream.write(b'{"request_id":4,"product')
+    sink._stream.flush()
+    path = sink.segments[0]
+    with open(path, "rb") as segment:
+        truncated = segment.read()
+    sink.close()
+    with open(path, "wb") as segment:
+        segment.write(truncated)
+
+    assert [record["request_id"] for record in read_segments(str(tmp_path))] == [0, 1, 2, 3]
+
+
+def test_partial_buffer_is_written_after_flush_interval(tmp_path):
+    sink = ResultSink(str(tmp_path), compress=False, buffer_records=1000, flush_interval=0.02)
+    sink.append(1, "house", OK, PRICING_DATE)
+    deadline = time.monotonic() + 5
+    while sink.records == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        assert [record["request_id"] for record in read_segments(str(tmp_path))] == [1]
+    finally:
+        sink.close()
+    with pytest.raises(ValueError, match="closed"):
+        sink.append(2, "house", OK, PRICING_DATE)
+
+
+def test_flush_interval_writes_keep_the_append_order(tmp_path):
+    sink = ResultSink(str(tmp_path), compress=False, buffer_records=3, flush_interval=0.001)
+    hand_off, late = sink._queue.put, []
+
+    def slow_hand_off(records):
+        # Another thread appends while the full buffer is being handed off, and the
+        # writer times out meanwhile: its partial write must not overtake the buffer
+        if records and records[0][0] == 0:
+            late.append(threading.Thread(target=sink.append, args=(3, "vehicle", OK, PRICING_DATE)))
+            late[0].start()
+            time.sleep(0.05)
+        hand_off(records)
+
+    sink._queue.put = slow_hand_off
+    for i in range(3):
+        sink.append(i, "vehicle", OK, PRICING_DATE)
+    late[0].join()
+    sink.close()
+
+    assert [record["request_id"] for record in read_segments(str(tmp_path))] == [0, 1, 2, 3]
+
+
+def test_writer_errors_surface_on_flush(tmp_path):
+    sink = ResultSink(str(tmp_path), compress=False)
+    # Another writer took the next segment: the sink must not overwrite it
+    (tmp_path / "quotes-000001.ndjson").write_text("taken\n")
+    sink.append(1, "vehicle", OK, PRICING_DATE)
+    with pytest.raises(OSError, match="Result sink writer failed"):
+        sink.flush()
+    with pytest.raises(OSError):
+        sink.close()
+    assert (tmp_path / "quotes-000001.ndjson").read_text() == "taken\n"
+
+
+def test_record_quotes(tmp_path, monkeypatch):
+    # stamped with the date the quote calculator priced as of, not today
+    monkeypatch.setattr(quoting._calculator(quoting.RATES.current, quoting.METRICS), "as_of", PRICING_DATE)
+    source = io.StringIO('{"request_id": "a", "product_type": "vehicle", "age": "3 years", "accident_history": []}\n'
+                         'not json\n')
+    with ResultSink(str(tmp_path)) as sink:
+        stats = record_quotes(source, sink)
+
+    assert stats.outcomes == {"OK": 1, "ERROR": 1}
+    first, second = read_segments(str(tmp_path))
+    assert first["premium"] == quote("vehicle", {"age": "3 years", "accident_history": []})["premium"]
+    assert (first["pricing_date"], first["rate_version"]) == (PRICING_DATE.isoformat(), "builtin")
+    assert (second["request_id"], second["outcome"], second["rule"]) == (2, "ERROR", None)
+    assert os.listdir(tmp_path) == ["quotes-000001.ndjson.gz"]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from datetime import date
+from main.batch import HouseBatch, VehicleBatch
+from main.premium_calculator import PremiumCalculator
+from main.rule_engine import HOUSE_RULES, VEHICLE_RULES, RuleEngine
+from main.policies.house_policy import HousePolicy
+from main.policies.vehicle_policy import VehiclePolicy
+from main.rules import QuoteResult, RuleCode
+from tests.test_batch_pricing import AS_OF, random_house_policies, random_vehicle_policies
+
+
+@pytest.mark.parametrize("rules, base_rate, make_policies, batch_type", [
+    (VEHICLE_RULES, 500, random_vehicle_policies, VehicleBatch),
+    (HOUSE_RULES, 300, random_house_policies, HouseBatch),
+])
+def test_engine_matches_premium_calculator(rules, base_rate, make_policies, batch_type):
+    policies = make_policies(400)
+    calculator = PremiumCalculator(base_rate, as_of=AS_OF)
+    engine = RuleEngine(rules, base_rate, as_of=AS_OF, adaptive=False)
+    expected = [calculator.evaluate(policy) for policy in policies]
+
+    assert [engine.evaluate(policy) for policy in policies] == expected
+
+    result = engine.evaluate_batch(batch_type.from_policies(policies))
+    assert list(result.rejections) == [e.rule for e in expected]
+    np.testing.assert_array_equal(result.premiums, [np.nan if e.premium is None else e.premium for e in expected])
+
+
+def test_adaptive_engine_reorders_by_selectivity():
+    engine = RuleEngine(VEHICLE_RULES, 500, as_of=AS_OF, reorder_every=10)
+    at_fault = [{"date": "2024-01-01", "at_fault": True}] * 3
+    policies = [VehiclePolicy(age="3 years", accident_history=at_fault)] * 20
+
+    results = [engine.evaluate(policy) for policy in policies]
+
+    assert all(r.rule == RuleCode.DEMOLITION_DERBY for r in results)
+    assert [rule["code"] for rule in engine.stats()] == ["DEMOLITION_DERBY", "CAR_TOO_OLD"]
+    assert engine.stats()[0]["hit_rate"] == 1.0
+
+
+def test_adaptive_engine_keeps_input_validation_in_place():
+    engine = RuleEngine(HOUSE_RULES, 300, as_of=AS_OF, reorder_every=10)
+    calculator = PremiumCalculator(300, as_of=AS_OF)
+    invalid = HousePolicy(age="3 years", flood_risk="LOW", n_parrots=0, windows={"intact": 2})
+    parrots = HousePolicy(age="3 years", flood_risk="LOW", n_parrots=7, windows={"intact": 2})
+
+    for _ in range(20):
+        engine.evaluate(invalid)
+
+    assert engine.stats()[-1] == {"code": "INVALID_WINDOWS", "evaluated": 20, "hits": 20, "hit_rate": 1.0}
+    assert engine.evaluate(parrots) == calculator.evaluate(parrots) == QuoteResult.rejected(RuleCode.TOO_MANY_PARROTS)
+
+
+def test_adaptive_engine_keeps_premiums():
+    policies = random_vehicle_policies(300, seed=5)
+    calculator = PremiumCalculator(500, as_of=AS_OF)
+    engine = RuleEngine(VEHICLE_RULES, 500, as_of=AS_OF, reorder_every=16)
+
+    for policy in policies:
+        result, expected = engine.evaluate(policy), calculator.evaluate(policy)
+        assert result.accepted == expected.accepted
+        assert result.premium == expected.premium
+
+
+def test_engine_rejects_unknown_feature():
+    rules = {"product": "house", "reject": [{"code": "TOO_MANY_PARROTS", "feature": "cats", "op": ">", "value": 1}],
+             "factors": []}
+    with pytest.raises(ValueError) as e:
+        RuleEngine(rules, 300)
+    assert "Unknown feature 'cats'" in str(e.value)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from main.batch import AT_FAULT_WINDOW_DAYS, RECENT_ACCIDENTS_WINDOW_DAYS, VehicleBatch, calculate_premiums
+from main.rules import RuleCode
+from main.scenarios import (HouseScenario, VehicleScenario, run_scenarios, scenario_grid,
+                            summarize_scenarios)
+from main.synthetic import generate_house_batch, generate_vehicle_batch
+from tests.test_batch_pricing import AS_OF
+
+
+def test_vehicle_scenarios_match_calculate_premiums():
+    batch = generate_vehicle_batch(3000, AS_OF, seed=2, mean_accidents=2.0)
+    grid = scenario_grid(VehicleScenario, max_age=[15, 18], crash_course_fee=[0.20, 0.25])
+
+    result = run_scenarios(batch, grid, AS_OF)
+
+    assert result.premiums.shape == result.rejections.shape == (4, 3000)
+    assert grid[0].name == "max_age=15,crash_course_fee=0.2"
+    expected = calculate_premiums(batch, 500, AS_OF)
+    np.testing.assert_array_equal(result.rejections[0], expected.rejections)
+    np.testing.assert_allclose(result.premiums[0], expected.premiums)
+    # A higher age limit accepts strictly more cars, never fewer
+    assert (result.rejections[2] == RuleCode.ACCEPTED).sum() > (result.rejections[0] == RuleCode.ACCEPTED).sum()
+    assert np.nansum(result.premiums[1]) > np.nansum(result.premiums[0])
+
+
+def test_house_scenarios_match_calculate_premiums():
+    batch = generate_house_batch(3000, seed=2)
+    scenarios = [HouseScenario(), HouseScenario(name="no parrots", max_parrots=0, flood_boost=0.3)]
+
+    result = run_scenarios(batch, scenarios, AS_OF)
+
+    expected = calculate_premiums(batch, 300, AS_OF)
+    np.testing.assert_array_equal(result.rejections[0], expected.rejections)
+    np.testing.assert_allclose(result.premiums[0], expected.premiums)
+    assert set(result.rejections[1][batch.n_parrots > 0]) == {RuleCode.TOO_MANY_PARROTS}
+
+
+def test_accidents_expire_at_the_window_cutoffs():
+    today = AS_OF.toordinal()
+    at_fault_cutoff, recent_cutoff = today - AT_FAULT_WINDOW_DAYS, today - RECENT_ACCIDENTS_WINDOW_DAYS
+    # 3 at-fault accidents on the cutoff, the same a day earlier, one accident on the 3 year cutoff
+    dates = [at_fault_cutoff] * 3 + [at_fault_cutoff - 1] * 3 + [recent_cutoff]
+    batch = VehicleBatch([6, 6, 6], [0, 3, 6, 7], dates, [True] * 6 + [False])
+    scenarios = [VehicleScenario(), VehicleScenario(name="lenient", max_at_fault=3, crash_course_fee=0.5)]
+
+    result = run_scenarios(batch, scenarios, AS_OF)
+
+    assert result.rejections.tolist() == [[RuleCode.DEMOLITION_DERBY, RuleCode.ACCEPTED, RuleCode.ACCEPTED],
+                                          [RuleCode.ACCEPTED, RuleCode.ACCEPTED, RuleCode.ACCEPTED]]
+    np.testing.assert_allclose(result.premiums, [[np.nan, 525, 625], [525, 525, 775]])
+    np.testing.assert_array_equal(result.rejections[0], calculate_premiums(batch, 500, AS_OF).rejections)
+
+
+def test_summaries():
+    batch = generate_vehicle_batch(2500, AS_OF, seed=4)
+    grid = scenario_grid(VehicleScenario, max_at_fault=[1, 2])
+
+    summary = run_scenarios(batch, grid, AS_OF).summary()
+
+    assert summary == pytest.approx(summarize_scenarios(batch, grid, AS_OF, chunk_size=1000))
+    expected = calculate_premiums(batch, 500, AS_OF)
+    baseline = summary[1]
+    assert baseline["revenue"] == pytest.approx(np.nansum(expected.premiums))
+    assert baseline["accepted"] == expected.accepted.sum()
+    assert baseline["rejection_rate"] == pytest.approx(1 - expected.accepted.mean())
+    assert summary[0]["rejections"]["DEMOLITION_DERBY"] > baseline["rejections"].get("DEMOLITION_DERBY", 0)
+
+
+def test_scenario_validation():
+    with pytest.raises(ValueError):
+        scenario_grid(VehicleScenario, max_parrots=[1])
+    with pytest.raises(ValueError):
+        run_scenarios(generate_house_batch(10), [VehicleScenario()], AS_OF)
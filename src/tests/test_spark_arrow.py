@@ -0,0 +1,52 @@
+import pytest
+from datetime import date
+
+pytest.importorskip("pyspark")
+pytest.importorskip("pyarrow")
+
+from pyspark.sql import functions as F
+from main.spark_arrow import price_houses_arrow, price_vehicles_arrow
+from main.spark_job import (build_session, generate_houses, generate_vehicles, price_houses,
+                            price_vehicles)
+
+AS_OF = date(2025, 2, 17)
+
+
+@pytest.fixture(scope="module")
+def spark():
+    session = build_session("test_spark_arrow", "local[2]")
+    yield session
+    session.stop()
+
+
+def test_arrow_vehicle_pricing_matches_native(spark):
+    policies = generate_vehicles(spark, 5000, AS_OF, seed=3)
+    native = price_vehicles(policies, AS_OF).select("rule_code", "premium").collect()
+    arrow = price_vehicles_arrow(policies, AS_OF).select("rule_code", "premium").collect()
+    assert arrow == native
+
+
+def test_arrow_house_pricing_matches_native(spark):
+    policies = generate_houses(spark, 5000, seed=4)
+    native = price_houses(policies).select("rule_code", "premium").collect()
+    arrow = price_houses_arrow(policies).select("rule_code", "premium").collect()
+    assert arrow == native
+
+
+def test_arrow_pricing_of_null_inputs_matches_native(spark):
+    history = F.col("accident_history")
+    vehicles = generate_vehicles(spark, 2000, AS_OF, seed=5).withColumns({
+        "age": F.when(F.size(history) == 2, None).otherwise(F.col("age")),
+        "accident_history": F.when(F.size(history) == 0, None).otherwise(F.transform(
+            history, lambda a: a.withField("date", F.when(a["at_fault"], None).otherwise(a["date"])))),
+    })
+    houses = generate_houses(spark, 2000, seed=5).withColumns({
+        "flood_risk": F.when(F.col("n_parrots") == 1, None).otherwise(F.col("flood_risk")),
+        "n_parrots": F.when(F.col("age") % 9 == 0, None).otherwise(F.col("n_parrots")),
+        "windows": F.when(F.col("age") % 11 == 0, None).otherwise(F.col("windows")),
+    })
+
+    assert (price_vehicles_arrow(vehicles, AS_OF).select("rule_code", "premium").collect()
+            == price_vehicles(vehicles, AS_OF).select("rule_code", "premium").collect())
+    assert (price_houses_arrow(houses).select("rule_code", "premium").collect()
+            == price_houses(houses).select("rule_code", "premium").collect())
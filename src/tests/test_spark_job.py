@@ -0,0 +1,94 @@
+import pytest
+from datetime import date
+
+pyspark = pytest.importorskip("pyspark")
+
+from main.policies.house_policy import HousePolicy
+from main.policies.vehicle_policy import VehiclePolicy
+from main.premium_calculator import PremiumCalculator
+from main.quoting import quote
+from main.rules import RuleCode
+from pyspark.sql.types import StringType, StructField, StructType
+from main.spark_job import (build_session, generate_houses, generate_vehicles, house_policy_schema,
+                            price_houses, price_vehicles, vehicle_policy_schema)
+
+AS_OF = date(2025, 2, 17)
+
+VEHICLES = [
+    (16, "vehicle", [{"date": "2023-04-23", "at_fault": False}]),
+    (6, "vehicle", [{"date": "2022-07-20", "at_fault": True}, {"date": "2023-04-23", "at_fault": True},
+                    {"date": "2024-02-23", "at_fault": True}]),
+    (6, "vehicle", [{"date": "2022-07-20", "at_fault": False}, {"date": "2023-04-23", "at_fault": True},
+                    {"date": "2024-01-12", "at_fault": False}]),
+    (3, "vehicle", []),
+    (8, "vehicle", None),
+]
+
+HOUSES = [
+    (16, "house", "HIGH", 6, {"intact": 5, "broken": 0}),
+    (52, "house", "LOW", 0, {"intact": 2, "broken": 3}),
+    (25, "house", "MEDIUM", 1, {"intact": 4, "broken": 1}),
+    (3, "house", "LOW", 0, {"intact": 6, "broken": 0}),
+    (3, "house", "LOW", 0, {"intact": 6}),
+]
+
+
+@pytest.fixture(scope="module")
+def spark():
+    session = build_session("test_spark_job", "local[2]")
+    yield session
+    session.stop()
+
+
+def test_price_vehicles_matches_premium_calculator(spark):
+    df = spark.createDataFrame(VEHICLES, schema=vehicle_policy_schema)
+    rows = price_vehicles(df, AS_OF).collect()
+
+    calculator = PremiumCalculator(500, as_of=AS_OF)
+    for (age, _, history), row in zip(VEHICLES, rows):
+        expected = calculator.evaluate(VehiclePolicy(age=f"{age} years", accident_history=history or []))
+        assert row["rule_code"] == expected.rule
+        assert row["premium"] == expected.premium
+
+
+def test_price_houses_matches_premium_calculator(spark):
+    df = spark.createDataFrame(HOUSES, schema=house_policy_schema)
+    rows = price_houses(df).collect()
+
+    calculator = PremiumCalculator(300, as_of=AS_OF)
+    for (age, _, flood_risk, n_parrots, windows), row in zip(HOUSES, rows):
+        policy = HousePolicy(age=f"{age} years", flood_risk=flood_risk, n_parrots=n_parrots, windows=windows)
+        expected = calculator.evaluate(policy)
+        assert row["rule_code"] == expected.rule
+        assert row["premium"] == expected.premium
+
+
+@pytest.mark.parametrize("age", ["6 years", " 6  YEARS ", "+6 years", "16 years", "3 months", "6", "6 years old",
+                                 "-1 years", "years", "", None])
+def test_invalid_string_ages_are_rejected_like_quote(spark, age):
+    schema = StructType([StructField("age", StringType(), True)] + vehicle_policy_schema.fields[1:])
+    row = price_vehicles(spark.createDataFrame([(age, "vehicle", [])], schema=schema), AS_OF).first()
+
+    expected = quote("vehicle", {"age": age, "accident_history": []})
+    if expected["outcome"] == "ERROR":
+        assert (row["rule_code"], row["premium"]) == (RuleCode.INVALID_AGE, None)
+    else:
+        assert (RuleCode(row["rule_code"]).name if row["rule_code"] else None, row["premium"]) == (
+            expected["rule"], expected["premium"])
+
+
+def test_null_and_negative_integer_ages_are_rejected(spark):
+    vehicles = spark.createDataFrame([(None, "vehicle", []), (-1, "vehicle", [])], schema=vehicle_policy_schema)
+    houses = spark.createDataFrame([(None, "house", "LOW", 0, {"intact": 1, "broken": 0})], schema=house_policy_schema)
+    for row in price_vehicles(vehicles, AS_OF).collect() + price_houses(houses).collect():
+        assert (row["rule_code"], row["premium"]) == (RuleCode.INVALID_AGE, None)
+
+
+def test_pricing_plan_has_no_shuffle(spark):
+    vehicles = price_vehicles(generate_vehicles(spark, 1000, AS_OF), AS_OF)
+    houses = price_houses(generate_houses(spark, 1000))
+    for df in (vehicles, houses):
+        plan = df._jdf.queryExecution().executedPlan().toString()
+        assert "Exchange" not in plan
+        assert "Generate" not in plan
+        assert df.count() == 1000
@@ -0,0 +1,55 @@
+import io
+import json
+import sys
+from main.quoting import quote
+from main.streaming import stream_quotes
+
+
+def test_quote_ok():
+    result = quote("vehicle", {"age": "3 years", "accident_history": []})
+    assert result["outcome"] == "OK"
+    assert result["premium"] == 500
+    assert result["message"] == "Premium for vehicle policy: $500.00"
+
+
+def test_quote_blocked_and_errors():
+    assert quote("vehicle", {"age": "16 years", "accident_history": []})["outcome"] == "BLOCKED"
+    assert quote("house", {"age": "3 years"})["message"] == "Error processing quote: 'flood_risk'"
+    assert quote("boat", {})["outcome"] == "ERROR"
+
+
+def test_stream_quotes_keeps_request_ids_and_order():
+    source = io.StringIO(
+        '{"product_type": "vehicle", "age": "3 years", "accident_history": []}\n'
+        '\n'
+        '{"request_id": "q-2", "product_type": "house", "age": "3 years", "flood_risk": "LOW", '
+        '"n_parrots": 0, "windows": {"intact": 6, "broken": 0}}\n'
+        'not json\n'
+    )
+    sink = io.StringIO()
+
+    stats = stream_quotes(source, sink)
+
+    results = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert [r["request_id"] for r in results] == [1, "q-2", 4]
+    assert [r["outcome"] for r in results] == ["OK", "OK", "ERROR"]
+    assert results[1]["product_type"] == "house"
+    assert results[1]["premium"] == 300
+    assert stats.processed == 3
+    assert stats.outcomes == {"OK": 2, "ERROR": 1}
+
+
+def test_stream_quotes_to_stdout_keeps_prints_out_of_the_results(capsys, monkeypatch):
+    def noisy_quote(product_type, payload):
+        print("diagnostic output")
+        return quote(product_type, payload)
+
+    monkeypatch.setattr("main.streaming.quote", noisy_quote)
+    source = io.StringIO('{"product_type": "vehicle", "age": "3 years", "accident_history": []}\n'
+                         '{"product_type": "boat"}\n')
+
+    stream_quotes(source, sys.stdout)
+
+    output = capsys.readouterr()
+    assert [json.loads(line)["outcome"] for line in output.out.splitlines()] == ["OK", "ERROR"]
+    assert output.err.count("diagnostic output") == 2